@@ -3,7 +3,7 @@ Mevcut Veriye Yeni Veri Ekleme Scripti
 Daha önce toplanmış veriye yeni veriler ekler, duplicate'leri kaldırır
 """
 import os
-import pandas as pd
+import argparse
 from datetime import datetime
 import sys
 
@@ -11,85 +11,82 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.improved_data_collection import ImprovedDataCollector
 from src.config import YOUTUBE_API_KEY, TARGET_CHANNELS, MAX_VIDEOS_PER_CHANNEL
+from src.storage import table_exists
+from src.video_store import VideoStore
 
 
-def load_existing_data(filepath='raw_data/youtube_videos_improved.csv'):
-    """Mevcut veriyi yükle"""
-    if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
-        print(f"✓ Mevcut veri yüklendi: {len(df)} video")
-        return df
-    else:
-        print(f"⚠ Mevcut veri dosyası bulunamadı: {filepath}")
-        print("   Yeni veri toplama modunda devam ediliyor...")
-        return None
-
-
-def get_existing_video_ids(df):
-    """Mevcut verideki video ID'lerini al (duplicate kontrolü için)"""
-    if df is not None and 'video_id' in df.columns:
-        return set(df['video_id'].tolist())
-    return set()
+def load_existing_data(store, filepaths=('raw_data/youtube_videos_improved.csv', 'raw_data/youtube_videos_raw.csv')):
+    """Mevcut veriyi veritabanına aktar (sadece veritabanı boşsa, bir kez)"""
+    if len(store):
+        print(f"✓ Mevcut veri yüklendi: {len(store)} video ({store.path})")
+        return len(store)
+    
+    for filepath in filepaths:
+        if table_exists(filepath):
+            inserted, _ = store.import_table(filepath)
+            print(f"✓ Mevcut veri veritabanına aktarıldı: {inserted} video ({filepath})")
+            return inserted
+    
+    print(f"⚠ Mevcut veri dosyası bulunamadı: {filepaths[0]}")
+    print("   Yeni veri toplama modunda devam ediliyor...")
+    return 0
 
 
-def merge_data(existing_df, new_df, output_path='raw_data/youtube_videos_improved.csv'):
-    """Yeni veriyi mevcut veriye ekle ve duplicate'leri kaldır"""
-    if existing_df is None:
-        # İlk veri toplama
-        print("\n" + "="*60)
-        print("ILK VERI TOPLAMA")
-        print("="*60)
-        new_df.to_csv(output_path, index=False, encoding='utf-8')
-        print(f"✓ Veri kaydedildi: {output_path}")
-        print(f"  Toplam video: {len(new_df)}")
-        return new_df
+def merge_data(store, existing_count):
+    """Toplama sırasında veritabanına yazılan yeni veriyi özetle
     
-    # Mevcut veri var, birleştir
+    Videolar toplanırken her videos.list grubu geldiği anda veritabanına
+    upsert edilir (VideoStore sink olarak verilir); aynı video_id'ye sahip
+    kayıtlar güncellenir, yeni veri bellekte biriktirilmez.
+    """
     print("\n" + "="*60)
     print("VERI BIRLESTIRME")
     print("="*60)
     
-    existing_ids = get_existing_video_ids(existing_df)
-    print(f"  Mevcut veri: {len(existing_df)} video")
-    print(f"  Yeni toplanan: {len(new_df)} video")
-    
-    # Duplicate kontrolü
-    if 'video_id' in new_df.columns:
-        new_ids = set(new_df['video_id'].tolist())
-        duplicates = existing_ids.intersection(new_ids)
-        
-        if duplicates:
-            print(f"  ⚠ Duplicate video bulundu: {len(duplicates)} adet")
-            # Duplicate'leri yeni veriden çıkar
-            new_df = new_df[~new_df['video_id'].isin(duplicates)]
-            print(f"  ✓ Duplicate'ler kaldırıldı, yeni eklenen: {len(new_df)} video")
-        else:
-            print(f"  ✓ Duplicate yok, tüm yeni veriler eklenecek")
-    
-    # Birleştir
-    merged_df = pd.concat([existing_df, new_df], ignore_index=True)
-    
-    # Tekrar duplicate kontrolü (güvenlik için)
-    if 'video_id' in merged_df.columns:
-        before_dedup = len(merged_df)
-        merged_df = merged_df.drop_duplicates(subset=['video_id'], keep='first')
-        after_dedup = len(merged_df)
-        if before_dedup != after_dedup:
-            print(f"  ⚠ Ek duplicate temizleme: {before_dedup - after_dedup} video kaldırıldı")
-    
-    # Kaydet
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    merged_df.to_csv(output_path, index=False, encoding='utf-8')
-    
-    print(f"\n✓ Birleştirilmiş veri kaydedildi: {output_path}")
-    print(f"  Toplam video: {len(merged_df)}")
-    print(f"  Eski: {len(existing_df)}, Yeni eklenen: {len(new_df)}, Toplam: {len(merged_df)}")
-    
-    return merged_df
-
-
-def main():
-    """Ana fonksiyon"""
+    inserted = len(store) - existing_count
+    updated = store.count - inserted
+    print(f"  Mevcut veri: {existing_count} video")
+    print(f"  Yeni toplanan: {store.count} video")
+    
+    if updated:
+        print(f"  ⚠ Duplicate video bulundu: {updated} adet (istatistikleri güncellendi)")
+    else:
+        print(f"  ✓ Duplicate yok, tüm yeni veriler eklendi")
+    
+    print(f"\n✓ Veritabanı güncellendi: {store.path}")
+    print(f"  Eski: {existing_count}, Yeni eklenen: {inserted}, Toplam: {len(store)}")
+    
+    return inserted, updated
+
+
+def export_data(store, output_path='raw_data/youtube_videos_improved.csv'):
+    """Veritabanını ön işleme adımının okuduğu tabloya aktar"""
+    output_path, rows = store.export(output_path)
+    print(f"✓ Veri dışa aktarıldı: {output_path} ({rows} video)")
+    return output_path
+
+
+def export_only():
+    """Yeni veri toplamadan veritabanını ön işleme tablosuna aktar"""
+    print("="*60)
+    print("VERITABANI DISA AKTARMA")
+    print("="*60)
+    store = VideoStore()
+    if not load_existing_data(store):
+        store.close()
+        return None
+    output_path = export_data(store, 'raw_data/youtube_videos_improved.csv')
+    store.close()
+    print(f"\n✅ Sonraki adım: python run_preprocessing.py  (veri ön işleme)")
+    return output_path
+
+
+def main(export=False):
+    """Ana fonksiyon
+    
+    export: toplamadan sonra tüm veritabanını ön işleme tablosuna aktar
+    (tüm veriyi okur; son çalıştırmada veya ön işlemeden önce bir kez)
+    """
     print("="*60)
     print("MEVCUT VERIYE YENI VERI EKLEME")
     print("="*60)
@@ -101,19 +98,16 @@ def main():
         print("   YOUTUBE_API_KEY=your_api_key_here")
         return
     
-    # Mevcut veriyi yükle
-    existing_df = load_existing_data('raw_data/youtube_videos_improved.csv')
-    
-    # Alternatif dosya yollarını kontrol et
-    if existing_df is None:
-        existing_df = load_existing_data('raw_data/youtube_videos_raw.csv')
-    
-    if existing_df is not None:
+    # Mevcut veriyi yükle (ilk çalıştırmada CSV/Parquet veritabanına aktarılır)
+    store = VideoStore()
+    if load_existing_data(store):
+        video_count, mean_views, channel_count = store.connection.execute(
+            'SELECT COUNT(*), AVG(target_first_week_views), COUNT(DISTINCT channel_id) FROM videos'
+        ).fetchone()
         print(f"\n📊 Mevcut Veri İstatistikleri:")
-        print(f"   Toplam video: {len(existing_df)}")
-        if 'target_first_week_views' in existing_df.columns:
-            print(f"   Ortalama görüntülenme: {existing_df['target_first_week_views'].mean():,.0f}")
-        print(f"   Kanal sayısı: {existing_df['channel_name'].nunique() if 'channel_name' in existing_df.columns else 'N/A'}")
+        print(f"   Toplam video: {video_count}")
+        print(f"   Ortalama görüntülenme: {mean_views or 0:,.0f}")
+        print(f"   Kanal sayısı: {channel_count}")
     
     # Yeni veri toplama
     print("\n" + "="*60)
@@ -134,38 +128,59 @@ def main():
     # Veri topla
     print("\n🔄 Veri toplama başlatılıyor...\n")
     collector = ImprovedDataCollector(YOUTUBE_API_KEY)
-    new_videos = collector.collect_all_data()
+    existing_count = len(store)
+    collected = collector.collect_all_data(sink=store)
     
-    if not new_videos:
+    if not collected:
         print("\n❌ Veri toplanamadı. API anahtarınızı ve internet bağlantınızı kontrol edin.")
         return
     
-    # DataFrame'e çevir
-    new_df = pd.DataFrame(new_videos)
-    print(f"\n✓ Yeni veri toplandı: {len(new_df)} video")
+    print(f"\n✓ Yeni veri toplandı: {collected} video")
     
-    # Birleştir ve kaydet
-    merged_df = merge_data(existing_df, new_df, 'raw_data/youtube_videos_improved.csv')
+    # Upsert: sadece yeni gelen gruplar yazıldı, mevcut veri yeniden okunmadı
+    merge_data(store, existing_count)
+    output_path = export_data(store, 'raw_data/youtube_videos_improved.csv') if export else None
     
     # Özet
     print("\n" + "="*60)
     print("BASARIYLA TAMAMLANDI!")
     print("="*60)
+    video_count, mean_views, min_views, max_views = store.connection.execute(
+        'SELECT COUNT(*), AVG(target_first_week_views), MIN(target_first_week_views), '
+        'MAX(target_first_week_views) FROM videos'
+    ).fetchone()
+    store.close()
     print(f"\n📊 Final İstatistikler:")
-    print(f"   Toplam video: {len(merged_df)}")
-    if 'target_first_week_views' in merged_df.columns:
-        print(f"   Ortalama görüntülenme: {merged_df['target_first_week_views'].mean():,.0f}")
-        print(f"   Min: {merged_df['target_first_week_views'].min():,.0f}")
-        print(f"   Max: {merged_df['target_first_week_views'].max():,.0f}")
+    print(f"   Toplam video: {video_count}")
+    print(f"   Ortalama görüntülenme: {mean_views or 0:,.0f}")
+    print(f"   Min: {min_views or 0:,.0f}")
+    print(f"   Max: {max_views or 0:,.0f}")
     
-    print(f"\n📁 Dosya: raw_data/youtube_videos_improved.csv")
+    if output_path:
+        print(f"\n📁 Dosya: {output_path}")
+    else:
+        print(f"\n📁 Veritabanı: {store.path}")
+        print("   raw_data/youtube_videos_improved.csv güncellenmedi (ön işleme bu tabloyu okur)")
     print(f"\n✅ Sonraki adımlar:")
-    print(f"   1. python run_preprocessing.py  (veri ön işleme)")
-    print(f"   2. python run_training.py       (model eğitimi)")
+    step = 1
+    if not output_path:
+        print(f"   {step}. python add_more_data.py --export-only  (veritabanını dışa aktar, veri toplamaz)")
+        step += 1
+    print(f"   {step}. python run_preprocessing.py  (veri ön işleme)")
+    print(f"   {step + 1}. python run_training.py       (model eğitimi)")
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Mevcut veriye yeni veri ekle')
+    parser.add_argument('--export', action='store_true',
+                        help='toplamadan sonra tüm veritabanını raw_data/youtube_videos_improved.csv tablosuna aktar')
+    parser.add_argument('--export-only', action='store_true',
+                        help='veri toplamadan yalnızca veritabanını dışa aktar')
+    args = parser.parse_args()
+    if args.export_only:
+        export_only()
+    else:
+        main(export=args.export)
 
 
 
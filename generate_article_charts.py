@@ -9,7 +9,8 @@ Outputs (overwrites):
 Charts are generated from:
 - models/model_metadata.pkl (results_summary, split info)
 - models/best_model.pkl, models/scaler.pkl, models/feature_names.pkl
-- processed_data/youtube_videos_processed_all.csv (to reconstruct test split)
+- processed_data/youtube_videos_processed_all.csv, or youtube_videos_processed.csv
+  when it does not exist (to reconstruct test split)
 """
 
 from __future__ import annotations
@@ -22,6 +23,8 @@ import seaborn as sns
 from pandas.api.types import is_numeric_dtype
 from sklearn.model_selection import train_test_split
 
+from src.storage import PROCESSED_SCHEMA, read_table, table_exists
+
 
 def main() -> int:
     sns.set_theme(style="whitegrid", font="DejaVu Sans")
@@ -104,7 +107,9 @@ def main() -> int:
 
     # --- Chart 2: y_true vs y_pred scatter + residual histogram ---
     processed_path = "processed_data/youtube_videos_processed_all.csv"
-    df = pd.read_csv(processed_path)
+    if not table_exists(processed_path):
+        # Same fallback as train_with_validation.py
+        processed_path = "processed_data/youtube_videos_processed.csv"
 
     exclude = {
         "video_id",
@@ -130,6 +135,12 @@ def main() -> int:
         "comments_per_1k_views",
         "engagement_ratio",
     }
+    # Read only the feature columns and the target
+    df = read_table(
+        processed_path,
+        schema=PROCESSED_SCHEMA,
+        exclude=exclude - {"target_first_week_views"},
+    )
 
     feature_cols = [c for c in df.columns if c not in exclude and is_numeric_dtype(df[c])]
     X = df[feature_cols].copy()
@@ -16,6 +16,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.model_training import ModelTrainer
+from src.storage import table_exists
 
 # Türkçe karakter desteği
 plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -252,7 +253,7 @@ def main():
     
     input_path = 'processed_data/youtube_videos_processed.csv'
     
-    if not os.path.exists(input_path):
+    if not table_exists(input_path):
         print(f"Hata: Veri dosyasi bulunamadi: {input_path}")
         return
     
@@ -1,9 +1,21 @@
 """
 Improve Model - Complete Pipeline
-Re-runs preprocessing with advanced features and trains improved model
+Re-runs preprocessing with advanced features and trains improved model,
+skipping either step when its inputs are unchanged since the last run
 """
 import os
 import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.pipeline_dag import (
+    Stage, PipelineRunner, python_command, PREPROCESSING_CODE, IMPROVED_TRAINING_CODE, MODEL_FILES,
+    FEATURE_TRANSFORMER_FILE
+)
+
+RAW_DATA = 'raw_data/youtube_videos_raw.csv'
+PROCESSED_DATA = 'processed_data/youtube_videos_processed.csv'
 
 def run_preprocessing():
     """Run improved data preprocessing"""
@@ -11,8 +23,12 @@ def run_preprocessing():
     print("STEP 1: IMPROVED DATA PREPROCESSING")
     print("="*60)
     from src.data_preprocessing import DataPreprocessor
-    preprocessor = DataPreprocessor()
-    df = preprocessor.preprocess('raw_data/youtube_videos_raw.csv')
+    from src.config import REMOVE_NEAR_DUPLICATES
+    from src.feature_store import FeatureStore
+    from src.near_duplicates import NearDuplicateDetector
+    near_duplicates = NearDuplicateDetector() if REMOVE_NEAR_DUPLICATES else None
+    preprocessor = DataPreprocessor(feature_store=FeatureStore(), near_duplicates=near_duplicates)
+    df = preprocessor.preprocess(RAW_DATA)
     X, y = preprocessor.select_features(df)
     print(f"\nFinal dataset: {X.shape}")
     print(f"Target stats: mean={y.mean():,.0f}, std={y.std():,.0f}, min={y.min():,.0f}, max={y.max():,.0f}")
@@ -24,11 +40,12 @@ def run_training():
     print("STEP 2: IMPROVED MODEL TRAINING")
     print("="*60)
     from src.improved_model_training import ImprovedModelTrainer
+    from src.storage import table_exists
     trainer = ImprovedModelTrainer()
     
-    input_path = 'processed_data/youtube_videos_processed.csv'
+    input_path = PROCESSED_DATA
     
-    if not os.path.exists(input_path):
+    if not table_exists(input_path):
         print(f"Error: Processed data not found: {input_path}")
         return False
     
@@ -59,28 +76,50 @@ def run_training():
     
     return True
 
+STAGE_FUNCTIONS = {
+    'preprocess': run_preprocessing,
+    'train': run_training,
+}
+
+def build_stages():
+    """Preprocessing and training as pipeline stages (each runs this script with --stage)"""
+    return [
+        Stage('improve_preprocess', python_command('improve_model.py', '--stage', 'preprocess'),
+              inputs=['improve_model.py', *PREPROCESSING_CODE, RAW_DATA],
+              outputs=[PROCESSED_DATA, FEATURE_TRANSFORMER_FILE]),
+        Stage('improve_train', python_command('improve_model.py', '--stage', 'train'),
+              inputs=['improve_model.py', *IMPROVED_TRAINING_CODE, PROCESSED_DATA], outputs=MODEL_FILES),
+    ]
+
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description='Re-run preprocessing and train the improved model')
+    parser.add_argument('--stage', choices=sorted(STAGE_FUNCTIONS),
+                        help='run only this step (used by the pipeline runner)')
+    parser.add_argument('--force', action='store_true', help='rerun both steps even if up to date')
+    args = parser.parse_args()
+    
+    if args.stage:
+        return 0 if STAGE_FUNCTIONS[args.stage]() else 1
+    
     print("\n" + "="*60)
     print("YOUTUBE SUCCESS PREDICTOR - MODEL IMPROVEMENT")
     print("="*60)
     
     # Check if raw data exists
-    if not os.path.exists('raw_data/youtube_videos_raw.csv'):
+    from src.storage import table_exists
+    if not table_exists(RAW_DATA):
         print("\nError: Raw data not found!")
         print("Please run create_sample_data.py first to create sample data.")
         print("Or use data_collection.py to collect real data from YouTube API.")
-        return
+        return 1
     
-    # Step 1: Preprocessing
-    if not run_preprocessing():
-        print("Preprocessing failed. Exiting.")
-        return
-    
-    # Step 2: Training
-    if not run_training():
-        print("Training failed. Exiting.")
-        return
+    runner = PipelineRunner(build_stages(), force=args.force)
+    runner.run()
+    runner.summary()
+    if runner.failed:
+        print("Model improvement failed (logs in .pipeline/logs). Exiting.")
+        return 1
     
     print("\n" + "="*60)
     print("SUCCESS! Model has been improved.")
@@ -89,7 +128,7 @@ def main():
     print("  1. Restart Flask app: python app.py")
     print("  2. Test predictions at: http://localhost:5000")
     print("  3. Check model performance in models/ directory")
+    return 0
 
 if __name__ == '__main__':
-    main()
-
+    sys.exit(main())
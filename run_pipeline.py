@@ -1,69 +1,119 @@
 """
 Complete Pipeline Runner
-Runs data collection, preprocessing, and model training in sequence
+Runs data collection, preprocessing, model training and the chart scripts as
+a dependency graph: stages whose inputs are unchanged since their last run
+are skipped and independent stages run in parallel
 """
 import os
 import sys
+import argparse
 
-def run_data_collection():
-    """Run data collection"""
-    print("\n" + "="*60)
-    print("STEP 1: DATA COLLECTION")
-    print("="*60)
-    from src.data_collection import main
-    main()
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def run_preprocessing():
-    """Run data preprocessing"""
-    print("\n" + "="*60)
-    print("STEP 2: DATA PREPROCESSING")
-    print("="*60)
-    from src.data_preprocessing import main
-    main()
+from src.config import YOUTUBE_API_KEY, PIPELINE_MAX_WORKERS
+from src.storage import table_exists
+from src.pipeline_dag import (
+    Stage, PipelineRunner, python_command, COMMON_CODE, COLLECTION_CODE,
+    PREPROCESSING_CODE, TRAINING_CODE, IMPROVED_TRAINING_CODE, MODEL_FILES, FEATURE_TRANSFORMER_FILE
+)
+
+RAW_DATA = 'raw_data/youtube_videos_raw.csv'
+IMPROVED_DATA = 'raw_data/youtube_videos_improved.csv'
+PROCESSED_DATA = 'processed_data/youtube_videos_processed.csv'
+PROCESSED_ALL_DATA = 'processed_data/youtube_videos_processed_all.csv'
+
+VISUALIZATION_FILES = [
+    'visualizations/model_comparison_metrics.png',
+    'visualizations/validation_r2_selection.png',
+    'visualizations/test_set_performance.png',
+    'visualizations/performance_heatmap.png',
+    'visualizations/validation_vs_test.png',
+]
+
+ARTICLE_CHART_FILES = [
+    'grafikler/article_chart1_accuracy_loss.png',
+    'grafikler/article_chart2_loss_convergence.png',
+]
+
+
+def build_stages(collect=False, article=False):
+    """Pipeline stages with the files each one reads and writes
+    
+    article: train with train_with_validation.py (70/15/15 split, per-model
+    results in the metadata) instead of run_training.py and add the article
+    charts, which are drawn from that run
+    """
+    stages = []
+    if collect:
+        stages.append(Stage(
+            'collect', python_command('src/data_collection.py'),
+            inputs=COLLECTION_CODE, outputs=[RAW_DATA], always_run=True
+        ))
+    
+    # run_preprocessing.py prefers the improved collection when it exists
+    raw_input = IMPROVED_DATA if table_exists(IMPROVED_DATA) else RAW_DATA
+    stages.append(Stage(
+        'preprocess', python_command('run_preprocessing.py'),
+        inputs=['run_preprocessing.py', *PREPROCESSING_CODE, raw_input],
+        outputs=[PROCESSED_DATA, FEATURE_TRANSFORMER_FILE]
+    ))
+    if article:
+        # train_with_validation.py prefers the unfiltered processed table when it exists
+        validation_input = PROCESSED_ALL_DATA if table_exists(PROCESSED_ALL_DATA) else PROCESSED_DATA
+        stages.append(Stage(
+            'train', python_command('train_with_validation.py'),
+            inputs=['train_with_validation.py', *IMPROVED_TRAINING_CODE, validation_input], outputs=MODEL_FILES
+        ))
+    else:
+        stages.append(Stage(
+            'train', python_command('run_training.py'),
+            inputs=['run_training.py', *TRAINING_CODE, PROCESSED_DATA], outputs=MODEL_FILES
+        ))
+    stages.append(Stage(
+        'visualizations', python_command('generate_visualizations.py'),
+        inputs=['generate_visualizations.py', *TRAINING_CODE, PROCESSED_DATA], outputs=VISUALIZATION_FILES
+    ))
+    if article:
+        stages.append(Stage(
+            'article_charts', python_command('generate_article_charts.py'),
+            inputs=['generate_article_charts.py', *COMMON_CODE, *MODEL_FILES, validation_input],
+            outputs=ARTICLE_CHART_FILES
+        ))
+    return stages
 
-def run_training():
-    """Run model training"""
-    print("\n" + "="*60)
-    print("STEP 3: MODEL TRAINING")
-    print("="*60)
-    from src.model_training import main
-    main()
 
 def main():
     """Run complete pipeline"""
+    parser = argparse.ArgumentParser(description='Run the pipeline, skipping up-to-date stages')
+    parser.add_argument('--collect', action='store_true',
+                        help='collect fresh data from the YouTube API first (always reruns)')
+    parser.add_argument('--article', action='store_true',
+                        help='train with the train/validation/test split and draw the article charts')
+    parser.add_argument('--force', nargs='*', metavar='STAGE',
+                        help='rerun these stages (all stages when none are named)')
+    parser.add_argument('--dry-run', action='store_true', help='only show which stages would run')
+    parser.add_argument('--workers', type=int, default=PIPELINE_MAX_WORKERS,
+                        help='stages run in parallel at most')
+    args = parser.parse_args()
+    
     print("\n" + "="*60)
     print("YOUTUBE SUCCESS PREDICTOR - COMPLETE PIPELINE")
     print("="*60)
     
-    # Check if .env exists
-    if not os.path.exists('.env'):
-        print("\n⚠️  WARNING: .env file not found!")
-        print("Please create a .env file with your YouTube API key.")
-        print("See .env.example for reference.")
-        response = input("\nContinue anyway? (y/n): ")
-        if response.lower() != 'y':
-            return
+    collect = args.collect
+    if collect and not YOUTUBE_API_KEY:
+        print("\n⚠️  WARNING: YOUTUBE_API_KEY not set (see .env.example), skipping data collection")
+        collect = False
     
-    # Step 1: Data Collection
-    try:
-        run_data_collection()
-    except Exception as e:
-        print(f"\n❌ Error in data collection: {e}")
-        print("Skipping to preprocessing (if data exists)...")
+    force = True if args.force == [] else (args.force or ())
+    runner = PipelineRunner(build_stages(collect, args.article), max_workers=args.workers,
+                            force=force, dry_run=args.dry_run)
+    runner.run()
+    runner.summary()
     
-    # Step 2: Preprocessing
-    try:
-        run_preprocessing()
-    except Exception as e:
-        print(f"\n❌ Error in preprocessing: {e}")
-        print("Skipping to training (if processed data exists)...")
-    
-    # Step 3: Training
-    try:
-        run_training()
-    except Exception as e:
-        print(f"\n❌ Error in training: {e}")
-        return
+    if runner.failed:
+        print("\n❌ Pipeline finished with failed stages (logs in .pipeline/logs)")
+        return 1
     
     print("\n" + "="*60)
     print("✅ PIPELINE COMPLETE!")
@@ -71,7 +121,7 @@ def main():
     print("\nYou can now run the Flask app:")
     print("  python app.py")
     print("\nThen visit: http://localhost:5000")
+    return 0
 
 if __name__ == '__main__':
-    main()
-
+    sys.exit(main())
@@ -1,23 +1,71 @@
 """Run data preprocessing"""
 import sys
 import os
+import argparse
+import tracemalloc
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.data_preprocessing import DataPreprocessor
+from src.config import (
+    FEATURE_MEMORY_BUDGET, FEATURE_MEMORY_SLACK_MB, PREPROCESS_CHUNK_SIZE, PREPROCESS_WORKERS, REMOVE_NEAR_DUPLICATES
+)
+from src.data_preprocessing import DataPreprocessor, code_point_flags
+from src.storage import table_exists
+from src.feature_store import FeatureStore
+from src.near_duplicates import NearDuplicateDetector
 
 if __name__ == '__main__':
-    preprocessor = DataPreprocessor()
+    parser = argparse.ArgumentParser(description='Clean raw data and engineer features')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='report peak memory per feature step and fail above FEATURE_MEMORY_BUDGET')
+    parser.add_argument('--chunked', action='store_true',
+                        help='process the table in chunks with bounded memory (for corpora larger than RAM)')
+    parser.add_argument('--chunksize', type=int, default=PREPROCESS_CHUNK_SIZE, help='rows per chunk')
+    parser.add_argument('--workers', type=int, default=PREPROCESS_WORKERS,
+                        help='processes for feature engineering (0 = one per CPU core)')
+    parser.add_argument('--near-duplicates', action='store_true', default=REMOVE_NEAR_DUPLICATES,
+                        help='drop near-duplicate videos while cleaning (python -m src.near_duplicates only reports them)')
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count()
+    if args.profile_memory and workers > 1:
+        # Worker processes are not traced, so the budget check would see no peaks at all
+        parser.error('--profile-memory traces this process only; run it with --workers 1')
+    
+    if args.chunked:
+        preprocessor = DataPreprocessor(workers=workers)
+    else:
+        near_duplicates = NearDuplicateDetector() if args.near_duplicates else None
+        preprocessor = DataPreprocessor(feature_store=FeatureStore(), near_duplicates=near_duplicates, workers=workers)
+    
+    if args.profile_memory:
+        # Build the one-off character table first so it does not count against the budget
+        code_point_flags()
+        tracemalloc.start()
     
     # Önce yeni dosyayı kontrol et, yoksa eski dosyayı kullan
     input_file = 'raw_data/youtube_videos_improved.csv'
-    if not os.path.exists(input_file):
+    if not table_exists(input_file):
         input_file = 'raw_data/youtube_videos_raw.csv'
         print(f"⚠ youtube_videos_improved.csv bulunamadı, {input_file} kullanılıyor")
     else:
         print(f"✓ {input_file} kullanılıyor")
     
+    if args.chunked:
+        preprocessor.preprocess_chunked(input_file, chunksize=args.chunksize)
+        sys.exit(0)
+    
     df = preprocessor.preprocess(input_file)
     X, y = preprocessor.select_features(df)
     print(f"\nFinal dataset: {X.shape}")
     print(f"Target stats: mean={y.mean():,.0f}, min={y.min():,.0f}, max={y.max():,.0f}")
-
+    
+    if args.profile_memory and not preprocessor.memory_peaks:
+        print("\nNo rows were engineered (all cached in the feature store), nothing to profile")
+    elif args.profile_memory:
+        tracemalloc.stop()
+        peak = max(preprocessor.memory_peaks.values())
+        limit = FEATURE_MEMORY_BUDGET * preprocessor.memory_input_bytes + FEATURE_MEMORY_SLACK_MB * 2**20
+        if peak > limit:
+            print(f"\n❌ Feature engineering peak {peak / 2**20:.1f} MB exceeds the budget "
+                  f"({FEATURE_MEMORY_BUDGET}x input + {FEATURE_MEMORY_SLACK_MB} MB = {limit / 2**20:.1f} MB)")
+            sys.exit(1)
+        print(f"\n✓ Feature engineering peak {peak / 2**20:.1f} MB within the budget ({limit / 2**20:.1f} MB)")
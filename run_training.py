@@ -4,13 +4,14 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.model_training import ModelTrainer
+from src.storage import table_exists
 
 if __name__ == '__main__':
     trainer = ModelTrainer()
     
     input_path = 'processed_data/youtube_videos_processed.csv'
     
-    if not os.path.exists(input_path):
+    if not table_exists(input_path):
         print(f"Error: Processed data not found: {input_path}")
         exit(1)
     
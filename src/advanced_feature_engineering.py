@@ -6,31 +6,29 @@ import pandas as pd
 import numpy as np
 import re
 from datetime import datetime
-from pandas.api.types import is_numeric_dtype
+from src.keyword_matcher import title_matcher
+from src.feature_frame import FeatureFrame, clean_value
+from src.feature_transformer import CATEGORY_BINS, cut_value
+from src.parsing_utils import parse_timestamp, parse_timestamps
 
 
 class AdvancedFeatureEngineer:
-    """Advanced feature engineering for YouTube video success prediction"""
+    """Advanced feature engineering for YouTube video success prediction
     
-    def __init__(self):
-        pass
-
-    def _sanitize_numeric(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Replace inf with NaN and fill NaN with 0 ONLY for numeric columns.
-        (Categorical columns like 'channel_size' cannot accept fillna(0).)
-        """
-        df = df.copy()
-        df = df.replace([np.inf, -np.inf], np.nan)
-        numeric_cols = [c for c in df.columns if is_numeric_dtype(df[c])]
-        if numeric_cols:
-            df[numeric_cols] = df[numeric_cols].fillna(0)
-        return df
+    The create_* methods add their columns to a FeatureFrame in place. They
+    read only input and basic features, which engineer_all_features cleans
+    of inf/NaN once up front; the new columns are cleaned once at the end.
+    """
+    
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+    
+    def log(self, message=''):
+        if self.verbose:
+            print(message)
     
     def create_interaction_features(self, df):
         """Create interaction features between important variables"""
-        df = self._sanitize_numeric(df)
-        
         # Title length × Channel subscribers (bigger channels benefit more from good titles)
         df['title_length_x_subscribers'] = df['title_length'] * np.log1p(df['channel_subscribers'])
         
@@ -61,8 +59,6 @@ class AdvancedFeatureEngineer:
     
     def create_polynomial_features(self, df):
         """Create polynomial features for non-linear relationships"""
-        df = self._sanitize_numeric(df)
-        
         # Square of important features
         df['title_length_squared'] = df['title_length'] ** 2
         df['duration_minutes_squared'] = df['duration_minutes'] ** 2
@@ -76,8 +72,6 @@ class AdvancedFeatureEngineer:
     
     def create_ratio_features(self, df):
         """Create ratio features"""
-        df = self._sanitize_numeric(df)
-        
         # Title length to word count ratio (word density)
         df['title_length_to_words'] = df['title_length'] / (df['title_word_count'] + 1)
         
@@ -94,26 +88,26 @@ class AdvancedFeatureEngineer:
     
     def create_time_features(self, df):
         """Create advanced time-based features"""
-        df = self._sanitize_numeric(df)
-        
         # Convert publish date to datetime if not already
         if 'published_at' in df.columns:
-            df['published_at'] = pd.to_datetime(df['published_at'])
+            published = parse_timestamps(df['published_at'])
+            df['published_at'] = published
+            day = published.dt.day
             
             # Day of month
-            df['publish_day_of_month'] = df['published_at'].dt.day
+            df['publish_day_of_month'] = day
             
             # Week of year
-            df['publish_week_of_year'] = df['published_at'].dt.isocalendar().week
+            df['publish_week_of_year'] = published.dt.isocalendar().week
             
             # Quarter
-            df['publish_quarter'] = df['published_at'].dt.quarter
+            df['publish_quarter'] = published.dt.quarter
             
             # Is month end (videos at month end might perform differently)
-            df['is_month_end'] = (df['published_at'].dt.day > 25).astype(int)
+            df['is_month_end'] = (day > 25).astype(int)
             
             # Is month start
-            df['is_month_start'] = (df['published_at'].dt.day <= 7).astype(int)
+            df['is_month_start'] = (day <= 7).astype(int)
         
         # Hour squared (non-linear relationship with hour)
         df['publish_hour_squared'] = df['publish_hour'] ** 2
@@ -128,46 +122,32 @@ class AdvancedFeatureEngineer:
     
     def create_title_advanced_features(self, df):
         """Create advanced title analysis features"""
-        df = self._sanitize_numeric(df)
-        
-        # Title sentiment indicators
-        positive_words = ['best', 'top', 'amazing', 'awesome', 'great', 'ultimate', 'complete', 'perfect']
-        negative_words = ['worst', 'bad', 'terrible', 'avoid', 'never', 'don\'t', 'stop']
-        
-        df['title_positive_words'] = df['title'].apply(
-            lambda x: sum(1 for word in positive_words if word in str(x).lower())
-        )
-        df['title_negative_words'] = df['title'].apply(
-            lambda x: sum(1 for word in negative_words if word in str(x).lower())
-        )
+        # Title keyword counts (sentiment, power words) and colon/dash flags, one scan per title
+        titles = df['title'].fillna('').astype(str)
+        counts = title_matcher().count(titles)
+        df['title_positive_words'] = counts['positive']
+        df['title_negative_words'] = counts['negative']
         
         # Title contains power words
-        power_words = ['secret', 'hack', 'trick', 'method', 'system', 'guide', 'tutorial', 'learn', 'master']
-        df['title_power_words'] = df['title'].apply(
-            lambda x: sum(1 for word in power_words if word in str(x).lower())
-        )
+        df['title_power_words'] = counts['power']
         
         # Title contains numbers in different formats
-        df['title_has_digit'] = df['title'].apply(lambda x: 1 if re.search(r'\d', str(x)) else 0)
-        df['title_number_count'] = df['title'].apply(lambda x: len(re.findall(r'\d+', str(x))))
+        df['title_has_digit'] = titles.str.contains(r'\d').astype(int)
+        df['title_number_count'] = titles.str.count(r'\d+')
         
         # Title capitalization patterns
-        df['title_starts_with_capital'] = df['title'].apply(
-            lambda x: 1 if len(str(x)) > 0 and str(x)[0].isupper() else 0
-        )
+        df['title_starts_with_capital'] = titles.str[:1].str.isupper().astype(int)
         
         # Title has colon (common in tutorial videos)
-        df['title_has_colon'] = df['title'].apply(lambda x: 1 if ':' in str(x) else 0)
+        df['title_has_colon'] = (counts['colon'] > 0).astype(int)
         
         # Title has dash or pipe
-        df['title_has_dash'] = df['title'].apply(lambda x: 1 if '-' in str(x) or '|' in str(x) else 0)
+        df['title_has_dash'] = (counts['dash'] > 0).astype(int)
         
         return df
     
     def create_channel_advanced_features(self, df):
         """Create advanced channel features"""
-        df = self._sanitize_numeric(df)
-        
         # Channel age (estimated from video count and upload frequency)
         # Assuming average upload frequency
         df['estimated_channel_age_months'] = df['channel_video_count'] / 4  # ~4 videos per month
@@ -181,7 +161,7 @@ class AdvancedFeatureEngineer:
         # Channel size category (numeric)
         df['channel_size_numeric'] = pd.cut(
             df['channel_subscribers'],
-            bins=[0, 10000, 100000, 1000000, float('inf')],
+            bins=CATEGORY_BINS['channel_size'][0],
             labels=[1, 2, 3, 4]
         ).astype(float)
         
@@ -189,8 +169,6 @@ class AdvancedFeatureEngineer:
     
     def create_content_quality_features(self, df):
         """Create content quality indicators"""
-        df = self._sanitize_numeric(df)
-        
         # Content completeness score
         completeness = (
             (df['description_length'] > 100).astype(int) * 0.3 +
@@ -223,35 +201,143 @@ class AdvancedFeatureEngineer:
         return df
     
     def engineer_all_features(self, df):
-        """Apply all advanced feature engineering"""
-        print("\n=== Advanced Feature Engineering ===")
+        """Apply all advanced feature engineering
         
-        print("Creating interaction features...")
-        df = self.create_interaction_features(df)
+        Takes a DataFrame (returns a new one) or a FeatureFrame (adds to it).
+        """
+        self.log("\n=== Advanced Feature Engineering ===")
+        as_frame = isinstance(df, pd.DataFrame)
+        if as_frame:
+            df = FeatureFrame(df)
         
-        print("Creating polynomial features...")
-        df = self.create_polynomial_features(df)
+        # Numeric inputs: inf/NaN -> 0 (categoricals can't accept fillna(0))
+        with df.stage('sanitize_inputs'):
+            df.sanitize()
         
-        print("Creating ratio features...")
-        df = self.create_ratio_features(df)
+        self.log("Creating interaction features...")
+        with df.stage('interaction'):
+            df = self.create_interaction_features(df)
         
-        print("Creating advanced time features...")
-        df = self.create_time_features(df)
+        self.log("Creating polynomial features...")
+        with df.stage('polynomial'):
+            df = self.create_polynomial_features(df)
         
-        print("Creating advanced title features...")
-        df = self.create_title_advanced_features(df)
+        self.log("Creating ratio features...")
+        with df.stage('ratio'):
+            df = self.create_ratio_features(df)
         
-        print("Creating advanced channel features...")
-        df = self.create_channel_advanced_features(df)
+        self.log("Creating advanced time features...")
+        with df.stage('advanced_time'):
+            df = self.create_time_features(df)
         
-        print("Creating content quality features...")
-        df = self.create_content_quality_features(df)
+        self.log("Creating advanced title features...")
+        with df.stage('advanced_title'):
+            df = self.create_title_advanced_features(df)
         
-        # Final cleanup: sanitize numeric columns only (categoricals can't accept fillna(0))
-        df = self._sanitize_numeric(df)
-        df = df.replace([np.inf, -np.inf], 0)
+        self.log("Creating advanced channel features...")
+        with df.stage('advanced_channel'):
+            df = self.create_channel_advanced_features(df)
         
-        print(f"Total features after advanced engineering: {df.shape[1]}")
+        self.log("Creating content quality features...")
+        with df.stage('content_quality'):
+            df = self.create_content_quality_features(df)
         
-        return df
-
+        # Final cleanup of the new columns, each cleaned once
+        with df.stage('sanitize_features'):
+            df.sanitize()
+        
+        self.log(f"Total features after advanced engineering: {df.shape[1]}")
+        
+        return df.to_frame() if as_frame else df
+    
+    def engineer_all_features_row(self, features):
+        """engineer_all_features for one row dict (DataPreprocessor.engineer_features_row); returns a new dict
+        
+        Mirrors the create_* methods value by value: inputs cleaned of
+        inf/NaN, the same features added in the same order, then cleaned.
+        """
+        f = {name: clean_value(value) for name, value in features.items()}
+        title = '' if pd.isna(f['title']) else str(f['title'])
+        subscribers = f['channel_subscribers']
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_subscribers = np.log1p(subscribers)
+            
+            # Interaction features
+            title_quality = int(f.get('title_is_tutorial', 0)) + int(f.get('title_has_number', 0)) \
+                + int(f.get('title_is_question', 0))
+            f['title_length_x_subscribers'] = f['title_length'] * log_subscribers
+            f['duration_x_prime_time'] = f['duration_minutes'] * f['is_prime_time']
+            f['title_quality_x_channel_size'] = title_quality * log_subscribers
+            f['weekend_x_prime_time'] = f['is_weekend'] * f['is_prime_time']
+            f['duration_x_channel_size'] = f['duration_minutes'] * log_subscribers
+            f['tag_count_x_title_length'] = f['tag_count'] * f['title_length']
+            f['description_length_x_tags'] = f['description_length'] * f['tag_count']
+            
+            # Polynomial features
+            f['title_length_squared'] = f['title_length'] ** 2
+            f['duration_minutes_squared'] = f['duration_minutes'] ** 2
+            f['channel_subscribers_log'] = log_subscribers
+            f['channel_subscribers_sqrt'] = np.sqrt(np.float64(subscribers))
+            f['channel_subscribers_cbrt'] = np.cbrt(np.float64(subscribers))
+            
+            # Ratio features
+            f['title_length_to_words'] = np.divide(f['title_length'], f['title_word_count'] + 1)
+            f['description_to_title_ratio'] = np.divide(f['description_length'], f['title_length'] + 1)
+            f['tags_to_title_ratio'] = np.divide(f['tag_count'], f['title_length'] + 1)
+            f['video_frequency'] = np.divide(f['channel_video_count'], log_subscribers + 1)
+            
+            # Time features
+            published = parse_timestamp(f['published_at'])
+            f['published_at'] = published
+            f['publish_day_of_month'] = published.day
+            f['publish_week_of_year'] = published.isocalendar()[1]
+            f['publish_quarter'] = published.quarter
+            f['is_month_end'] = int(published.day > 25)
+            f['is_month_start'] = int(published.day <= 7)
+            f['publish_hour_squared'] = f['publish_hour'] ** 2
+            f['publish_hour_sin'] = np.sin(2 * np.pi * f['publish_hour'] / 24)
+            f['publish_hour_cos'] = np.cos(2 * np.pi * f['publish_hour'] / 24)
+            f['publish_day_of_week_sin'] = np.sin(2 * np.pi * f['publish_day_of_week'] / 7)
+            f['publish_day_of_week_cos'] = np.cos(2 * np.pi * f['publish_day_of_week'] / 7)
+            
+            # Title features
+            counts = title_matcher().count_one(title)
+            f['title_positive_words'] = counts['positive']
+            f['title_negative_words'] = counts['negative']
+            f['title_power_words'] = counts['power']
+            f['title_has_digit'] = int(re.search(r'\d', title) is not None)
+            f['title_number_count'] = len(re.findall(r'\d+', title))
+            f['title_starts_with_capital'] = int(title[:1].isupper())
+            f['title_has_colon'] = int(counts['colon'] > 0)
+            f['title_has_dash'] = int(counts['dash'] > 0)
+            
+            # Channel features
+            f['estimated_channel_age_months'] = f['channel_video_count'] / 4
+            f['subscriber_growth_rate'] = np.divide(subscribers, f['channel_video_count'] + 1)
+            f['estimated_engagement_rate'] = np.divide(f['channel_view_count'], subscribers + 1)
+            size = cut_value(subscribers, 'channel_size', labels=[1, 2, 3, 4])
+            f['channel_size_numeric'] = np.nan if size is None else float(size)
+        
+        # Content quality features
+        f['content_completeness_score'] = (
+            int(f['description_length'] > 100) * 0.3 +
+            int(f['tag_count'] >= 5) * 0.3 +
+            int(f['title_length'] >= 40) * 0.2 +
+            int(f['title_is_tutorial'] == 1) * 0.2
+        )
+        f['seo_score'] = (
+            int(50 <= f['title_length'] <= 60) * 0.3 +
+            int(8 <= f['tag_count'] <= 12) * 0.2 +
+            int(f['description_length'] > 200) * 0.2 +
+            int(f['title_has_number'] == 1) * 0.15 +
+            int(f['title_is_question'] == 1) * 0.15
+        )
+        f['engagement_potential_score'] = (
+            int(f['is_prime_time'] == 1) * 0.3 +
+            int(10 <= f['duration_minutes'] <= 15) * 0.3 +
+            int(f['title_is_tutorial'] == 1) * 0.2 +
+            int(f['title_has_emoji'] == 1) * 0.1 +
+            int(f['is_weekend'] == 0) * 0.1
+        )
+        return {name: clean_value(value) for name, value in f.items()}
@@ -0,0 +1,372 @@
+"""
+YouTube Data API Fixture Server
+Local stand-in for the channels.list, playlistItems.list, videos.list,
+channelSections.list and search.list endpoints used by the collector and
+channel discovery, for offline benchmarking and CI
+
+Modes:
+- synthetic: serves responses generated from src/create_sample_data.py
+- replay:    serves responses previously saved in record mode
+- record:    proxies to the real API and saves every response
+
+Point the collector at it with YOUTUBE_API_ENDPOINT=http://127.0.0.1:8765/
+"""
+import os
+import sys
+import json
+import time
+import random
+import base64
+import hashlib
+import zlib
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REAL_API_ROOT = 'https://youtube.googleapis.com'
+ENDPOINTS = ('channels', 'playlistItems', 'videos', 'channelSections', 'search')
+
+
+def api_error(code, reason, message):
+    """Build an error body in the format returned by Google APIs"""
+    return {
+        'error': {
+            'code': code,
+            'message': message,
+            'errors': [{'message': message, 'domain': 'youtube', 'reason': reason}]
+        }
+    }
+
+
+def format_duration(seconds):
+    """Format seconds as an ISO 8601 duration (PT#H#M#S)"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return 'PT' + (f'{hours}H' if hours else '') + (f'{minutes}M' if minutes else '') + f'{seconds}S'
+
+
+class SyntheticBackend:
+    """Generates API responses from sample data for any channel ID
+    
+    Every requested channel gets a deterministic number of uploads; its video
+    IDs are ``<channel_id>-<n>`` and their snippets and statistics are taken
+    from rows of ``create_sample_data``, so runs are reproducible per seed.
+    """
+    
+    def __init__(self, num_videos=2000, seed=42, min_videos=20, max_videos=300):
+        from src.create_sample_data import create_sample_data
+        
+        random.seed(seed)
+        self.rows = create_sample_data(num_videos=num_videos).to_dict('records')
+        self.seed = seed
+        self.min_videos = min_videos
+        self.max_videos = max_videos
+    
+    def _hash(self, value):
+        return zlib.crc32(f'{self.seed}:{value}'.encode('utf-8'))
+    
+    def _video_count(self, channel_id):
+        return self.min_videos + self._hash(channel_id) % (self.max_videos - self.min_videos + 1)
+    
+    def _row(self, channel_id, n):
+        return self.rows[(self._hash(channel_id) + n) % len(self.rows)]
+    
+    def _related_channel(self, value, n):
+        """Deterministic channel ID (UC + 22 characters) derived from a value"""
+        digest = hashlib.sha1(f'{self.seed}:{value}:{n}'.encode('utf-8')).digest()
+        return 'UC' + base64.urlsafe_b64encode(digest).decode('ascii')[:22]
+    
+    def channels(self, params):
+        items = []
+        for channel_id in params.get('id', '').split(','):
+            if not channel_id:
+                continue
+            row = self._row(channel_id, 0)
+            items.append({
+                'kind': 'youtube#channel',
+                'id': channel_id,
+                'snippet': {'title': f"{row['channel_name']} ({channel_id[-4:]})"},
+                'statistics': {
+                    'subscriberCount': str(row['channel_subscribers']),
+                    'videoCount': str(self._video_count(channel_id)),
+                    'viewCount': str(row['channel_view_count'])
+                },
+                'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id}}
+            })
+        return 200, {'kind': 'youtube#channelListResponse', 'items': items}
+    
+    def playlistItems(self, params):
+        playlist_id = params.get('playlistId', '')
+        if not playlist_id.startswith('UU'):
+            return 404, api_error(404, 'playlistNotFound', f'Playlist {playlist_id} not found')
+        
+        channel_id = playlist_id[2:]
+        total = self._video_count(channel_id)
+        start = int(params.get('pageToken') or 0)
+        end = min(total, start + int(params.get('maxResults', 5)))
+        
+        response = {
+            'kind': 'youtube#playlistItemListResponse',
+            'items': [{'contentDetails': {'videoId': f'{channel_id}-{n}'}} for n in range(start, end)],
+            'pageInfo': {'totalResults': total, 'resultsPerPage': end - start}
+        }
+        if end < total:
+            response['nextPageToken'] = str(end)
+        return 200, response
+    
+    def videos(self, params):
+        items = []
+        for video_id in params.get('id', '').split(','):
+            channel_id, _, n = video_id.rpartition('-')
+            if not channel_id or not n.isdigit():
+                continue
+            row = self._row(channel_id, int(n))
+            items.append({
+                'kind': 'youtube#video',
+                'id': video_id,
+                'snippet': {
+                    'publishedAt': row['published_at'][:19] + 'Z',
+                    'channelId': channel_id,
+                    'title': row['title'],
+                    'description': row['description'],
+                    'channelTitle': row['channel_name'],
+                    'tags': row['tags'].split(','),
+                    'categoryId': row['category_id'],
+                    'defaultLanguage': row['default_language'],
+                    'defaultAudioLanguage': row['default_audio_language']
+                },
+                'contentDetails': {'duration': format_duration(row['duration_seconds'])},
+                'statistics': {
+                    'viewCount': str(row['view_count']),
+                    'likeCount': str(row['like_count']),
+                    'commentCount': str(row['comment_count'])
+                }
+            })
+        return 200, {'kind': 'youtube#videoListResponse', 'items': items}
+    
+    def channelSections(self, params):
+        channel_id = params.get('channelId', '')
+        featured = [self._related_channel(channel_id, n) for n in range(self._hash(channel_id) % 5)]
+        items = []
+        if featured:
+            items.append({
+                'kind': 'youtube#channelSection',
+                'snippet': {'type': 'multipleChannels', 'channelId': channel_id},
+                'contentDetails': {'channels': featured}
+            })
+        return 200, {'kind': 'youtube#channelSectionListResponse', 'items': items}
+    
+    def search(self, params):
+        query = params.get('q', '')
+        start = int(params.get('pageToken') or 0)
+        end = start + int(params.get('maxResults', 5))
+        items = [{
+            'kind': 'youtube#searchResult',
+            'id': {'kind': 'youtube#video', 'videoId': f'search-{n}'},
+            'snippet': {'channelId': self._related_channel(query, n % 20)}
+        } for n in range(start, end)]
+        return 200, {'kind': 'youtube#searchListResponse', 'items': items, 'nextPageToken': str(end)}
+    
+    def handle(self, endpoint, params):
+        return getattr(self, endpoint)(params)
+
+
+class RecordingBackend:
+    """Replays saved responses, or records them from the real API"""
+    
+    def __init__(self, fixtures_dir, record=False, api_key=None):
+        self.fixtures_dir = fixtures_dir
+        self.record = record
+        self.api_key = api_key
+        os.makedirs(fixtures_dir, exist_ok=True)
+    
+    def _path(self, endpoint, params):
+        key = json.dumps(sorted(params.items()), ensure_ascii=False)
+        digest = hashlib.sha1(f'{endpoint}?{key}'.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.fixtures_dir, f'{endpoint}_{digest}.json')
+    
+    def handle(self, endpoint, params):
+        path = self._path(endpoint, params)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                fixture = json.load(f)
+            return fixture['status'], fixture['body']
+        
+        if not self.record:
+            return 404, api_error(404, 'fixtureNotFound', f'No recorded response for {endpoint} {params}')
+        
+        query = urlencode({**params, 'key': self.api_key})
+        url = f'{REAL_API_ROOT}/youtube/v3/{endpoint}?{query}'
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                status, body = response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            status, body = e.code, json.load(e)
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'endpoint': endpoint, 'params': params, 'status': status, 'body': body},
+                      f, ensure_ascii=False)
+        return status, body
+
+
+class FaultInjector:
+    """Adds latency and injects transient errors or quota exhaustion"""
+    
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_limit_rate=0.0,
+                 quota_after=None, retry_after=1, seed=42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.quota_after = quota_after
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.served = 0
+    
+    def delay(self):
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        latency = max(0.0, self.latency_ms + jitter)
+        if latency:
+            time.sleep(latency / 1000)
+    
+    def fault(self):
+        """Return (status, body, headers) for an injected error, or None"""
+        with self.lock:
+            self.served += 1
+            served = self.served
+            roll = self.random.random()
+        
+        if self.quota_after is not None and served > self.quota_after:
+            return 403, api_error(403, 'quotaExceeded', 'The request cannot be completed because you have exceeded your quota.'), {}
+        if roll < self.rate_limit_rate:
+            return 429, api_error(429, 'rateLimitExceeded', 'Rate limit exceeded.'), {'Retry-After': str(self.retry_after)}
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503, api_error(503, 'backendError', 'Backend Error'), {}
+        return None
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """HTTP server exposing /youtube/v3/<endpoint> plus a /_stats counter page"""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, backend, faults=None):
+        super().__init__(address, FixtureRequestHandler)
+        self.backend = backend
+        self.faults = faults or FaultInjector()
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+    
+    @property
+    def endpoint(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+    
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+    
+    def start(self):
+        """Serve in a background thread (for use from benchmarks and tests)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    """Dispatches API requests to the server's backend"""
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/_stats':
+            with self.server.stats_lock:
+                self._send(200, dict(self.server.stats))
+            return
+        
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        if endpoint not in ENDPOINTS:
+            self._send(404, api_error(404, 'notFound', f'Unknown endpoint {url.path}'))
+            return
+        
+        params = {k: v[-1] for k, v in parse_qs(url.query).items() if k not in ('key', 'alt')}
+        self.server.count(f'requests.{endpoint}')
+        self.server.faults.delay()
+        
+        fault = self.server.faults.fault()
+        if fault:
+            status, body, headers = fault
+            self.server.count(f'errors.{status}')
+            self._send(status, body, headers)
+            return
+        
+        status, body = self.server.backend.handle(endpoint, params)
+        self._send(status, body)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Local YouTube Data API v3 fixture server')
+    parser.add_argument('--mode', choices=['synthetic', 'replay', 'record'], default='synthetic')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures-dir', default='fixtures/youtube_api')
+    parser.add_argument('--num-videos', type=int, default=2000, help='synthetic sample rows')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of 503 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='share of 429 responses')
+    parser.add_argument('--quota-after', type=int, default=None, help='quotaExceeded after N requests')
+    args = parser.parse_args()
+    
+    if args.mode == 'synthetic':
+        backend = SyntheticBackend(num_videos=args.num_videos, seed=args.seed)
+    else:
+        from src.config import YOUTUBE_API_KEY
+        if args.mode == 'record' and not YOUTUBE_API_KEY:
+            print("ERROR: record mode needs YOUTUBE_API_KEY to reach the real API.")
+            return
+        backend = RecordingBackend(args.fixtures_dir, record=args.mode == 'record', api_key=YOUTUBE_API_KEY)
+    
+    faults = FaultInjector(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        quota_after=args.quota_after,
+        seed=args.seed
+    )
+    server = FixtureServer((args.host, args.port), backend, faults)
+    print(f"Fixture server ({args.mode}) listening on {server.endpoint}")
+    print(f"Use: YOUTUBE_API_ENDPOINT={server.endpoint}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        print(json.dumps(dict(server.stats), indent=2))
+
+
+if __name__ == '__main__':
+    main()
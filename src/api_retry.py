@@ -0,0 +1,166 @@
+"""
+API Retry Policy
+Exponential backoff with jitter for transient YouTube API errors, and a
+circuit breaker that pauses all API calls while the quota is exhausted
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+from collections import Counter
+from googleapiclient.errors import HttpError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import (
+    API_MAX_RETRIES,
+    API_BACKOFF_BASE_SECONDS,
+    API_BACKOFF_MAX_SECONDS,
+    API_QUOTA_PAUSE_SECONDS,
+    API_MAX_QUOTA_PAUSES
+)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+
+class QuotaExhaustedError(Exception):
+    """Raised when the quota stays exhausted after the allowed pauses"""
+
+
+def get_error_reason(error):
+    """Extract the first error reason (e.g. 'quotaExceeded') from an HttpError"""
+    details = getattr(error, 'error_details', None)
+    if isinstance(details, list):
+        for detail in details:
+            if isinstance(detail, dict) and detail.get('reason'):
+                return detail['reason']
+    try:
+        content = json.loads(error.content.decode('utf-8'))
+        return content['error']['errors'][0]['reason']
+    except Exception:
+        return ''
+
+
+def get_retry_after(error):
+    """Seconds requested by a Retry-After header, if any"""
+    try:
+        return float(error.resp.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Opens on quota exhaustion and blocks every caller until the pause ends
+    
+    After ``max_pauses`` consecutive trips without a successful call in between,
+    the breaker gives up by raising QuotaExhaustedError.
+    """
+    
+    def __init__(self, pause_seconds=API_QUOTA_PAUSE_SECONDS, max_pauses=API_MAX_QUOTA_PAUSES,
+                 sleep=time.sleep, clock=time.monotonic):
+        self.pause_seconds = pause_seconds
+        self.max_pauses = max_pauses
+        self.sleep = sleep
+        self.clock = clock
+        self.open_until = None
+        self.consecutive_trips = 0
+        self.trips = 0
+    
+    @property
+    def is_open(self):
+        return self.open_until is not None
+    
+    def trip(self):
+        """Open the breaker after a quota error (raises instead once max_pauses are used up)"""
+        self.consecutive_trips += 1
+        if self.consecutive_trips > self.max_pauses:
+            raise QuotaExhaustedError(
+                f"API quota still exhausted after {self.max_pauses} pauses of {self.pause_seconds}s"
+            )
+        self.trips += 1
+        self.open_until = self.clock() + self.pause_seconds
+        print(f"Quota exhausted - pausing API calls for {self.pause_seconds}s "
+              f"(pause {self.consecutive_trips}/{self.max_pauses})")
+    
+    def wait(self):
+        """Block until the breaker is half-open (a trial call may go through)"""
+        if self.open_until is None:
+            return
+        remaining = self.open_until - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+        self.open_until = None
+    
+    def record_success(self):
+        self.consecutive_trips = 0
+
+
+class RetryPolicy:
+    """Executes API requests with retries, backoff and a shared circuit breaker"""
+    
+    def __init__(self, max_retries=API_MAX_RETRIES, base_delay=API_BACKOFF_BASE_SECONDS,
+                 max_delay=API_BACKOFF_MAX_SECONDS, breaker=None, sleep=time.sleep, rng=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.breaker = breaker or CircuitBreaker(sleep=sleep)
+        self.random = rng or random.Random()
+        self.counters = Counter()
+    
+    def backoff_delay(self, attempt, retry_after=None):
+        """Full-jitter exponential delay, never shorter than a Retry-After hint"""
+        delay = self.random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            self.counters['retry_after_hints'] += 1
+            delay = max(delay, retry_after)
+        return delay
+    
+    def classify(self, error):
+        """Return 'quota', 'retry' or 'fatal' for an exception"""
+        if isinstance(error, HttpError):
+            status = error.resp.status
+            reason = get_error_reason(error)
+            if status == 403 and reason in QUOTA_REASONS:
+                return 'quota'
+            if status in RETRYABLE_STATUSES or (status == 403 and reason in RATE_LIMIT_REASONS):
+                return 'retry'
+            return 'fatal'
+        if isinstance(error, (socket.timeout, TimeoutError, ConnectionError)):
+            return 'retry'
+        return 'fatal'
+    
+    def execute(self, request):
+        """Execute a googleapiclient request under this policy"""
+        attempt = 0
+        while True:
+            self.breaker.wait()
+            self.counters['calls'] += 1
+            try:
+                response = request.execute()
+            except Exception as e:
+                kind = self.classify(e)
+                if kind == 'quota':
+                    self.breaker.trip()
+                    # Counted once the breaker has paused; the final trip raises instead
+                    self.counters['breaker_trips'] += 1
+                    continue
+                if kind == 'retry' and attempt < self.max_retries:
+                    delay = self.backoff_delay(attempt, get_retry_after(e) if isinstance(e, HttpError) else None)
+                    self.counters['retries'] += 1
+                    attempt += 1
+                    self.sleep(delay)
+                    continue
+                self.counters['failures'] += 1
+                raise
+            self.breaker.record_success()
+            return response
+    
+    def summary(self):
+        """One-line summary of the retry counters"""
+        return ", ".join(f"{key}={self.counters[key]}" for key in
+                         ('calls', 'retries', 'retry_after_hints', 'failures', 'breaker_trips'))
@@ -0,0 +1,359 @@
+"""
+Channel Discovery
+Grows a frontier of candidate channels beyond TARGET_CHANNELS and ranks
+them by expected videos per quota unit
+
+Sources:
+- featured channels (channelSections.list, 1 unit per channel)
+- channel IDs linked in descriptions of collected videos (free)
+- search.list by category and keywords (100 units per page)
+"""
+import os
+import re
+import sys
+import json
+import math
+import heapq
+import argparse
+from collections import Counter
+from googleapiclient.errors import HttpError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import (
+    YOUTUBE_API_KEY,
+    TARGET_CHANNELS,
+    MAX_VIDEOS_PER_CHANNEL,
+    MAX_RESULTS_PER_REQUEST,
+    DISCOVERY_DIR,
+    DISCOVERY_QUOTA_BUDGET,
+    DISCOVERY_CATEGORY_ID,
+    DISCOVERY_SEARCH_QUERIES,
+    API_QUOTA_COSTS
+)
+from src.api_retry import QuotaExhaustedError
+from src.video_sink import iter_jsonl_chunks
+from src.storage import iter_table_chunks, table_columns, table_exists
+
+# Channel IDs are "UC" + 22 URL-safe base64 characters
+CHANNEL_ID_PATTERN = re.compile(r'(?<![\w-])(UC[\w-]{22})(?![\w-])')
+
+
+def expected_value_per_quota(info, mentions=1, max_videos=MAX_VIDEOS_PER_CHANNEL):
+    """Expected collectable videos per quota unit spent collecting a channel
+    
+    Collecting n videos costs ceil(n/50) playlistItems pages plus n/50 of a
+    (cross-channel) videos.list batch. Channels referenced from several
+    places are weighted up logarithmically as a relevance signal.
+    """
+    expected_videos = min(info.get('channel_video_count', 0), max_videos)
+    if expected_videos <= 0:
+        return 0.0
+    quota_units = math.ceil(expected_videos / MAX_RESULTS_PER_REQUEST) + expected_videos / MAX_RESULTS_PER_REQUEST
+    return expected_videos * math.log2(1 + mentions) / quota_units
+
+
+class ChannelFrontier:
+    """Priority queue of candidate channels with a persistent seen-set
+    
+    ``seen_channels.txt`` is append-only and holds every channel ID ever
+    offered (seeds included), so a channel is queued at most once across
+    runs. Pending candidates, expanded channels and used search queries are
+    kept in ``frontier.json``; accepted channels go to ``channels.txt``.
+    """
+    
+    def __init__(self, directory=DISCOVERY_DIR):
+        self.directory = directory
+        self.seen_path = os.path.join(directory, 'seen_channels.txt')
+        self.state_path = os.path.join(directory, 'frontier.json')
+        self.accepted_path = os.path.join(directory, 'channels.txt')
+        os.makedirs(directory, exist_ok=True)
+        
+        self.seen = set()
+        if os.path.exists(self.seen_path):
+            with open(self.seen_path, encoding='utf-8') as f:
+                self.seen = {line.strip() for line in f if line.strip()}
+        
+        state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+        self.candidates = state.get('candidates', {})
+        self.expanded = set(state.get('expanded', []))
+        self.searched = set(state.get('searched', []))
+        
+        self.heap = []
+        for channel_id in self.candidates:
+            self._push(channel_id)
+    
+    def __len__(self):
+        return len(self.candidates)
+    
+    def _push(self, channel_id):
+        candidate = self.candidates[channel_id]
+        if candidate['info'] is not None:
+            candidate['score'] = expected_value_per_quota(candidate['info'], candidate['mentions'])
+            heapq.heappush(self.heap, (-candidate['score'], channel_id))
+    
+    def mark_seen(self, channel_ids):
+        """Register channel IDs (e.g. the seeds) without queueing them"""
+        new_ids = [channel_id for channel_id in dict.fromkeys(channel_ids) if channel_id not in self.seen]
+        if new_ids:
+            self.seen.update(new_ids)
+            with open(self.seen_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{channel_id}\n" for channel_id in new_ids))
+        return new_ids
+    
+    def offer(self, channel_ids, source):
+        """Queue unseen channels; repeated mentions of pending ones raise their rank"""
+        for channel_id in channel_ids:
+            candidate = self.candidates.get(channel_id)
+            if candidate is not None:
+                candidate['mentions'] += 1
+                candidate['sources'][source] = candidate['sources'].get(source, 0) + 1
+                self._push(channel_id)
+        
+        new_ids = self.mark_seen(channel_id for channel_id in channel_ids if channel_id not in self.candidates)
+        for channel_id in new_ids:
+            self.candidates[channel_id] = {'mentions': 1, 'sources': {source: 1}, 'info': None, 'score': None}
+        return len(new_ids)
+    
+    def unresolved(self):
+        """Pending candidates whose channel statistics are not known yet"""
+        return [channel_id for channel_id, candidate in self.candidates.items() if candidate['info'] is None]
+    
+    def resolve(self, channel_id, info):
+        """Attach channel statistics (None drops a channel that no longer exists)"""
+        if info is None:
+            self.candidates.pop(channel_id, None)
+            return
+        self.candidates[channel_id]['info'] = info
+        self._push(channel_id)
+    
+    def pop(self):
+        """Remove and return (channel_id, candidate) with the best score, or None"""
+        while self.heap:
+            score, channel_id = heapq.heappop(self.heap)
+            candidate = self.candidates.get(channel_id)
+            # Skip stale entries left behind by re-scored candidates
+            if candidate is not None and candidate['score'] == -score:
+                del self.candidates[channel_id]
+                return channel_id, candidate
+        return None
+    
+    def accept(self, channel_id):
+        with open(self.accepted_path, 'a', encoding='utf-8') as f:
+            f.write(f"{channel_id}\n")
+    
+    def accepted(self):
+        """Accepted channel IDs in acceptance order"""
+        if not os.path.exists(self.accepted_path):
+            return []
+        with open(self.accepted_path, encoding='utf-8') as f:
+            return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    
+    def save(self):
+        state = {
+            'candidates': self.candidates,
+            'expanded': sorted(self.expanded),
+            'searched': sorted(self.searched)
+        }
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+
+class ChannelDiscovery:
+    """Expands the frontier under a quota budget and accepts the best channels"""
+    
+    def __init__(self, collector, frontier, quota_budget=DISCOVERY_QUOTA_BUDGET):
+        self.collector = collector
+        self.frontier = frontier
+        self.quota_budget = quota_budget
+        self.quota_used = Counter()
+        # Candidates whose channels.list request failed; kept pending and retried next run
+        self.lookup_failed = set()
+    
+    @property
+    def quota_spent(self):
+        return sum(self.quota_used.values())
+    
+    def can_afford(self, endpoint, requests=1):
+        return self.quota_spent + API_QUOTA_COSTS[endpoint] * requests <= self.quota_budget
+    
+    def _spend(self, endpoint, requests=1):
+        self.quota_used[endpoint] += API_QUOTA_COSTS[endpoint] * requests
+    
+    def featured_channels(self, channel_id):
+        """Channels listed in a channel's featured/multiple-channels sections"""
+        request = self.collector.youtube.channelSections().list(
+            part='contentDetails',
+            channelId=channel_id
+        )
+        self._spend('channelSections')
+        response = self.collector.execute(request)
+        
+        channels = []
+        for section in response.get('items', []):
+            channels.extend(section.get('contentDetails', {}).get('channels', []))
+        return channels
+    
+    def search_channels(self, query, pages=1):
+        """Owners of technology videos matching a search query"""
+        channels = []
+        page_token = None
+        for _ in range(pages):
+            if not self.can_afford('search'):
+                break
+            request = self.collector.youtube.search().list(
+                part='snippet',
+                q=query,
+                type='video',
+                videoCategoryId=DISCOVERY_CATEGORY_ID,
+                maxResults=MAX_RESULTS_PER_REQUEST,
+                pageToken=page_token
+            )
+            self._spend('search')
+            response = self.collector.execute(request)
+            channels.extend(item['snippet']['channelId'] for item in response.get('items', [])
+                            if item.get('snippet', {}).get('channelId'))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        return channels
+    
+    def scan_descriptions(self, path, chunksize=10000):
+        """Offer channel IDs linked in descriptions of an already collected dataset"""
+        if path.endswith('.jsonl'):
+            if not os.path.exists(path):
+                return 0
+            chunks = iter_jsonl_chunks(path, chunksize)
+        else:
+            if not table_exists(path) or 'description' not in table_columns(path):
+                return 0
+            chunks = iter_table_chunks(path, chunksize, columns=['description'])
+        
+        added = 0
+        for chunk in chunks:
+            if 'description' not in chunk.columns:
+                continue
+            mentioned = chunk['description'].dropna().astype(str).str.findall(CHANNEL_ID_PATTERN).explode().dropna()
+            added += self.frontier.offer(list(mentioned), 'description')
+        return added
+    
+    def expand(self, channel_id):
+        """Offer a channel's featured channels (once per channel)"""
+        if channel_id in self.frontier.expanded or not self.can_afford('channelSections'):
+            return 0
+        try:
+            channels = self.featured_channels(channel_id)
+        except HttpError as e:
+            print(f"Error fetching featured channels of {channel_id}: {e}")
+            channels = []
+        self.frontier.expanded.add(channel_id)
+        return self.frontier.offer(channels, 'featured')
+    
+    def resolve_pending(self):
+        """Look up statistics of unresolved candidates, 50 per channels.list call
+        
+        Only a candidate missing from a successful response is dropped; when
+        the request itself fails the candidate stays pending (it is already
+        in the seen-set and would be lost for good otherwise).
+        """
+        pending = [channel_id for channel_id in self.frontier.unresolved() if channel_id not in self.lookup_failed]
+        requests = math.ceil(len(pending) / MAX_RESULTS_PER_REQUEST)
+        affordable = min(requests, max(0, self.quota_budget - self.quota_spent) // API_QUOTA_COSTS['channels'])
+        pending = pending[:affordable * MAX_RESULTS_PER_REQUEST]
+        if not pending:
+            return 0
+        
+        self._spend('channels', affordable)
+        failed = set()
+        infos = self.collector.get_channels_info(pending, failed=failed)
+        for channel_id in pending:
+            if channel_id not in failed:
+                self.frontier.resolve(channel_id, infos.get(channel_id))
+        if failed:
+            self.lookup_failed.update(failed)
+            print(f"Channel lookup failed for {len(failed)} candidates; kept pending for the next run")
+        return len(infos)
+    
+    def run(self, seed_channels=TARGET_CHANNELS, max_accept=100, queries=DISCOVERY_SEARCH_QUERIES,
+            scan_paths=()):
+        """Grow the frontier from the seeds, then accept the best candidates
+        
+        Accepted channels are expanded in turn, so the crawl keeps following
+        the highest-value part of the channel graph until the budget runs out.
+        """
+        self.frontier.mark_seen(seed_channels)
+        accepted = []
+        try:
+            for path in scan_paths:
+                print(f"Channels linked in {path}: {self.scan_descriptions(path)} new")
+            
+            for channel_id in seed_channels:
+                self.expand(channel_id)
+            
+            for query in queries:
+                if query in self.frontier.searched or not self.can_afford('search'):
+                    continue
+                added = self.frontier.offer(self.search_channels(query), 'search')
+                self.frontier.searched.add(query)
+                print(f"Search '{query}': {added} new channels")
+            
+            while len(accepted) < max_accept:
+                self.resolve_pending()
+                best = self.frontier.pop()
+                if best is None:
+                    break
+                channel_id, candidate = best
+                if candidate['score'] <= 0:
+                    continue
+                
+                self.frontier.accept(channel_id)
+                accepted.append(channel_id)
+                print(f"  + {candidate['info']['channel_name']} ({channel_id}): "
+                      f"{candidate['info']['channel_video_count']} videos, "
+                      f"{candidate['mentions']} mentions, score {candidate['score']:.1f}")
+                self.expand(channel_id)
+        except QuotaExhaustedError as e:
+            print(f"Stopping discovery early: {e}")
+        finally:
+            self.frontier.save()
+        
+        print(f"\nAccepted {len(accepted)} channels, {len(self.frontier)} candidates pending")
+        print(f"Quota used: {self.quota_spent}/{self.quota_budget} units {dict(self.quota_used)}")
+        return accepted
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Discover more channels to collect')
+    parser.add_argument('--budget', type=int, default=DISCOVERY_QUOTA_BUDGET, help='quota units to spend')
+    parser.add_argument('--max-accept', type=int, default=100, help='channels to accept this run')
+    parser.add_argument('--no-search', action='store_true', help='skip search.list (100 units per query)')
+    parser.add_argument('--collect', action='store_true', help='collect videos of the accepted channels')
+    args = parser.parse_args()
+    
+    if not YOUTUBE_API_KEY:
+        print("ERROR: YOUTUBE_API_KEY not found in environment variables.")
+        return
+    
+    from src.data_collection import YouTubeDataCollector
+    collector = YouTubeDataCollector(YOUTUBE_API_KEY)
+    discovery = ChannelDiscovery(collector, ChannelFrontier(), quota_budget=args.budget)
+    accepted = discovery.run(
+        queries=() if args.no_search else DISCOVERY_SEARCH_QUERIES,
+        max_accept=args.max_accept,
+        scan_paths=('raw_data/youtube_videos_raw.jsonl', 'raw_data/youtube_videos_improved.csv')
+    )
+    
+    if args.collect and accepted:
+        from src.video_sink import JsonlVideoSink
+        with JsonlVideoSink('raw_data/youtube_videos_discovered.jsonl', append=True) as sink:
+            collector.collect_all_data(sink=sink, channel_ids=accepted)
+
+
+if __name__ == '__main__':
+    main()
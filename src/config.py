@@ -10,6 +10,8 @@ load_dotenv()
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY', '')
 YOUTUBE_API_SERVICE_NAME = 'youtube'
 YOUTUBE_API_VERSION = 'v3'
+# Optional API root override, e.g. http://127.0.0.1:8765/ for src/api_fixture_server.py
+YOUTUBE_API_ENDPOINT = os.getenv('YOUTUBE_API_ENDPOINT', '')
 
 # Target Channels (Technology category - International + Turkish channels)
 TARGET_CHANNELS = [
@@ -55,12 +57,84 @@ TARGET_CHANNELS = [
 MAX_VIDEOS_PER_CHANNEL = 200  # Her kanaldan 200 video topla (maksimum veri için)
 MAX_RESULTS_PER_REQUEST = 50
 
+# API Retry Settings (backoff with jitter, circuit breaker on exhausted quota)
+API_MAX_RETRIES = 5
+API_BACKOFF_BASE_SECONDS = 1.0
+API_BACKOFF_MAX_SECONDS = 60.0
+API_QUOTA_PAUSE_SECONDS = int(os.getenv('API_QUOTA_PAUSE_SECONDS', 900))
+API_MAX_QUOTA_PAUSES = 4
+
+# Statistics Refresh Settings (time-series snapshots of known videos)
+STATS_SNAPSHOT_DIR = 'raw_data/stats_snapshots'
+STATS_REFRESH_INTERVAL_HOURS = 6
+
+# Local video database (upserts keyed on video_id)
+VIDEO_STORE_PATH = 'raw_data/videos.sqlite'
+
+# Cached engineered features (see src/feature_store.py)
+FEATURE_STORE_DIR = 'processed_data/feature_store'
+
+# Channel Discovery Settings (frontier of candidate channels beyond TARGET_CHANNELS)
+DISCOVERY_DIR = 'raw_data/discovery'
+DISCOVERY_QUOTA_BUDGET = 2000  # Units per discovery run (daily default quota is 10,000)
+DISCOVERY_CATEGORY_ID = '28'  # Science & Technology
+DISCOVERY_SEARCH_QUERIES = [
+    'programming tutorial',
+    'yazılım dersleri',
+    'python eğitimi',
+    'web development',
+    'teknoloji inceleme',
+]
+# Quota units per request (YouTube Data API v3)
+API_QUOTA_COSTS = {
+    'channels': 1,
+    'channelSections': 1,
+    'playlistItems': 1,
+    'videos': 1,
+    'search': 100,
+}
+
+# Pipeline runner state (stage manifests, file hash cache, stage logs)
+PIPELINE_DIR = '.pipeline'
+PIPELINE_MAX_WORKERS = 2
+
+# Paginated corpus report (replaces the single-file "data videos.md" dump)
+REPORT_DIR = 'reports/videos'
+REPORT_PAGE_SIZE = 100
+
+# Near-duplicate detection (MinHash over title and description shingles)
+NEAR_DUPLICATE_THRESHOLD = 0.8
+NEAR_DUPLICATE_NUM_PERM = 128
+NEAR_DUPLICATE_TITLE_WEIGHT = 0.7
+# Off until the false-positive rate on the real corpus is measured (python -m src.near_duplicates reports it)
+REMOVE_NEAR_DUPLICATES = False
+
+# Feature engineering memory budget: peak memory on top of the input frame, as a
+# multiple of its size plus a fixed allowance for small inputs
+# (checked by run_preprocessing.py --profile-memory)
+FEATURE_MEMORY_BUDGET = 1.0
+FEATURE_MEMORY_SLACK_MB = 16
+
+# Chunked (out-of-core) preprocessing: rows per chunk and quantile sketch size
+PREPROCESS_CHUNK_SIZE = 100000
+QUANTILE_SKETCH_K = 2048
+
+# Parallel feature engineering: worker processes (1 = serial) and smallest chunk worth a process
+PREPROCESS_WORKERS = 1
+PARALLEL_MIN_CHUNK_ROWS = 20000
+
+# Hashed title/tag/description tokens for the improved tree models: off by default,
+# width of the sparse block when on
+USE_TEXT_FEATURES = False
+TEXT_HASH_FEATURES = 4096
+
 # Model Configuration
 MODEL_DIR = 'models'
 BEST_MODEL_NAME = 'best_model.pkl'
 SCALER_NAME = 'scaler.pkl'
 FEATURE_NAMES_NAME = 'feature_names.pkl'
 MODEL_METADATA_NAME = 'model_metadata.pkl'
+FEATURE_TRANSFORMER_NAME = 'feature_transformer.pkl'
 
 # Flask Configuration
 FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
@@ -6,7 +6,9 @@ import os
 import sys
 import json
 import time
+import numpy as np
 import pandas as pd
+from collections import defaultdict
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from tqdm import tqdm
@@ -17,74 +19,173 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config import (
     YOUTUBE_API_KEY,
+    YOUTUBE_API_ENDPOINT,
     TARGET_CHANNELS,
     MAX_VIDEOS_PER_CHANNEL,
     MAX_RESULTS_PER_REQUEST
 )
+from src.video_sink import JsonlVideoSink
+from src.storage import RAW_SCHEMA, write_table, read_table, jsonl_to_table
+from src.parsing_utils import parse_iso_duration, parse_iso_durations, parse_timestamps
+from src.api_retry import RetryPolicy, QuotaExhaustedError
+
+
+class VideoDetailsBatcher:
+    """Pools video IDs across channels and pages into full videos.list requests
+    
+    Flush policy: a request is sent as soon as ``batch_size`` IDs are pending,
+    so every request except the last one of a crawl carries a full batch. The
+    remaining partial batch is only sent when ``flush()`` is called, typically
+    once after all channels have been walked.
+    """
+    
+    def __init__(self, fetch_details, batch_size=MAX_RESULTS_PER_REQUEST, on_batch=None):
+        self.fetch_details = fetch_details
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.pending = []  # (video_id, channel_id) pairs waiting for a request
+        self.results = defaultdict(list)
+        self.request_count = 0
+        self.video_count = 0
+    
+    def add(self, channel_id, video_ids):
+        """Queue video IDs of a channel, sending every full batch immediately"""
+        self.pending.extend((video_id, channel_id) for video_id in video_ids)
+        while len(self.pending) >= self.batch_size:
+            self._send(self.pending[:self.batch_size])
+            self.pending = self.pending[self.batch_size:]
+    
+    def flush(self):
+        """Send whatever is still pending, even if the batch is not full"""
+        while self.pending:
+            self._send(self.pending[:self.batch_size])
+            self.pending = self.pending[self.batch_size:]
+    
+    def _send(self, batch):
+        """Fetch one batch and map the returned videos back to their channels"""
+        owners = dict(batch)
+        videos = self.fetch_details([video_id for video_id, _ in batch])
+        self.request_count += 1
+        self.video_count += len(videos)
+        
+        grouped = defaultdict(list)
+        for video in videos:
+            grouped[owners.get(video['video_id'], video.get('channel_id', ''))].append(video)
+        
+        if self.on_batch is not None:
+            self.on_batch(grouped)
+        else:
+            for channel_id, channel_videos in grouped.items():
+                self.results[channel_id].extend(channel_videos)
+    
+    def pop_results(self, channel_id):
+        """Return (and forget) the collected videos of a channel"""
+        return self.results.pop(channel_id, [])
 
 
 class YouTubeDataCollector:
     """Collects video data from YouTube channels"""
     
-    def __init__(self, api_key):
+    def __init__(self, api_key, api_endpoint=YOUTUBE_API_ENDPOINT):
         """Initialize YouTube API client"""
         if not api_key:
             raise ValueError("YouTube API key is required. Set YOUTUBE_API_KEY in .env file")
         
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        # api_endpoint redirects requests, e.g. to the local fixture server
+        client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+        self.youtube = build('youtube', 'v3', developerKey=api_key, client_options=client_options)
+        self.retry_policy = RetryPolicy()
         self.videos_data = []
+    
+    def execute(self, request):
+        """Execute an API request through the shared retry policy"""
+        return self.retry_policy.execute(request)
+    
+    def _parse_channel_item(self, channel):
+        """Turn a channels.list item into a channel info dict"""
+        info = {
+            'channel_id': channel['id'],
+            'channel_name': channel['snippet']['title'],
+            'channel_subscribers': int(channel['statistics'].get('subscriberCount', 0)),
+            'channel_video_count': int(channel['statistics'].get('videoCount', 0)),
+            'channel_view_count': int(channel['statistics'].get('viewCount', 0))
+        }
+        if 'contentDetails' in channel:
+            info['uploads_playlist_id'] = channel['contentDetails']['relatedPlaylists']['uploads']
+        return info
+    
+    def get_channels_info(self, channel_ids, failed=None):
+        """Resolve snippet, statistics and uploads playlist of many channels
+        
+        Channels are looked up 50 IDs per channels.list request, so resolving
+        all target channels costs ceil(N/50) calls instead of two per channel.
+        failed: optional set that receives the IDs of chunks whose request
+        failed (as opposed to channels the API did not return)
+        """
+        failed = set() if failed is None else failed
+        channels = {}
+        for start in range(0, len(channel_ids), MAX_RESULTS_PER_REQUEST):
+            chunk = channel_ids[start:start + MAX_RESULTS_PER_REQUEST]
+            try:
+                request = self.youtube.channels().list(
+                    part='snippet,statistics,contentDetails',
+                    id=','.join(chunk),
+                    maxResults=MAX_RESULTS_PER_REQUEST
+                )
+                response = self.execute(request)
+                
+                if 'error' in response:
+                    print(f"API Error for channels {chunk}: {response['error']}")
+                    failed.update(chunk)
+                    continue
+                
+                for channel in response.get('items', []):
+                    try:
+                        info = self._parse_channel_item(channel)
+                    except KeyError as e:
+                        print(f"KeyError parsing channel {channel.get('id')}: {e}")
+                        continue
+                    channels[info['channel_id']] = info
+            except HttpError as e:
+                print(f"Error fetching channel info for {chunk}: {e}")
+                failed.update(chunk)
+            except QuotaExhaustedError:
+                raise
+            except Exception as e:
+                print(f"Unexpected error fetching channel info for {chunk}: {e}")
+                failed.update(chunk)
         
+        for channel_id in channel_ids:
+            if channel_id not in channels and channel_id not in failed:
+                print(f"No items found for channel {channel_id}")
+        
+        return channels
+    
     def get_channel_info(self, channel_id):
         """Get channel information"""
-        try:
-            request = self.youtube.channels().list(
-                part='snippet,statistics',
-                id=channel_id
-            )
-            response = request.execute()
-            
-            # Check if response has items and is not empty
-            if 'items' in response and response['items']:
-                channel = response['items'][0]
-                return {
-                    'channel_id': channel_id,
-                    'channel_name': channel['snippet']['title'],
-                    'channel_subscribers': int(channel['statistics'].get('subscriberCount', 0)),
-                    'channel_video_count': int(channel['statistics'].get('videoCount', 0)),
-                    'channel_view_count': int(channel['statistics'].get('viewCount', 0))
-                }
-            else:
-                # Check for errors in response
-                if 'error' in response:
-                    print(f"API Error for channel {channel_id}: {response['error']}")
-                else:
-                    print(f"No items found for channel {channel_id}")
-        except HttpError as e:
-            print(f"Error fetching channel info for {channel_id}: {e}")
-        except KeyError as e:
-            print(f"KeyError fetching channel info for {channel_id}: {e}")
-            print(f"Response keys: {list(response.keys()) if 'response' in locals() else 'No response'}")
-        except Exception as e:
-            print(f"Unexpected error fetching channel info for {channel_id}: {e}")
-        return None
+        return self.get_channels_info([channel_id]).get(channel_id)
     
-    def get_channel_videos(self, channel_id, max_results=50):
-        """Get videos from a channel"""
-        videos = []
+    def get_uploads_playlist_id(self, channel_id):
+        """Get the uploads playlist ID of a channel"""
+        request = self.youtube.channels().list(
+            part='contentDetails',
+            id=channel_id
+        )
+        response = self.execute(request)
+        
+        if not response.get('items'):
+            return None
+        
+        return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+    
+    def iter_channel_video_ids(self, channel_id, max_results=50, uploads_playlist_id=None):
+        """Yield video IDs of a channel one playlist page at a time"""
         try:
-            # Get uploads playlist ID
-            request = self.youtube.channels().list(
-                part='contentDetails',
-                id=channel_id
-            )
-            response = request.execute()
-            
-            if not response['items']:
-                return videos
+            if uploads_playlist_id is None:
+                uploads_playlist_id = self.get_uploads_playlist_id(channel_id)
+            if not uploads_playlist_id:
+                return
             
-            uploads_playlist_id = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-            
-            # Get videos from playlist
             next_page_token = None
             collected = 0
             
@@ -95,15 +196,13 @@ class YouTubeDataCollector:
                     maxResults=min(MAX_RESULTS_PER_REQUEST, max_results - collected),
                     pageToken=next_page_token
                 )
-                response = request.execute()
+                response = self.execute(request)
                 
                 video_ids = [item['contentDetails']['videoId'] for item in response['items']]
-                
-                # Get detailed video information
+                video_ids = video_ids[:max_results - collected]
                 if video_ids:
-                    video_details = self.get_video_details(video_ids)
-                    videos.extend(video_details)
-                    collected += len(video_details)
+                    collected += len(video_ids)
+                    yield video_ids
                 
                 next_page_token = response.get('nextPageToken')
                 if not next_page_token:
@@ -111,32 +210,39 @@ class YouTubeDataCollector:
                 
                 # Rate limiting
                 time.sleep(0.1)
-                
+        
         except HttpError as e:
             print(f"Error fetching videos for channel {channel_id}: {e}")
+    
+    def get_channel_videos(self, channel_id, max_results=50):
+        """Get videos from a channel"""
+        videos = []
+        for video_ids in self.iter_channel_video_ids(channel_id, max_results):
+            videos.extend(self.get_video_details(video_ids))
         
-        return videos[:max_results]
+        if not videos:
+            return videos
+        return add_duration_columns(pd.DataFrame(videos[:max_results])).to_dict('records')
     
     def get_video_details(self, video_ids):
-        """Get detailed information for video IDs"""
+        """Get detailed information for video IDs
+        
+        The ISO 8601 duration is kept as the raw 'duration' string; the
+        batch frame build (add_duration_columns) parses a whole batch at once.
+        """
         videos = []
         try:
             request = self.youtube.videos().list(
                 part='snippet,statistics,contentDetails',
                 id=','.join(video_ids)
             )
-            response = request.execute()
+            response = self.execute(request)
             
             for item in response['items']:
                 snippet = item['snippet']
                 stats = item['statistics']
                 content = item['contentDetails']
                 
-                # Parse duration (ISO 8601 format)
-                duration_str = content.get('duration', 'PT0S')
-                duration_seconds = self.parse_duration(duration_str)
-                duration_minutes = duration_seconds / 60
-                
                 # Parse publish date
                 publish_date = datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00'))
                 
@@ -152,8 +258,7 @@ class YouTubeDataCollector:
                     'category_id': snippet.get('categoryId', ''),
                     'tags': ','.join(snippet.get('tags', [])),
                     'tag_count': len(snippet.get('tags', [])),
-                    'duration_seconds': duration_seconds,
-                    'duration_minutes': duration_minutes,
+                    'duration': content.get('duration', 'PT0S'),
                     'view_count': int(stats.get('viewCount', 0)),
                     'like_count': int(stats.get('likeCount', 0)),
                     'comment_count': int(stats.get('commentCount', 0)),
@@ -162,7 +267,7 @@ class YouTubeDataCollector:
                 }
                 
                 videos.append(video_data)
-                
+        
         except HttpError as e:
             print(f"Error fetching video details: {e}")
         
@@ -170,18 +275,7 @@ class YouTubeDataCollector:
     
     def parse_duration(self, duration_str):
         """Parse ISO 8601 duration string to seconds"""
-        import re
-        pattern = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
-        match = pattern.match(duration_str)
-        
-        if not match:
-            return 0
-        
-        hours = int(match.group(1) or 0)
-        minutes = int(match.group(2) or 0)
-        seconds = int(match.group(3) or 0)
-        
-        return hours * 3600 + minutes * 60 + seconds
+        return parse_iso_duration(duration_str)
     
     def calculate_first_week_views(self, video_data, current_date=None):
         """Calculate views in first 7 days using improved heuristics"""
@@ -252,59 +346,188 @@ class YouTubeDataCollector:
             
             return int(view_count * final_ratio)
     
-    def collect_all_data(self):
-        """Collect data from all target channels"""
+    def filter_videos_frame(self, df):
+        """Hook for filtering a batch of videos
+        
+        Returns the kept rows and an optional per-channel statistics frame
+        (indexed by channel_id). The base collector keeps everything.
+        """
+        return df, None
+    
+    def prepare_videos_frame(self, df, channel_infos):
+        """Parse durations, filter a batch of videos and attach channel info and the first week target"""
+        if 'duration' in df.columns:
+            df = add_duration_columns(df)
+        df, stats = self.filter_videos_frame(df)
+        
+        info = pd.DataFrame.from_dict(channel_infos, orient='index')
+        for column in ('channel_subscribers', 'channel_video_count', 'channel_view_count'):
+            df[column] = df['channel_id'].map(info[column])
+        
+        # Calculate first week views (simplified)
+        df['target_first_week_views'] = calculate_first_week_views_frame(df)
+        return df, stats
+    
+    def collect_all_data(self, sink=None, channel_ids=None):
+        """Collect data from all target channels (or the given channel IDs)
+        
+        Without a sink all videos are returned as one list. With a sink
+        (e.g. JsonlVideoSink) every videos.list batch is written as soon as it
+        arrives and only the number of written videos is returned, so memory
+        stays flat however many channels are crawled.
+        """
+        channel_ids = list(channel_ids or TARGET_CHANNELS)
         print("Starting data collection from YouTube API...")
-        print(f"Target channels: {len(TARGET_CHANNELS)}")
+        print(f"Target channels: {len(channel_ids)}")
         print(f"Max videos per channel: {MAX_VIDEOS_PER_CHANNEL}\n")
         
         all_videos = []
+        channel_infos = {}
+        channel_stats = []
         
-        for channel_id in tqdm(TARGET_CHANNELS, desc="Channels"):
-            print(f"\nCollecting from channel: {channel_id}")
+        def handle_batch(grouped):
+            grouped = {channel_id: videos for channel_id, videos in grouped.items()
+                       if channel_id in channel_infos and videos}
+            if not grouped:
+                return
             
-            # Get channel info
-            channel_info = self.get_channel_info(channel_id)
-            if not channel_info:
-                print(f"  Skipping channel {channel_id} - could not fetch info")
-                continue
+            # One columnar frame per batch, across all channels in it
+            df = pd.DataFrame([video for videos in grouped.values() for video in videos])
+            df['channel_id'] = np.repeat(list(grouped), [len(videos) for videos in grouped.values()])
+            collected = df['channel_id'].value_counts().rename('collected')
             
-            print(f"  Channel: {channel_info['channel_name']}")
-            print(f"  Subscribers: {channel_info['channel_subscribers']:,}")
+            df, stats = self.prepare_videos_frame(df, channel_infos)
+            kept = df['channel_id'].value_counts().rename('kept')
+            channel_stats.append(pd.concat([collected, kept, stats], axis=1))
             
-            # Get videos
-            videos = self.get_channel_videos(channel_id, MAX_VIDEOS_PER_CHANNEL)
-            print(f"  Collected {len(videos)} videos")
+            videos = df.to_dict('records')
+            if sink is not None:
+                sink.write(videos)
+            else:
+                all_videos.extend(videos)
+        
+        # Video IDs of all channels share full 50-ID videos.list requests
+        batcher = VideoDetailsBatcher(self.get_video_details, on_batch=handle_batch)
+        
+        try:
+            # Resolve all channels (info + uploads playlist) up front
+            resolved = self.get_channels_info(channel_ids)
+            print(f"Resolved {len(resolved)}/{len(channel_ids)} channels")
             
-            # Add channel info to each video
-            for video in videos:
-                video.update({
-                    'channel_subscribers': channel_info['channel_subscribers'],
-                    'channel_video_count': channel_info['channel_video_count'],
-                    'channel_view_count': channel_info['channel_view_count']
-                })
+            for channel_id in tqdm(channel_ids, desc="Channels"):
+                print(f"\nCollecting from channel: {channel_id}")
                 
-                # Calculate first week views (simplified)
-                video['target_first_week_views'] = self.calculate_first_week_views(video)
-            
-            all_videos.extend(videos)
+                channel_info = resolved.get(channel_id)
+                if not channel_info:
+                    print(f"  Skipping channel {channel_id} - could not fetch info")
+                    continue
+                
+                print(f"  Channel: {channel_info['channel_name']}")
+                print(f"  Subscribers: {channel_info['channel_subscribers']:,}")
+                channel_infos[channel_id] = channel_info
+                
+                # Queue video IDs; details are fetched once a batch is full
+                video_id_pages = self.iter_channel_video_ids(
+                    channel_id, MAX_VIDEOS_PER_CHANNEL,
+                    uploads_playlist_id=channel_info.get('uploads_playlist_id')
+                )
+                for video_ids in video_id_pages:
+                    batcher.add(channel_id, video_ids)
+                
+                # Rate limiting between channels
+                time.sleep(1)
             
-            # Rate limiting between channels
-            time.sleep(1)
+            batcher.flush()
+        except QuotaExhaustedError as e:
+            print(f"\nStopping collection early: {e}")
         
-        print(f"\n\nTotal videos collected: {len(all_videos)}")
-        return all_videos
+        print(f"\nvideos.list requests: {batcher.request_count} "
+              f"({batcher.video_count} videos)")
+        print(f"API calls: {self.retry_policy.summary()}")
+        
+        stats = (pd.concat(channel_stats).groupby(level=0).sum(min_count=1).fillna(0).astype(int)
+                 if channel_stats else pd.DataFrame(columns=['collected', 'kept']))
+        stats = stats.reindex(list(channel_infos), fill_value=0)
+        stats.index = [channel_infos[channel_id]['channel_name'] for channel_id in stats.index]
+        print("\nPer-channel statistics:")
+        print(stats.to_string())
+        
+        total = int(stats['kept'].sum())
+        print(f"\n\nTotal videos collected: {total}")
+        return total if sink is not None else all_videos
     
     def save_data(self, videos_data, output_path='raw_data/youtube_videos_raw.csv'):
-        """Save collected data to CSV"""
+        """Save collected data (Parquet when available, CSV otherwise)"""
         df = pd.DataFrame(videos_data)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        df.to_csv(output_path, index=False, encoding='utf-8')
+        output_path = write_table(df, output_path, RAW_SCHEMA)
         print(f"\nData saved to: {output_path}")
         print(f"Shape: {df.shape}")
         return df
 
 
+def add_duration_columns(df):
+    """Replace the raw ISO 8601 'duration' column with duration_seconds and duration_minutes, in its place"""
+    position = df.columns.get_loc('duration')
+    seconds = parse_iso_durations(df['duration']).to_numpy()
+    df = df.drop(columns='duration')
+    df.insert(position, 'duration_seconds', seconds)
+    df.insert(position + 1, 'duration_minutes', seconds / 60)
+    return df
+
+
+def calculate_first_week_views_frame(df, current_date=None):
+    """Column-wise YouTubeDataCollector.calculate_first_week_views
+    
+    Computes target_first_week_views for a whole DataFrame with the same age
+    buckets, channel size and engagement adjustments, returning exactly the
+    values the per-video method would (as an int64 Series aligned to df).
+    Like that method, it raises ValueError when a published_at is missing
+    or cannot be parsed.
+    """
+    if current_date is None:
+        current_date = datetime.now()
+    
+    published_at = df['published_at']
+    if published_at.dtype == object:
+        # Like the scalar path, keep the wall-clock time and drop the offset
+        published_at = parse_timestamps(
+            published_at.astype(str).str.replace(r'(?:Z|[+-]\d{2}:?\d{2})$', '', regex=True)
+        ).dt.tz_localize(None)
+    elif getattr(published_at.dt, 'tz', None) is not None:
+        published_at = published_at.dt.tz_localize(None)
+    
+    unknown = published_at.isna()
+    if unknown.any():
+        ids = df.loc[unknown, 'video_id'].tolist() if 'video_id' in df.columns else df.index[unknown].tolist()
+        raise ValueError(f"published_at missing or unparseable for {int(unknown.sum())} videos: {ids[:5]}")
+    
+    days = (pd.Timestamp(current_date) - published_at).dt.days.to_numpy()
+    views = df['view_count'].to_numpy(dtype=np.int64)
+    likes = (df['like_count'] if 'like_count' in df.columns else pd.Series(0, index=df.index)).to_numpy(dtype=float)
+    subs = (df['channel_subscribers'] if 'channel_subscribers' in df.columns
+            else pd.Series(100000, index=df.index)).to_numpy(dtype=float)
+    
+    # Older videos: base ratio by channel size, boosted by engagement, decayed by age
+    base_ratio = np.select([subs > 1000000, subs > 100000], [0.15, 0.12], default=0.10)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        engagement_ratio = np.where(views > 0, likes / np.where(views > 0, views, 1), 0.0)
+    base_ratio = np.select(
+        [(views > 0) & (engagement_ratio > 0.05), (views > 0) & (engagement_ratio > 0.03)],
+        [base_ratio * 1.3, base_ratio * 1.1],
+        default=base_ratio
+    )
+    age_factor = np.maximum(0.5, 1.0 - (days - 365) / 1000)
+    
+    ratio = np.select(
+        [days < 30, days < 90, days < 365],
+        [0.6 - (days - 7) * 0.01, 0.4 - (days - 30) * 0.002, 0.25 - (days - 90) * 0.0004],
+        default=base_ratio * age_factor
+    )
+    first_week = np.where(days < 7, views, np.trunc(views * ratio).astype(np.int64))
+    
+    return pd.Series(first_week, index=df.index, name='target_first_week_views')
+
+
 def main():
     """Main execution function"""
     if not YOUTUBE_API_KEY:
@@ -313,18 +536,22 @@ def main():
         print("Get your API key from: https://console.cloud.google.com/apis/credentials")
         return
     
+    stream_path = 'raw_data/youtube_videos_raw.jsonl'
+    output_path = 'raw_data/youtube_videos_raw.csv'
+    
     collector = YouTubeDataCollector(YOUTUBE_API_KEY)
-    videos_data = collector.collect_all_data()
+    with JsonlVideoSink(stream_path) as sink:
+        video_count = collector.collect_all_data(sink=sink)
     
-    if videos_data:
-        df = collector.save_data(videos_data)
+    if video_count:
+        output_path, rows = jsonl_to_table(stream_path, output_path)
+        print(f"\nData saved to: {output_path} ({rows} videos)")
         print("\nData collection completed successfully!")
         print(f"\nSample data:")
-        print(df.head())
+        print(read_table(output_path, columns=['title', 'channel_name', 'view_count', 'target_first_week_views']).head())
     else:
         print("No data collected. Please check your API key and network connection.")
 
-
 if __name__ == '__main__':
     main()
 
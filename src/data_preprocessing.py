@@ -6,7 +6,11 @@ import os
 import sys
 import pandas as pd
 import numpy as np
+import io
 import re
+import tracemalloc
+from contextlib import redirect_stdout
+from functools import lru_cache
 from datetime import datetime
 import joblib
 from pandas.api.types import is_numeric_dtype
@@ -14,16 +18,118 @@ from pandas.api.types import is_numeric_dtype
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.config import PREPROCESS_CHUNK_SIZE, PREPROCESS_WORKERS, PARALLEL_MIN_CHUNK_ROWS
+from src.storage import (
+    RAW_SCHEMA, PROCESSED_SCHEMA, read_table, write_table, table_exists, table_columns,
+    iter_table_chunks, write_table_chunks
+)
+from src.dtype_compaction import compact_dtypes, NUMERIC_COMPACT_SCHEMA
+from src.quantile_sketch import QuantileSketch
+from src.keyword_matcher import TITLE_KEYWORDS, title_matcher
+from src.feature_frame import FeatureFrame, clean_value, print_memory_report
+from src.feature_transformer import FeatureTransformer, cut_category, cut_value
+from src.parsing_utils import parse_timestamp, parse_timestamps
+
+EMOJI_RANGES = [
+    (0x1F600, 0x1F64F),  # emoticons
+    (0x1F300, 0x1F5FF),  # symbols & pictographs
+    (0x1F680, 0x1F6FF),  # transport & map symbols
+    (0x1F1E0, 0x1F1FF),  # flags
+    (0x02702, 0x027B0),
+    (0x024C2, 0x1F251),
+]
+EMOJI_PATTERN = re.compile(
+    '[' + ''.join(f'{chr(start)}-{chr(end)}' for start, end in EMOJI_RANGES) + ']+', flags=re.UNICODE
+)
+
+SPECIAL_CHARS = '!@#$%^&*(),.?":{}|<>'
+
+# Channel columns whose missing values clean_data fills with the median
+CHANNEL_FILL_COLUMNS = ('channel_subscribers', 'channel_video_count', 'channel_view_count')
+
+# Bits of the per-code-point table used by extract_title_features_frame
+UPPER, SPACE, DIGIT, SPECIAL, EMOJI = 1, 2, 4, 8, 16
+
+
+@lru_cache(maxsize=None)
+def code_point_flags():
+    """Character class bits for every code point
+    
+    UPPER, SPACE and DIGIT follow str.isupper, str.isspace (what str.split
+    splits on) and str.isdecimal (what re's \\d matches).
+    """
+    chars = [chr(code) for code in range(sys.maxunicode + 1)]
+    flags = np.zeros(len(chars), dtype=np.uint8)
+    for bit, predicate in ((UPPER, str.isupper), (SPACE, str.isspace), (DIGIT, str.isdecimal)):
+        flags[np.fromiter(map(predicate, chars), dtype=bool, count=len(chars))] |= bit
+    flags[[ord(char) for char in SPECIAL_CHARS]] |= SPECIAL
+    codes = np.arange(len(chars))
+    for start, end in EMOJI_RANGES:
+        flags[(codes >= start) & (codes <= end)] |= EMOJI
+    return flags
+
+
+def in_bounds(series, bounds):
+    lower, upper = bounds
+    return (series >= lower) & (series <= upper)
+
+
+class SeenKeys:
+    """Set of keys seen so far, kept as sorted runs of 64-bit hashes
+    
+    8 bytes per distinct key instead of a Python set of strings; runs of
+    similar size are merged, so lookups touch O(log n) sorted arrays.
+    A hash collision (p ~ n^2 / 2^65) would drop one row as a duplicate.
+    """
+    
+    def __init__(self):
+        self.runs = []
+    
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+    
+    def add(self, hashes):
+        run = np.sort(hashes)
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            run = np.sort(np.concatenate([self.runs.pop(), run]))
+        self.runs.append(run)
+    
+    def first_seen(self, keys):
+        """Boolean mask of the keys seen for the first time (first occurrence within keys)"""
+        hashes = pd.util.hash_pandas_object(pd.Series(keys).reset_index(drop=True), index=False).to_numpy()
+        new = ~pd.Series(hashes).duplicated().to_numpy() & ~self.contains(hashes)
+        if new.any():
+            self.add(hashes[new])
+        return new
+
 
 class DataPreprocessor:
     """Preprocesses and engineers features from raw YouTube data"""
     
-    def __init__(self):
+    def __init__(self, feature_store=None, near_duplicates=None, workers=PREPROCESS_WORKERS, verbose=True):
         self.feature_names = None
-        
-    def load_data(self, filepath):
-        """Load raw data from CSV"""
-        df = pd.read_csv(filepath)
+        self.feature_store = feature_store
+        self.near_duplicates = near_duplicates
+        self.workers = workers
+        self.verbose = verbose
+        # Fill values, caps and one-hot vocabularies fitted by this run, saved for serving
+        self.transformer = FeatureTransformer()
+        # Filled by engineer_features while tracemalloc is tracing
+        self.memory_peaks = {}
+        self.memory_input_bytes = 0
+    
+    def log(self, message=''):
+        """Feature engineering progress (silent with verbose=False, e.g. when serving)"""
+        if self.verbose:
+            print(message)
+    
+    def load_data(self, filepath, columns=None, filters=None):
+        """Load raw data (Parquet or CSV)"""
+        df = read_table(filepath, columns=columns, filters=filters, schema=RAW_SCHEMA)
         print(f"Loaded data: {df.shape}")
         return df
     
@@ -32,33 +138,83 @@ class DataPreprocessor:
         print("\n=== Data Cleaning ===")
         original_shape = df.shape
         
+        df = self.filter_rows(df)
+        stats = self.cleaning_stats(df)
+        self.transformer = FeatureTransformer().fit_cleaning(stats)
+        df = self.apply_cleaning_stats(df, stats)
+        
+        print(f"Final shape: {df.shape} (removed {original_shape[0] - df.shape[0]} rows)")
+        return df
+    
+    def filter_rows(self, df, seen=None, verbose=True):
+        """Row-by-row filters: duplicates, duration, zero views, then near-duplicates
+        
+        seen: SeenKeys shared by the chunks of one pass, so a video_id from
+        an earlier chunk counts as a duplicate too (chunked mode)
+        """
         # Remove duplicates
-        df = df.drop_duplicates(subset=['video_id'], keep='first')
-        print(f"After removing duplicates: {df.shape}")
+        if seen is None:
+            df = df.drop_duplicates(subset=['video_id'], keep='first')
+        else:
+            df = df[seen.first_seen(df['video_id'])]
+        if verbose:
+            print(f"After removing duplicates: {df.shape}")
         
         # Filter outliers: video duration (more lenient for real data)
         df = df[(df['duration_minutes'] >= 0.5) & (df['duration_minutes'] <= 480)]
-        print(f"After filtering duration (0.5-180 min): {df.shape}")
+        if verbose:
+            print(f"After filtering duration (0.5-180 min): {df.shape}")
         
         # Filter videos with zero views (likely errors or private videos)
         df = df[df['view_count'] > 0]
-        print(f"After filtering zero views: {df.shape}")
+        if verbose:
+            print(f"After filtering zero views: {df.shape}")
         
         # Filter videos with zero first week views
         df = df[df['target_first_week_views'] > 0]
-        print(f"After filtering zero first week views: {df.shape}")
+        if verbose:
+            print(f"After filtering zero first week views: {df.shape}")
+        
+        # Remove near-duplicates (re-uploads, templated copies) when a detector is given; after
+        # the row filters, so the video kept for a group is never one they drop afterwards
+        if self.near_duplicates is not None and seen is None:
+            df, removed = self.near_duplicates.drop(df)
+            if verbose:
+                print(f"After removing near-duplicates: {df.shape} (removed {removed} rows)")
+        return df
+    
+    def cleaning_stats(self, df):
+        """Global statistics clean_data needs: target IQR bounds, channel medians and cap"""
+        stats = {'fill': {}}
         
-        # Remove extreme outliers in target variable (using IQR method)
+        # Extreme outliers in target variable (using IQR method)
         if 'target_first_week_views' in df.columns:
             Q1 = df['target_first_week_views'].quantile(0.25)
             Q3 = df['target_first_week_views'].quantile(0.75)
             IQR = Q3 - Q1
-            lower_bound = Q1 - 3 * IQR  # More lenient (3*IQR instead of 1.5*IQR)
-            upper_bound = Q3 + 3 * IQR
+            # More lenient (3*IQR instead of 1.5*IQR)
+            stats['target_bounds'] = (Q1 - 3 * IQR, Q3 + 3 * IQR)
+            df = df[in_bounds(df['target_first_week_views'], stats['target_bounds'])]
+        
+        # Missing channel info is filled with the median (more robust)
+        for column in CHANNEL_FILL_COLUMNS:
+            if column in df.columns:
+                stats['fill'][column] = df[column].median()
+        
+        # Cap extreme subscriber counts at twice the 99th percentile (after filling)
+        if 'channel_subscribers' in df.columns:
+            filled = df['channel_subscribers'].fillna(stats['fill']['channel_subscribers'])
+            stats['subscriber_cap'] = filled.quantile(0.99) * 2
+        return stats
+    
+    def apply_cleaning_stats(self, df, stats, verbose=True):
+        """Drop target outliers and fill missing values with precomputed statistics"""
+        if 'target_bounds' in stats:
             before_outlier = len(df)
-            df = df[(df['target_first_week_views'] >= lower_bound) & 
-                   (df['target_first_week_views'] <= upper_bound)]
-            print(f"After removing extreme outliers in target: {df.shape} (removed {before_outlier - len(df)} rows)")
+            df = df[in_bounds(df['target_first_week_views'], stats['target_bounds'])].copy()
+            if verbose:
+                print(f"After removing extreme outliers in target: {df.shape} "
+                      f"(removed {before_outlier - len(df)} rows)")
         
         # Handle missing values
         # Fill missing tags with empty string
@@ -68,25 +224,73 @@ class DataPreprocessor:
         # Fill missing description with empty string
         df['description'] = df['description'].fillna('')
         
-        # Fill missing channel info with median (more robust)
-        if 'channel_subscribers' in df.columns:
-            median_subs = df['channel_subscribers'].median()
-            df['channel_subscribers'] = df['channel_subscribers'].fillna(median_subs)
-            # Cap extreme values
-            p99 = df['channel_subscribers'].quantile(0.99)
-            df['channel_subscribers'] = df['channel_subscribers'].clip(upper=p99 * 2)
-        
-        if 'channel_video_count' in df.columns:
-            median_videos = df['channel_video_count'].median()
-            df['channel_video_count'] = df['channel_video_count'].fillna(median_videos)
-        
-        if 'channel_view_count' in df.columns:
-            median_views = df['channel_view_count'].median()
-            df['channel_view_count'] = df['channel_view_count'].fillna(median_views)
-        
-        print(f"Final shape: {df.shape} (removed {original_shape[0] - df.shape[0]} rows)")
+        # Fill missing channel info with median
+        for column, median in stats['fill'].items():
+            df[column] = df[column].fillna(median)
+        if 'subscriber_cap' in stats:
+            df['channel_subscribers'] = df['channel_subscribers'].clip(upper=stats['subscriber_cap'])
         return df
     
+    def apply_cleaning_stats_row(self, row, stats):
+        """apply_cleaning_stats for one row dict (target bounds are not applied); returns a new dict"""
+        row = dict(row)
+        for column, empty in (('tags', ''), ('tag_count', 0), ('description', '')):
+            if pd.isna(row[column]):
+                row[column] = empty
+        for column, median in stats['fill'].items():
+            if pd.isna(row[column]):
+                row[column] = median
+        if 'subscriber_cap' in stats:
+            row['channel_subscribers'] = float(np.minimum(row['channel_subscribers'], stats['subscriber_cap']))
+        return row
+    
+    def fit_cleaning_stats(self, input_path, chunksize=PREPROCESS_CHUNK_SIZE):
+        """cleaning_stats() over a stored table, streamed in chunks with quantile sketches
+        
+        Two scans of the needed columns: the target bounds first, then the
+        channel statistics over the rows within them. Exact while the rows
+        fit in a sketch (QUANTILE_SKETCH_K), approximate beyond.
+        """
+        wanted = ['video_id', 'duration_minutes', 'view_count', 'target_first_week_views',
+                  *CHANNEL_FILL_COLUMNS]
+        available = set(table_columns(input_path))
+        columns = [column for column in wanted if column in available]
+        
+        def scan():
+            seen = SeenKeys()
+            for chunk in iter_table_chunks(input_path, chunksize, columns=columns, schema=RAW_SCHEMA):
+                yield self.filter_rows(chunk, seen=seen, verbose=False)
+        
+        stats = {'fill': {}}
+        if 'target_first_week_views' in columns:
+            target = QuantileSketch()
+            for chunk in scan():
+                target.update(chunk['target_first_week_views'].to_numpy(dtype=np.float64))
+            Q1, Q3 = target.quantile(0.25), target.quantile(0.75)
+            IQR = Q3 - Q1
+            stats['target_bounds'] = (Q1 - 3 * IQR, Q3 + 3 * IQR)
+        
+        sketches = {column: QuantileSketch() for column in CHANNEL_FILL_COLUMNS if column in columns}
+        missing_subscribers = 0
+        if sketches:
+            for chunk in scan():
+                if 'target_bounds' in stats:
+                    chunk = chunk[in_bounds(chunk['target_first_week_views'], stats['target_bounds'])]
+                for column, sketch in sketches.items():
+                    sketch.update(chunk[column].to_numpy(dtype=np.float64, na_value=np.nan))
+                if 'channel_subscribers' in sketches:
+                    missing_subscribers += int(chunk['channel_subscribers'].isna().sum())
+        
+        for column, sketch in sketches.items():
+            stats['fill'][column] = sketch.median()
+        if 'channel_subscribers' in sketches:
+            subscribers = sketches['channel_subscribers']
+            median = stats['fill']['channel_subscribers']
+            if missing_subscribers and not np.isnan(median):
+                subscribers.update_repeated(median, missing_subscribers)
+            stats['subscriber_cap'] = subscribers.quantile(0.99) * 2
+        return stats
+    
     def extract_title_features(self, title):
         """Extract features from video title"""
         if pd.isna(title) or title == '':
@@ -102,8 +306,8 @@ class DataPreprocessor:
             'title_has_question': 1 if '?' in title else 0,
             'title_has_exclamation': 1 if '!' in title else 0,
             'title_special_char_count': len(re.findall(r'[!@#$%^&*(),.?":{}|<>]', title)),
-            'title_is_tutorial': 1 if any(word in title.lower() for word in ['tutorial', 'how to', 'learn', 'guide', 'course']) else 0,
-            'title_is_question': 1 if any(word in title.lower() for word in ['what', 'why', 'how', 'when', 'where', '?']) else 0,
+            'title_is_tutorial': 1 if any(word in title.lower() for word in TITLE_KEYWORDS['tutorial']) else 0,
+            'title_is_question': 1 if any(word in title.lower() for word in TITLE_KEYWORDS['question']) else 0,
             'title_uppercase_ratio': sum(1 for c in title if c.isupper()) / len(title) if len(title) > 0 else 0
         }
         
@@ -111,29 +315,51 @@ class DataPreprocessor:
     
     def _has_emoji(self, text):
         """Check if text contains emoji"""
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags
-            "\U00002702-\U000027B0"
-            "\U000024C2-\U0001F251"
-            "]+", flags=re.UNICODE
-        )
-        return bool(emoji_pattern.search(text))
+        return bool(EMOJI_PATTERN.search(text))
+    
+    def extract_title_features_frame(self, titles):
+        """Column-wise extract_title_features: the same 10 columns for a whole Series
+        
+        Every title's code points go into one array; character classes are
+        looked up there and summed per title instead of scanning each title
+        in Python.
+        """
+        titles = titles.where(titles.notna(), '').astype(str)
+        length = titles.str.len().to_numpy(dtype=np.int64)
+        starts = np.cumsum(length) - length
+        codes = np.frombuffer(''.join(titles).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        flags = code_point_flags()[codes]
+        
+        def per_title(mask):
+            total = np.concatenate([[0], np.cumsum(mask, dtype=np.int64)])
+            return total[starts + length] - total[starts]
+        
+        # A word starts at a non-space that follows a space or starts a title
+        space = (flags & SPACE) > 0
+        after_space = np.ones(len(codes), dtype=bool)
+        after_space[1:] = space[:-1]
+        after_space[starts[length > 0]] = True
+        
+        keywords = title_matcher('tutorial', 'question').count(titles)
+        uppercase = per_title((flags & UPPER) > 0)
+        features = {
+            'title_length': length,
+            'title_word_count': per_title(~space & after_space),
+            'title_has_number': (per_title((flags & DIGIT) > 0) > 0).astype(int),
+            'title_has_emoji': (per_title((flags & EMOJI) > 0) > 0).astype(int),
+            'title_has_question': (per_title(codes == ord('?')) > 0).astype(int),
+            'title_has_exclamation': (per_title(codes == ord('!')) > 0).astype(int),
+            'title_special_char_count': per_title((flags & SPECIAL) > 0),
+            'title_is_tutorial': (keywords['tutorial'] > 0).astype(int),
+            'title_is_question': (keywords['question'] > 0).astype(int),
+            'title_uppercase_ratio': np.divide(uppercase, length, out=np.zeros(len(length)), where=length > 0),
+        }
+        return pd.DataFrame(features, index=titles.index)
     
     def extract_time_features(self, df):
         """Extract time-based features"""
-        df = df.copy()
-        
-        # Convert publish date to datetime (handle mixed formats & timezones)
-        df['published_at'] = pd.to_datetime(
-            df['published_at'],
-            format='mixed',
-            errors='coerce',
-            utc=True
-        )
+        # UTC datetime; already typed when read through the storage schema
+        df['published_at'] = parse_timestamps(df['published_at'])
         # Drop rows where conversion failed
         df = df.dropna(subset=['published_at'])
         
@@ -147,11 +373,7 @@ class DataPreprocessor:
         df['is_prime_time'] = ((df['publish_hour'] >= 18) & (df['publish_hour'] <= 21)).astype(int)
         
         # Time of day categories
-        df['time_of_day'] = pd.cut(
-            df['publish_hour'],
-            bins=[-1, 6, 12, 18, 24],
-            labels=['night', 'morning', 'afternoon', 'evening']
-        )
+        df['time_of_day'] = cut_category(df['publish_hour'], 'time_of_day')
         
         # Month
         df['publish_month'] = df['published_at'].dt.month
@@ -160,14 +382,8 @@ class DataPreprocessor:
     
     def extract_duration_features(self, df):
         """Extract duration-based features"""
-        df = df.copy()
-        
         # Duration categories
-        df['duration_category'] = pd.cut(
-            df['duration_minutes'],
-            bins=[0, 5, 10, 15, 30, 60, 480],
-            labels=['very_short', 'short', 'medium', 'long', 'very_long', 'extended']
-        )
+        df['duration_category'] = cut_category(df['duration_minutes'], 'duration_category')
         
         # Is short video (< 5 min)
         df['is_short_video'] = (df['duration_minutes'] < 5).astype(int)
@@ -182,14 +398,8 @@ class DataPreprocessor:
     
     def extract_channel_features(self, df):
         """Extract channel-based features"""
-        df = df.copy()
-        
         # Channel size categories
-        df['channel_size'] = pd.cut(
-            df['channel_subscribers'],
-            bins=[0, 10000, 100000, 1000000, float('inf')],
-            labels=['small', 'medium', 'large', 'mega']
-        )
+        df['channel_size'] = cut_category(df['channel_subscribers'], 'channel_size')
         
         # Subscriber per video ratio
         df['subscribers_per_video'] = df['channel_subscribers'] / (df['channel_video_count'] + 1)
@@ -202,8 +412,6 @@ class DataPreprocessor:
     
     def extract_description_features(self, df):
         """Extract features from video description"""
-        df = df.copy()
-        
         df['description_length'] = df['description'].apply(lambda x: len(str(x)) if pd.notna(x) else 0)
         df['description_word_count'] = df['description'].apply(lambda x: len(str(x).split()) if pd.notna(x) else 0)
         df['description_has_url'] = df['description'].apply(lambda x: 1 if 'http' in str(x).lower() else 0)
@@ -211,64 +419,148 @@ class DataPreprocessor:
         return df
     
     def engineer_features(self, df):
-        """Main feature engineering function"""
-        print("\n=== Feature Engineering ===")
-
-        # Ensure stable, aligned indices before any concat/apply operations
-        df = df.reset_index(drop=True).copy()
+        """Main feature engineering function
+        
+        The extract_* steps append columns to one FeatureFrame instead of
+        copying the table; the DataFrame is built once at the end and
+        shares the unchanged input columns with df. While
+        tracemalloc is tracing, the peak memory of every step is recorded
+        in memory_peaks.
+        """
+        self.log("\n=== Feature Engineering ===")
+        
+        input_bytes = int(df.memory_usage(deep=True).sum()) if tracemalloc.is_tracing() else 0
+        
+        # Ensure stable, aligned indices before any apply operations
+        df = FeatureFrame(df, index=pd.RangeIndex(len(df)))
         
         # Extract title features
-        print("Extracting title features...")
-        title_features = df['title'].apply(self.extract_title_features)
-        title_df = pd.DataFrame(list(title_features)).reset_index(drop=True)
-        df = pd.concat([df, title_df], axis=1)
+        self.log("Extracting title features...")
+        with df.stage('title'):
+            df.update(self.extract_title_features_frame(df['title']))
         
         # Time features
-        print("Extracting time features...")
-        df = self.extract_time_features(df)
+        self.log("Extracting time features...")
+        with df.stage('time'):
+            df = self.extract_time_features(df)
         
         # Duration features
-        print("Extracting duration features...")
-        df = self.extract_duration_features(df)
+        self.log("Extracting duration features...")
+        with df.stage('duration'):
+            df = self.extract_duration_features(df)
         
         # Channel features
-        print("Extracting channel features...")
-        df = self.extract_channel_features(df)
+        self.log("Extracting channel features...")
+        with df.stage('channel'):
+            df = self.extract_channel_features(df)
         
         # Description features
-        print("Extracting description features...")
-        df = self.extract_description_features(df)
+        self.log("Extracting description features...")
+        with df.stage('description'):
+            df = self.extract_description_features(df)
         
-        print(f"Total features after basic engineering: {df.shape[1]}")
+        self.log(f"Total features after basic engineering: {df.shape[1]}")
         
-        # Apply advanced feature engineering
+        # Apply advanced feature engineering (on a shallow copy, so a failure leaves the basic features)
         try:
             from src.advanced_feature_engineering import AdvancedFeatureEngineer
-            print("\nApplying advanced feature engineering...")
-            advanced_engineer = AdvancedFeatureEngineer()
-            df = advanced_engineer.engineer_all_features(df)
+            self.log("\nApplying advanced feature engineering...")
+            advanced_engineer = AdvancedFeatureEngineer(verbose=self.verbose)
+            df = advanced_engineer.engineer_all_features(df.copy())
         except Exception as e:
             print(f"Warning: Advanced feature engineering failed: {e}")
             print("Continuing with basic features only...")
         
-        print(f"Total features after all engineering: {df.shape[1]}")
-        return df
+        with df.stage('assemble'):
+            result = df.to_frame()
+        
+        if df.peaks:
+            self.memory_peaks = df.peaks
+            self.memory_input_bytes = input_bytes
+            if self.verbose:
+                print_memory_report(df.peaks, input_bytes)
+        
+        self.log(f"Total features after all engineering: {result.shape[1]}")
+        return result
     
-    def encode_categorical_features(self, df):
-        """One-hot encode categorical features"""
-        print("\n=== Encoding Categorical Features ===")
+    def engineer_features_row(self, row):
+        """engineer_features for one row dict, without building a DataFrame (serving)
+        
+        Same columns in the same order and the same values as
+        engineer_features on a one-row frame, whose pandas overhead per
+        column dominates at that size. Raises ValueError when published_at
+        is missing or cannot be parsed (engineer_features drops such rows).
+        """
+        features = dict(row)
+        features.update(self.extract_title_features(features['title']))
         
-        categorical_cols = ['publish_day', 'time_of_day', 'duration_category', 'channel_size']
+        # Time features
+        published_at = parse_timestamp(features['published_at'])
+        if pd.isna(published_at):
+            raise ValueError(f"published_at missing or unparseable: {features['published_at']!r}")
+        hour = features['publish_hour']
+        features['published_at'] = published_at
+        features['publish_day_of_week'] = published_at.dayofweek
+        features['is_weekend'] = int(published_at.dayofweek >= 5)
+        features['is_prime_time'] = int(18 <= hour <= 21)
+        features['time_of_day'] = cut_value(hour, 'time_of_day')
+        features['publish_month'] = published_at.month
+        
+        # Duration features
+        minutes = features['duration_minutes']
+        features['duration_category'] = cut_value(minutes, 'duration_category')
+        features['is_short_video'] = int(minutes < 5)
+        features['is_medium_video'] = int(5 <= minutes <= 15)
+        features['is_long_video'] = int(minutes > 15)
+        
+        # Channel features (numpy division: x / 0 gives inf like the columns do)
+        features['channel_size'] = cut_value(features['channel_subscribers'], 'channel_size')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            features['subscribers_per_video'] = np.divide(features['channel_subscribers'],
+                                                          features['channel_video_count'] + 1)
+            features['likes_per_1k_views'] = np.divide(features['like_count'], features['view_count'] + 1) * 1000
+            features['comments_per_1k_views'] = np.divide(features['comment_count'], features['view_count'] + 1) * 1000
+        
+        # Description features
+        description = features['description']
+        features['description_length'] = len(str(description)) if pd.notna(description) else 0
+        features['description_word_count'] = len(str(description).split()) if pd.notna(description) else 0
+        features['description_has_url'] = 1 if 'http' in str(description).lower() else 0
+        
+        from src.advanced_feature_engineering import AdvancedFeatureEngineer
+        return AdvancedFeatureEngineer(verbose=False).engineer_all_features_row(features)
+    
+    def engineer_features_parallel(self, df):
+        """engineer_features split over self.workers processes (serial for one worker or few rows)
+        
+        Rows are independent once cleaning is done, so contiguous chunks are
+        engineered separately and concatenated; the result is identical.
+        """
+        if self.workers <= 1 or len(df) < 2 * PARALLEL_MIN_CHUNK_ROWS:
+            return self.engineer_features(df)
+        from src.parallel_features import engineer_in_parallel
+        return engineer_in_parallel(df, self.workers)
+    
+    def encode_categorical_features(self, df):
+        """One-hot encode categorical features
         
-        # Only encode columns that exist
-        categorical_cols = [col for col in categorical_cols if col in df.columns]
+        The vocabularies are fitted on the first frame encoded (the whole
+        table) and reused afterwards, so every batch gets the same columns.
+        """
+        print("\n=== Encoding Categorical Features ===")
         
-        # One-hot encoding
-        df_encoded = pd.get_dummies(df, columns=categorical_cols, prefix=categorical_cols, drop_first=True)
+        if self.transformer.vocabularies is None:
+            self.transformer.fit_encoding(df)
+        df_encoded = self.transformer.encode(df)
         
         print(f"Features after encoding: {df_encoded.shape[1]}")
         return df_encoded
     
+    def compact_dtypes(self, df):
+        """Downcast flags, small integers, floats and repeated strings"""
+        print("\n=== Dtype Compaction ===")
+        return compact_dtypes(df, label='Processed frame')
+    
     def select_features(self, df, target_col='target_first_week_views'):
         """Select features for model training"""
         print("\n=== Feature Selection ===")
@@ -319,18 +611,75 @@ class DataPreprocessor:
         # Clean data
         df = self.clean_data(df)
         
-        # Engineer features
-        df = self.engineer_features(df)
+        # Engineer features (only new or changed rows when a feature store is used)
+        if self.feature_store is not None:
+            df = self.feature_store.engineer(df, self.engineer_features_parallel)
+        else:
+            df = self.engineer_features_parallel(df)
         
         # Encode categorical
         df = self.encode_categorical_features(df)
         
+        # Compact dtypes
+        df = self.compact_dtypes(df)
+        
         # Save processed data
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        df.to_csv(output_path, index=False, encoding='utf-8')
+        output_path = write_table(df, output_path, PROCESSED_SCHEMA)
         print(f"\nProcessed data saved to: {output_path}")
+        print(f"Feature transformer saved to: {self.transformer.save()}")
         
         return df
+    
+    def iter_processed_chunks(self, input_path, stats, chunksize=PREPROCESS_CHUNK_SIZE):
+        """Cleaned, engineered, encoded and compacted chunks of a stored raw table"""
+        seen = SeenKeys()
+        for number, chunk in enumerate(iter_table_chunks(input_path, chunksize, schema=RAW_SCHEMA), 1):
+            chunk = self.filter_rows(chunk, seen=seen, verbose=False)
+            chunk = self.apply_cleaning_stats(chunk, stats, verbose=False)
+            if chunk.empty:
+                continue
+            
+            # Per-step progress would repeat for every chunk; only warnings are passed on
+            with redirect_stdout(io.StringIO()) as log:
+                chunk = self.engineer_features_parallel(chunk)
+                chunk = self.encode_categorical_features(chunk)
+            for line in log.getvalue().splitlines():
+                if line.startswith('Warning'):
+                    print(line)
+            
+            # Range-independent dtypes, so every chunk matches the first one's schema
+            chunk = compact_dtypes(chunk, schema=NUMERIC_COMPACT_SCHEMA, verbose=False, downcast=False)
+            print(f"Chunk {number}: {len(chunk)} rows")
+            yield chunk
+    
+    def preprocess_chunked(self, input_path, output_path='processed_data/youtube_videos_processed.csv',
+                           chunksize=PREPROCESS_CHUNK_SIZE):
+        """preprocess() for tables larger than memory; returns (file written, rows)
+        
+        Global cleaning statistics come from streaming passes with quantile
+        sketches; cleaning and feature engineering then run chunk by chunk
+        and the output is written as it is produced. Memory is bounded by a
+        chunk plus 8 bytes per distinct video_id. The feature store and
+        near-duplicate removal need the whole table and are not used here.
+        """
+        print("=" * 60)
+        print(f"DATA PREPROCESSING PIPELINE (chunks of {chunksize} rows)")
+        print("=" * 60)
+        if self.near_duplicates is not None or self.feature_store is not None:
+            print("Note: near-duplicate removal and the feature store are skipped in chunked mode")
+        
+        print("\n=== Cleaning Statistics (streaming) ===")
+        stats = self.fit_cleaning_stats(input_path, chunksize)
+        print(f"Statistics: {stats}")
+        # No chunk holds every category, so the vocabularies are the fixed ones
+        self.transformer = FeatureTransformer().fit_cleaning(stats).fit_encoding()
+        
+        print("\n=== Cleaning and Feature Engineering (chunked) ===")
+        output_path, rows = write_table_chunks(self.iter_processed_chunks(input_path, stats, chunksize),
+                                               output_path, PROCESSED_SCHEMA)
+        print(f"\nProcessed data saved to: {output_path} ({rows} rows)")
+        print(f"Feature transformer saved to: {self.transformer.save()}")
+        return output_path, rows
 
 
 def main():
@@ -339,7 +688,7 @@ def main():
     
     input_path = 'raw_data/youtube_videos_raw.csv'
     
-    if not os.path.exists(input_path):
+    if not table_exists(input_path):
         print(f"Error: Input file not found: {input_path}")
         print("Please run data_collection.py first to collect data.")
         return
@@ -0,0 +1,107 @@
+"""
+Dtype Compaction
+Downcasts feature frames to int8/int16/float32/category using a declared
+schema, so the processed table and training matrix use a fraction of the memory
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_float_dtype
+
+# 0/1 flags produced by feature engineering
+FLAG_COLUMNS = [
+    'title_has_number', 'title_has_emoji', 'title_has_question', 'title_has_exclamation',
+    'title_is_tutorial', 'title_is_question', 'is_weekend', 'is_prime_time',
+    'is_short_video', 'is_medium_video', 'is_long_video', 'description_has_url',
+    'weekend_x_prime_time', 'is_month_end', 'is_month_start', 'title_has_digit',
+    'title_starts_with_capital', 'title_has_colon', 'title_has_dash',
+]
+
+# Small bounded integers
+SMALL_INT_COLUMNS = {
+    'publish_hour': 'int8',
+    'publish_day_of_week': 'int8',
+    'publish_month': 'int8',
+    'publish_day_of_month': 'int8',
+    'publish_week_of_year': 'int8',
+    'publish_quarter': 'int8',
+    'publish_hour_squared': 'int16',
+    'tag_count': 'int16',
+    'title_length': 'int16',
+    'title_word_count': 'int16',
+    'title_special_char_count': 'int16',
+    'title_number_count': 'int16',
+    'title_positive_words': 'int8',
+    'title_negative_words': 'int8',
+    'title_power_words': 'int8',
+}
+
+# Low-cardinality strings repeated on every row
+CATEGORY_COLUMNS = [
+    'channel_id', 'channel_name', 'category_id', 'default_language', 'default_audio_language',
+    'publish_day', 'time_of_day', 'duration_category', 'channel_size',
+]
+
+COMPACT_SCHEMA = {
+    **{column: 'int8' for column in FLAG_COLUMNS},
+    **SMALL_INT_COLUMNS,
+    **{column: 'category' for column in CATEGORY_COLUMNS},
+}
+
+# Declared numeric kinds only: the same dtypes for every chunk of a chunked write
+NUMERIC_COMPACT_SCHEMA = {column: kind for column, kind in COMPACT_SCHEMA.items() if kind != 'category'}
+
+# Kept at full precision: the target and raw identifiers
+DEFAULT_KEEP = ('target_first_week_views', 'video_id')
+
+
+def fits(series, dtype):
+    """Whether every value of an integer column fits in dtype"""
+    info = np.iinfo(dtype)
+    return len(series) == 0 or (series.min() >= info.min and series.max() <= info.max)
+
+
+def compact_column(series, kind=None, downcast=True):
+    """Compact one column; declared kinds win when the values fit
+    
+    downcast=False leaves undeclared integers alone, so the result does not
+    depend on the range of the values at hand (e.g. one chunk of a table).
+    """
+    if kind == 'category':
+        return series.astype('category')
+    if is_bool_dtype(series):
+        return series.astype('int8')
+    if is_integer_dtype(series):
+        if kind and fits(series, kind):
+            return series.astype(kind)
+        return pd.to_numeric(series, downcast='integer') if downcast else series
+    if is_float_dtype(series):
+        if kind and series.notna().all() and (series % 1 == 0).all() and fits(series, kind):
+            return series.astype(kind)
+        return series.astype('float32')
+    return series
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def compact_dtypes(df, schema=COMPACT_SCHEMA, keep=DEFAULT_KEEP, label='DataFrame', verbose=True,
+                   downcast=True):
+    """Return df with declared and numeric columns downcast, reporting memory saved
+    
+    Undeclared integers take the smallest type that holds their range,
+    undeclared floats become float32 and bools become int8. Columns in
+    ``keep`` and undeclared strings are left as they are.
+    """
+    before = memory_mb(df)
+    compacted = {
+        column: df[column] if column in keep else compact_column(df[column], schema.get(column), downcast)
+        for column in df.columns
+    }
+    df = pd.DataFrame(compacted, index=df.index)
+    after = memory_mb(df)
+    if verbose:
+        ratio = before / after if after else float('inf')
+        print(f"{label} memory: {before:.1f} MB -> {after:.1f} MB ({ratio:.1f}x smaller, "
+              f"{before - after:.1f} MB saved)")
+    return df
@@ -0,0 +1,133 @@
+"""
+Feature Frame
+Collects the columns of a table while features are engineered: input columns
+are referenced without copying, new columns are appended, inf/NaN cleanup
+runs once per column and the DataFrame is assembled without copying
+"""
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, is_bool_dtype
+
+
+def clean_numeric(series):
+    """series with inf and NaN replaced by 0 (series itself when there are none)"""
+    if not is_numeric_dtype(series) or is_bool_dtype(series):
+        return series
+    if not isinstance(series.dtype, np.dtype):
+        # Nullable extension dtypes (e.g. UInt32 from isocalendar)
+        return series.replace([np.inf, -np.inf], np.nan).fillna(0)
+    if series.dtype.kind != 'f':
+        return series
+    values = series.to_numpy()
+    bad = ~np.isfinite(values)
+    if not bad.any():
+        return series
+    return pd.Series(np.where(bad, 0, values).astype(values.dtype, copy=False), index=series.index)
+
+
+def clean_value(value):
+    """clean_numeric for one value: a float inf or NaN becomes 0"""
+    if isinstance(value, (float, np.floating)) and not np.isfinite(value):
+        return 0.0
+    return value
+
+
+class FeatureFrame:
+    """Columns sharing one index, turned into a DataFrame once at the end
+    
+    Supports the part of the DataFrame interface the feature code uses:
+    ``frame[name]``, ``frame[name] = values``, ``frame.get(name, default)``,
+    ``name in frame.columns`` and ``dropna(subset=...)``. Assigning to an
+    existing name replaces that column in place, like a DataFrame.
+    """
+    
+    def __init__(self, df, index=None):
+        if not df.columns.is_unique:
+            raise ValueError('FeatureFrame needs unique column names')
+        self.index = df.index if index is None else index
+        # Re-index by wrapping the column arrays, which does not copy them
+        self.data = {name: pd.Series(series.array, index=self.index, copy=False) for name, series in df.items()}
+        self.cleaned = set()
+        self.peaks = {}
+        self.baseline = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+    
+    @property
+    def columns(self):
+        return pd.Index(list(self.data))
+    
+    @property
+    def shape(self):
+        return (len(self.index), len(self.data))
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def __contains__(self, name):
+        return name in self.data
+    
+    def __getitem__(self, name):
+        return self.data[name]
+    
+    def __setitem__(self, name, values):
+        if not isinstance(values, pd.Series):
+            values = pd.Series(values, index=self.index)
+        elif not values.index.equals(self.index):
+            values = values.reindex(self.index)
+        self.data[name] = values
+        self.cleaned.discard(name)
+    
+    def get(self, name, default=None):
+        return self.data.get(name, default)
+    
+    def update(self, df):
+        """Append (or replace) the columns of a DataFrame with the same index"""
+        for name, series in df.items():
+            self[name] = series
+    
+    def dropna(self, subset):
+        """Drop rows with a missing value in any subset column (in place, returns self)"""
+        missing = np.zeros(len(self.index), dtype=bool)
+        for name in subset:
+            missing |= self.data[name].isna().to_numpy()
+        if missing.any():
+            self.index = self.index[~missing]
+            self.data = {name: series[~missing] for name, series in self.data.items()}
+        return self
+    
+    def copy(self):
+        """Shallow copy: a new set of columns sharing the arrays (and the peak record)"""
+        other = object.__new__(FeatureFrame)
+        other.__dict__.update(self.__dict__)
+        other.data = dict(self.data)
+        other.cleaned = set(self.cleaned)
+        return other
+    
+    def sanitize(self):
+        """Replace inf and NaN with 0 in the numeric columns not cleaned yet"""
+        for name, series in self.data.items():
+            if name not in self.cleaned:
+                self.data[name] = clean_numeric(series)
+        self.cleaned = set(self.data)
+    
+    def to_frame(self):
+        """The columns as a DataFrame, without copying them (unchanged columns share the input's arrays)"""
+        return pd.DataFrame(self.data, index=self.index, copy=False)
+    
+    @contextmanager
+    def stage(self, name):
+        """Record the peak traced memory of a block above the baseline (only while tracemalloc traces)"""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        tracemalloc.reset_peak()
+        yield
+        self.peaks[name] = tracemalloc.get_traced_memory()[1] - self.baseline
+
+
+def print_memory_report(peaks, input_bytes):
+    """One line per stage: peak memory in MB and as a multiple of the input frame"""
+    print("\n=== Feature Engineering Peak Memory ===")
+    for name, peak in peaks.items():
+        print(f"{name:<24} {peak / 2**20:>9.1f} MB  {peak / max(input_bytes, 1):>5.2f}x input")
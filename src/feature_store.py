@@ -0,0 +1,191 @@
+"""
+Feature Store
+Caches engineered feature rows keyed on video_id, a hash of the row's
+inputs and a hash of the feature-engineering code, so preprocessing only
+re-engineers new or changed videos
+"""
+import os
+import sys
+import ast
+import json
+import glob
+import hashlib
+import importlib
+import inspect
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import FEATURE_STORE_DIR
+from src.storage import HAS_PYARROW, read_table, write_table
+
+# Modules that engineer the features; their source and that of every src
+# module they import make up the code version, so editing any of them starts
+# a new store version
+FEATURE_CODE_ROOTS = [
+    'src.data_preprocessing',
+    'src.advanced_feature_engineering',
+]
+
+# Settings and I/O imported by the roots; they do not change feature values
+FEATURE_CODE_IGNORED = {'src.config', 'src.storage', 'src.video_sink'}
+
+ROW_HASH_COLUMN = '_row_hash'
+
+# Parts are merged into one file once there are more than this many
+MAX_PARTS = 16
+
+
+def feature_code_modules(roots=FEATURE_CODE_ROOTS):
+    """The root modules and every src module they import at module level, transitively (sorted)
+    
+    Modules in FEATURE_CODE_IGNORED are left out and not followed.
+    """
+    found = set()
+    pending = list(roots)
+    while pending:
+        name = pending.pop()
+        if name in found or name in FEATURE_CODE_IGNORED:
+            continue
+        found.add(name)
+        tree = ast.parse(inspect.getsource(importlib.import_module(name)))
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom) and node.module and node.module.startswith('src.'):
+                pending.append(node.module)
+            elif isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names if alias.name.startswith('src.'))
+    return sorted(found)
+
+
+def code_version(modules=None):
+    """Short hash of the feature-engineering source code (default: feature_code_modules())"""
+    digest = hashlib.sha256()
+    for name in modules or feature_code_modules():
+        digest.update(inspect.getsource(importlib.import_module(name)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def row_hashes(df):
+    """64-bit hash of every row's input values (independent of the index)"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+class FeatureStore:
+    """Versioned cache of engineered feature rows
+    
+    Each version (feature code + input columns) lives in its own directory
+    of append-only parts; a run only writes the rows it had to engineer.
+    Parts are Parquet, or pickles when pyarrow is missing (CSV would lose
+    dtypes). Category columns are recorded in ``schema.json`` so every part
+    comes back with the same categories.
+    """
+    
+    def __init__(self, directory=FEATURE_STORE_DIR, version=None):
+        self.directory = directory
+        self.version = version or code_version()
+        self.hits = 0
+        self.misses = 0
+    
+    def version_dir(self, columns):
+        """Directory for the current code version and input columns"""
+        columns_hash = hashlib.sha256('\n'.join(columns).encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.directory, f'{self.version}-{columns_hash}')
+    
+    def _parts(self, version_dir):
+        return sorted(glob.glob(os.path.join(version_dir, 'part-*.parquet')) +
+                      glob.glob(os.path.join(version_dir, 'part-*.pkl')))
+    
+    def _write_part(self, rows, path):
+        """Write rows to path (without extension); returns the file written"""
+        if HAS_PYARROW:
+            return write_table(rows, path + '.parquet')
+        rows.to_pickle(path + '.pkl')
+        return path + '.pkl'
+    
+    def _read_part(self, path):
+        if path.endswith('.pkl'):
+            return pd.read_pickle(path)
+        return read_table(path)
+    
+    def load(self, version_dir):
+        """All cached rows of a version (latest row per video_id)"""
+        parts = self._parts(version_dir)
+        if not parts:
+            return None
+        cached = pd.concat([self._read_part(part) for part in parts], ignore_index=True)
+        cached = cached.drop_duplicates(subset=['video_id'], keep='last')
+        
+        schema_path = os.path.join(version_dir, 'schema.json')
+        if os.path.exists(schema_path):
+            with open(schema_path, encoding='utf-8') as f:
+                categories = json.load(f)
+            for column, values in categories.items():
+                if column in cached.columns:
+                    cached[column] = pd.Categorical(cached[column], categories=values)
+        return cached
+    
+    def save(self, version_dir, rows):
+        """Append engineered rows as a new part; merge parts when there are too many"""
+        os.makedirs(version_dir, exist_ok=True)
+        schema_path = os.path.join(version_dir, 'schema.json')
+        if not os.path.exists(schema_path):
+            categories = {column: rows[column].cat.categories.tolist()
+                          for column in rows.columns if isinstance(rows[column].dtype, pd.CategoricalDtype)}
+            with open(schema_path, 'w', encoding='utf-8') as f:
+                json.dump(categories, f, ensure_ascii=False, default=str)
+        
+        parts = self._parts(version_dir)
+        self._write_part(rows, os.path.join(version_dir, f'part-{len(parts) + 1:05d}'))
+        
+        parts = self._parts(version_dir)
+        if len(parts) > MAX_PARTS:
+            merged_path = self._write_part(self.load(version_dir), os.path.join(version_dir, 'merged'))
+            for part in parts:
+                os.remove(part)
+            os.replace(merged_path, os.path.join(version_dir, 'part-00001' + os.path.splitext(merged_path)[1]))
+    
+    def engineer(self, df, engineer_features):
+        """Run engineer_features only on rows that are new or changed
+        
+        Returns the same rows, columns and order engineer_features(df) would.
+        """
+        df = df.reset_index(drop=True)
+        if df.empty:
+            return engineer_features(df)
+        version_dir = self.version_dir(list(df.columns))
+        hashes = row_hashes(df)
+        
+        cached = self.load(version_dir)
+        hit = np.zeros(len(df), dtype=bool)
+        if cached is not None:
+            cached_hashes = pd.Series(cached[ROW_HASH_COLUMN].to_numpy(dtype=np.uint64), index=cached['video_id'])
+            hit = (df['video_id'].map(cached_hashes).to_numpy() == hashes)
+        
+        self.hits = int(hit.sum())
+        self.misses = len(df) - self.hits
+        print(f"Feature store {os.path.basename(version_dir)}: {self.hits} cached rows, "
+              f"{self.misses} to engineer")
+        
+        parts = []
+        if self.hits:
+            reused = cached.set_index('video_id').loc[df.loc[hit, 'video_id']].reset_index()[cached.columns]
+            parts.append(reused.drop(columns=[ROW_HASH_COLUMN]))
+        
+        if self.misses:
+            changed = df[~hit]
+            fresh = engineer_features(changed)
+            row_hash = pd.Series(hashes[~hit], index=changed['video_id'].to_numpy())
+            to_save = fresh.assign(**{ROW_HASH_COLUMN: fresh['video_id'].map(row_hash).to_numpy(dtype=np.uint64)})
+            self.save(version_dir, to_save)
+            parts.append(fresh)
+        
+        if len(parts) == 1:
+            result = parts[0]
+        else:
+            result = pd.concat([parts[0], parts[1][parts[0].columns]], ignore_index=True)
+        
+        # Restore the input order
+        order = pd.Series(np.arange(len(df)), index=df['video_id'])
+        result = result.iloc[np.argsort(result['video_id'].map(order).to_numpy(), kind='stable')]
+        return result.reset_index(drop=True)
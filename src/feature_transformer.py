@@ -0,0 +1,206 @@
+"""
+Feature Transformer
+Fitted preprocessing state (fill values, caps, bin edges, one-hot
+vocabularies) with sklearn-style fit/transform. Preprocessing fits it and
+saves it with the model; the app transforms request rows with it, so
+training and serving run the same feature code
+"""
+import os
+import sys
+import bisect
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import MODEL_DIR, FEATURE_TRANSFORMER_NAME
+
+# pd.cut bins of the categorical features: column -> (bin edges, labels)
+CATEGORY_BINS = {
+    'time_of_day': ([-1, 6, 12, 18, 24], ['night', 'morning', 'afternoon', 'evening']),
+    'duration_category': ([0, 5, 10, 15, 30, 60, 480],
+                          ['very_short', 'short', 'medium', 'long', 'very_long', 'extended']),
+    'channel_size': ([0, 10000, 100000, 1000000, float('inf')], ['small', 'medium', 'large', 'mega']),
+}
+
+# One-hot encoded columns, in encoding order
+CATEGORICAL_COLUMNS = ['publish_day', 'time_of_day', 'duration_category', 'channel_size']
+
+# publish_day values in the order get_dummies gives them; fixed so every chunk encodes alike
+PUBLISH_DAYS = sorted(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+
+# Raw columns the feature code reads, with the value used when a row lacks
+# them (e.g. view counts of a video not yet published); channel columns
+# missing from a row get the fitted median instead
+TEXT_INPUTS = ('title', 'description', 'tags')
+NUMERIC_INPUTS = ('tag_count', 'publish_hour', 'duration_seconds', 'duration_minutes',
+                  'view_count', 'like_count', 'comment_count')
+
+
+def bin_edges():
+    """CATEGORY_BINS as stored in a fitted transformer"""
+    return {column: (list(edges), list(labels)) for column, (edges, labels) in CATEGORY_BINS.items()}
+
+
+def cut_category(values, column):
+    """pd.cut with the CATEGORY_BINS of column"""
+    edges, labels = CATEGORY_BINS[column]
+    return pd.cut(values, bins=edges, labels=labels)
+
+
+def cut_value(value, column, labels=None):
+    """cut_category for one value: its label (from labels when given), None outside the bins or when missing"""
+    edges, default_labels = CATEGORY_BINS[column]
+    labels = default_labels if labels is None else labels
+    if pd.isna(value):
+        return None
+    # Bins are right-inclusive: edges[i] < value <= edges[i + 1] is bin i
+    position = bisect.bisect_left(edges, value) - 1
+    return labels[position] if 0 <= position < len(labels) else None
+
+
+class FeatureTransformer:
+    """Raw video rows -> engineered, one-hot encoded features
+    
+    fill_values, subscriber_cap: clean_data statistics (missing channel
+        info -> median, subscribers capped); the target outlier bounds only
+        select training rows and are not kept
+    bins: the CATEGORY_BINS the features were built with
+    vocabularies: categories of every one-hot column; unseen values encode
+        as all zeros, so any batch, one row included, gets the training columns
+    """
+    
+    def __init__(self):
+        self.fill_values = None
+        self.subscriber_cap = None
+        self.bins = None
+        self.vocabularies = None
+    
+    def fit_cleaning(self, stats):
+        """Keep the statistics of DataPreprocessor.cleaning_stats / fit_cleaning_stats"""
+        self.fill_values = {column: float(value) for column, value in stats['fill'].items()}
+        self.subscriber_cap = float(stats['subscriber_cap']) if 'subscriber_cap' in stats else None
+        return self
+    
+    def fit_encoding(self, df=None):
+        """One-hot vocabularies from an engineered frame
+        
+        df=None: the vocabularies known without data (bin labels and
+        PUBLISH_DAYS), for chunked runs that never hold the whole table
+        """
+        self.bins = bin_edges()
+        self.vocabularies = {}
+        for column in CATEGORICAL_COLUMNS:
+            if df is None:
+                labels = PUBLISH_DAYS if column == 'publish_day' else CATEGORY_BINS[column][1]
+                self.vocabularies[column] = list(labels)
+            elif column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype):
+                self.vocabularies[column] = df[column].cat.categories.tolist()
+            elif column in df.columns:
+                self.vocabularies[column] = sorted(df[column].dropna().unique().tolist())
+        return self
+    
+    def fit(self, df):
+        """Fit on raw rows that passed DataPreprocessor.filter_rows"""
+        self.fit_transform(df)
+        return self
+    
+    def fit_transform(self, df):
+        from src.data_preprocessing import DataPreprocessor
+        preprocessor = DataPreprocessor(verbose=False)
+        stats = preprocessor.cleaning_stats(df)
+        self.fit_cleaning(stats)
+        df = preprocessor.apply_cleaning_stats(df.copy(), stats, verbose=False)
+        df = preprocessor.engineer_features(df)
+        self.fit_encoding(df)
+        return self.encode(df)
+    
+    def cleaning_stats(self):
+        """Statistics in the form DataPreprocessor.apply_cleaning_stats takes"""
+        stats = {'fill': self.fill_values}
+        if self.subscriber_cap is not None:
+            stats['subscriber_cap'] = self.subscriber_cap
+        return stats
+    
+    def check_fitted(self):
+        if self.vocabularies is None:
+            raise ValueError("FeatureTransformer is not fitted")
+        if self.bins != bin_edges():
+            raise ValueError("FeatureTransformer was fitted with different category bins; re-run preprocessing")
+    
+    def transform(self, df):
+        """Engineered and encoded features of raw rows; no row is filtered out
+        
+        Rows whose published_at cannot be parsed are the exception: the time
+        features need it, so engineering drops them as in training.
+        """
+        from src.data_preprocessing import DataPreprocessor
+        self.check_fitted()
+        
+        df = df.copy(deep=False)
+        for column in TEXT_INPUTS:
+            if column not in df.columns:
+                df[column] = ''
+        for column in NUMERIC_INPUTS:
+            if column not in df.columns:
+                df[column] = np.nan
+        for column, value in self.fill_values.items():
+            if column not in df.columns:
+                df[column] = value
+        
+        preprocessor = DataPreprocessor(verbose=False)
+        df = preprocessor.apply_cleaning_stats(df, self.cleaning_stats(), verbose=False)
+        df = preprocessor.engineer_features(df)
+        return self.encode(df)
+    
+    def transform_row(self, row):
+        """transform for one raw row dict, without DataFrames; returns {feature: value}
+        
+        Same columns and values as transform(pd.DataFrame([row])).iloc[0]
+        (tests/test_feature_transformer.py compares them) in a fraction of
+        the time, for serving single requests. Raises ValueError when
+        published_at cannot be parsed.
+        """
+        from src.data_preprocessing import DataPreprocessor
+        self.check_fitted()
+        
+        row = dict(row)
+        for column in TEXT_INPUTS:
+            row.setdefault(column, '')
+        for column in NUMERIC_INPUTS:
+            row.setdefault(column, np.nan)
+        for column, value in self.fill_values.items():
+            row.setdefault(column, value)
+        
+        preprocessor = DataPreprocessor(verbose=False)
+        row = preprocessor.apply_cleaning_stats_row(row, self.cleaning_stats())
+        return self.encode_row(preprocessor.engineer_features_row(row))
+    
+    def encode(self, df):
+        """One-hot encode the categorical columns with the fitted vocabularies (drop_first)"""
+        columns = [column for column in self.vocabularies if column in df.columns]
+        df = df.copy(deep=False)
+        for column in columns:
+            df[column] = pd.Categorical(df[column], categories=self.vocabularies[column])
+        return pd.get_dummies(df, columns=columns, prefix=columns, drop_first=True)
+    
+    def encode_row(self, features):
+        """encode for one feature dict: the one-hot columns replace the categorical ones, at the end"""
+        columns = [column for column in self.vocabularies if column in features]
+        encoded = {name: value for name, value in features.items() if name not in columns}
+        for column in columns:
+            for category in self.vocabularies[column][1:]:
+                encoded[f'{column}_{category}'] = features[column] == category
+        return encoded
+    
+    def save(self, path=None):
+        """Save with the model files (MODEL_DIR); returns the path"""
+        path = path or os.path.join(MODEL_DIR, FEATURE_TRANSFORMER_NAME)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        joblib.dump(self, path)
+        return path
+    
+    @classmethod
+    def load(cls, path=None):
+        return joblib.load(path or os.path.join(MODEL_DIR, FEATURE_TRANSFORMER_NAME))
@@ -4,102 +4,70 @@ Collects more data and filters for quality
 """
 import os
 import sys
-import time
+import numpy as np
 import pandas as pd
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from tqdm import tqdm
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.data_collection import YouTubeDataCollector
-from src.config import YOUTUBE_API_KEY, TARGET_CHANNELS, MAX_VIDEOS_PER_CHANNEL
+from src.config import YOUTUBE_API_KEY
+from src.video_sink import JsonlVideoSink
+from src.storage import read_table, jsonl_to_table
+from src.parsing_utils import parse_timestamps
 
 
 class ImprovedDataCollector(YouTubeDataCollector):
     """Improved data collector with better filtering and quality control"""
     
-    def filter_quality_videos(self, videos):
-        """Filter videos for quality - remove low-quality or outlier videos"""
-        if not videos:
-            return videos
+    def filter_quality_frame(self, df):
+        """Filter a columnar batch of videos for quality
         
-        df = pd.DataFrame(videos)
+        Rules (applied in order): engagement > 0.1% likes per view, published
+        in the last 3 years, duration between 0.5 and 180 minutes. Returns the
+        kept rows and a per-channel frame with how many rows each rule removed.
+        """
+        passed = np.ones(len(df), dtype=bool)
+        removed = {}
         
-        # Filter out videos with suspicious metrics
         # Very high view count but low engagement might be bot traffic
         if 'like_count' in df.columns and 'view_count' in df.columns:
             df['engagement_ratio'] = df['like_count'] / (df['view_count'] + 1)
-            # Remove videos with suspiciously low engagement (< 0.1% like rate)
-            df = df[df['engagement_ratio'] > 0.001]
+            rule = (df['engagement_ratio'] > 0.001).to_numpy()
+            removed['low_engagement'] = passed & ~rule
+            passed &= rule
         
         # Remove videos that are too old (might have different patterns)
         if 'published_at' in df.columns:
-            df['published_at'] = pd.to_datetime(df['published_at'])
-            # Ensure timezone-aware comparison
-            if df['published_at'].dt.tz is not None:
-                # If published_at is timezone-aware, make cutoff_date timezone-aware too
-                from datetime import timezone
-                cutoff_date = datetime.now(timezone.utc) - timedelta(days=1095)  # Last 3 years
-            else:
-                # If published_at is timezone-naive, keep cutoff_date naive
-                cutoff_date = datetime.now() - timedelta(days=1095)  # Last 3 years
-            df = df[df['published_at'] >= cutoff_date]
+            published_at = parse_timestamps(df['published_at'])
+            cutoff_date = pd.Timestamp(datetime.now(timezone.utc) - timedelta(days=1095))  # Last 3 years
+            rule = (published_at >= cutoff_date).to_numpy()
+            removed['too_old'] = passed & ~rule
+            passed &= rule
         
         # Remove videos with extreme durations
         if 'duration_minutes' in df.columns:
-            df = df[(df['duration_minutes'] >= 0.5) & (df['duration_minutes'] <= 180)]
+            rule = ((df['duration_minutes'] >= 0.5) & (df['duration_minutes'] <= 180)).to_numpy()
+            removed['bad_duration'] = passed & ~rule
+            passed &= rule
         
-        return df.to_dict('records')
-    
-    def collect_all_data(self):
-        """Collect data with improved quality control"""
-        print("Starting IMPROVED data collection from YouTube API...")
-        print(f"Target channels: {len(TARGET_CHANNELS)}")
-        print(f"Max videos per channel: {MAX_VIDEOS_PER_CHANNEL}\n")
-        
-        all_videos = []
+        stats = None
+        if 'channel_id' in df.columns:
+            stats = pd.DataFrame(removed, index=df.index).groupby(df['channel_id']).sum()
         
-        for channel_id in tqdm(TARGET_CHANNELS, desc="Channels"):
-            print(f"\nCollecting from channel: {channel_id}")
-            
-            # Get channel info
-            channel_info = self.get_channel_info(channel_id)
-            if not channel_info:
-                print(f"  Skipping channel {channel_id} - could not fetch info")
-                continue
-            
-            print(f"  Channel: {channel_info['channel_name']}")
-            print(f"  Subscribers: {channel_info['channel_subscribers']:,}")
-            
-            # Get videos
-            videos = self.get_channel_videos(channel_id, MAX_VIDEOS_PER_CHANNEL)
-            print(f"  Collected {len(videos)} videos")
-            
-            # Filter for quality
-            videos = self.filter_quality_videos(videos)
-            print(f"  After quality filter: {len(videos)} videos")
-            
-            # Add channel info to each video
-            for video in videos:
-                video.update({
-                    'channel_subscribers': channel_info['channel_subscribers'],
-                    'channel_video_count': channel_info['channel_video_count'],
-                    'channel_view_count': channel_info['channel_view_count']
-                })
-                
-                # Calculate first week views (improved method)
-                video['target_first_week_views'] = self.calculate_first_week_views(video)
-            
-            all_videos.extend(videos)
-            
-            # Rate limiting between channels
-            time.sleep(1)
+        return df[passed], stats
+    
+    def filter_quality_videos(self, videos):
+        """Filter videos for quality - remove low-quality or outlier videos"""
+        if not videos:
+            return videos
         
-        print(f"\n\nTotal videos collected: {len(all_videos)}")
-        return all_videos
-
+        df, _ = self.filter_quality_frame(pd.DataFrame(videos))
+        return df.to_dict('records')
+    
+    def filter_videos_frame(self, df):
+        """Apply the quality filter to each collected batch"""
+        return self.filter_quality_frame(df)
 
 def main():
     """Main execution function"""
@@ -108,22 +76,28 @@ def main():
         print("Please create a .env file with your YouTube API key.")
         return
     
+    stream_path = 'raw_data/youtube_videos_raw.jsonl'
+    output_path = 'raw_data/youtube_videos_raw.csv'
+    
     collector = ImprovedDataCollector(YOUTUBE_API_KEY)
-    videos_data = collector.collect_all_data()
+    with JsonlVideoSink(stream_path) as sink:
+        video_count = collector.collect_all_data(sink=sink)
     
-    if videos_data:
-        df = collector.save_data(videos_data, 'raw_data/youtube_videos_raw.csv')
+    if video_count:
+        output_path, rows = jsonl_to_table(stream_path, output_path)
+        print(f"\nData saved to: {output_path} ({rows} videos)")
         print("\nImproved data collection completed successfully!")
         print(f"\nSample data:")
-        print(df[['title', 'duration_minutes', 'channel_subscribers', 'target_first_week_views']].head(10))
+        sample = read_table(output_path, columns=['title', 'duration_minutes', 'channel_subscribers', 'target_first_week_views'])
+        print(sample.head(10))
+        target = sample['target_first_week_views']
         print(f"\nData quality statistics:")
-        print(f"  Average first week views: {df['target_first_week_views'].mean():,.0f}")
-        print(f"  Median first week views: {df['target_first_week_views'].median():,.0f}")
-        print(f"  Std first week views: {df['target_first_week_views'].std():,.0f}")
+        print(f"  Average first week views: {target.mean():,.0f}")
+        print(f"  Median first week views: {target.median():,.0f}")
+        print(f"  Std first week views: {target.std():,.0f}")
     else:
         print("No data collected. Please check your API key and network connection.")
 
-
 if __name__ == '__main__':
     main()
 
@@ -4,7 +4,6 @@ Better models for production use
 """
 import os
 import sys
-import pandas as pd
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV, KFold
@@ -21,13 +20,18 @@ from pandas.api.types import is_numeric_dtype
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.config import MODEL_DIR, BEST_MODEL_NAME, SCALER_NAME, FEATURE_NAMES_NAME, MODEL_METADATA_NAME
+from src.config import (
+    MODEL_DIR, BEST_MODEL_NAME, SCALER_NAME, FEATURE_NAMES_NAME, MODEL_METADATA_NAME, USE_TEXT_FEATURES
+)
+from src.storage import PROCESSED_SCHEMA, TEXT_COLUMNS, read_table, table_exists
+from src.dtype_compaction import compact_dtypes
+from src.text_hashing import TextHasher, append_text_features
 
 
 class ImprovedModelTrainer:
     """Improved model trainer with hyperparameter optimization"""
     
-    def __init__(self):
+    def __init__(self, text_features=USE_TEXT_FEATURES):
         self.models = {}
         self.scaler = RobustScaler()  # More robust to outliers
         self.best_model = None
@@ -35,10 +39,15 @@ class ImprovedModelTrainer:
         self.feature_names = None
         self.cv_scores = {}
         self.prediction_intervals = None
-        
-    def load_data(self, filepath):
-        """Load processed data"""
-        df = pd.read_csv(filepath)
+        # Hashed title/tag/description tokens appended to the scaled features (optional)
+        self.text_hasher = TextHasher() if text_features else None
+        self.text_matrix = None
+        self.text_hash_features = None
+    
+    def load_data(self, filepath, columns=None):
+        """Load processed data, skipping the free-text columns unless text features are used"""
+        exclude = None if self.text_hasher is not None else TEXT_COLUMNS
+        df = read_table(filepath, columns=columns, schema=PROCESSED_SCHEMA, exclude=exclude)
         print(f"Loaded data: {df.shape}")
         return df
     
@@ -73,8 +82,17 @@ class ImprovedModelTrainer:
         # Remove features with zero variance
         X = X.loc[:, (X != X.iloc[0]).any()]
         
+        # int8/int16 flags and counts, float32 measurements
+        X = compact_dtypes(X, label='Training matrix')
+        
         self.feature_names = list(X.columns)
         
+        # Rows line up with X; train_test_split_data splits and appends them
+        if self.text_hasher is not None:
+            self.text_matrix = self.text_hasher.transform(df)
+            print(f"Hashed text features: {self.text_matrix.shape[1]} columns, "
+                  f"{self.text_matrix.nnz:,} nonzeros")
+        
         return X, y
     
     def remove_outliers(self, X, y, method='iqr'):
@@ -96,9 +114,15 @@ class ImprovedModelTrainer:
     
     def train_test_split_data(self, X, y, test_size=0.2, random_state=42):
         """Split data with stratification if possible"""
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=random_state
-        )
+        if self.text_matrix is None:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=test_size, random_state=random_state
+            )
+        else:
+            X_train, X_test, y_train, y_test, text_train, text_test = train_test_split(
+                X, y, self.text_matrix, test_size=test_size, random_state=random_state
+            )
+        split_index = y_train.index
         
         # Remove outliers from training set only
         X_train, y_train = self.remove_outliers(X_train, y_train)
@@ -107,6 +131,14 @@ class ImprovedModelTrainer:
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
+        # Hashed counts go unscaled next to the scaled features, as one CSR
+        # matrix (all models here are trees, which take sparse input)
+        if self.text_matrix is not None:
+            text_train = text_train[split_index.get_indexer(y_train.index)]
+            X_train_scaled = append_text_features(X_train_scaled, text_train)
+            X_test_scaled = append_text_features(X_test_scaled, text_test)
+            self.text_hash_features = self.text_hasher.n_features
+        
         return X_train_scaled, X_test_scaled, y_train, y_test, X_train, X_test
     
     def optimize_xgboost(self, X_train, y_train):
@@ -409,6 +441,8 @@ class ImprovedModelTrainer:
         """Get feature importance"""
         if hasattr(model, 'feature_importances_'):
             importances = model.feature_importances_
+            if self.text_hash_features and len(importances) > len(feature_names):
+                feature_names = list(feature_names) + self.text_hasher.feature_names
             indices = np.argsort(importances)[::-1][:top_n]
             
             print(f"\nTop {top_n} Most Important Features:")
@@ -452,6 +486,8 @@ class ImprovedModelTrainer:
             'feature_count': len(self.feature_names),
             'feature_names': self.feature_names,
             'cv_scores': self.cv_scores,
+            # Width of the hashed text block after the scaled features (None: not used)
+            'text_hash_features': self.text_hash_features,
             'prediction_interval_std': float(self.prediction_intervals['residual_std']) if self.prediction_intervals else None
         }
         metadata_path = os.path.join(MODEL_DIR, MODEL_METADATA_NAME)
@@ -465,7 +501,7 @@ def main():
     
     input_path = 'processed_data/youtube_videos_processed.csv'
     
-    if not os.path.exists(input_path):
+    if not table_exists(input_path):
         print(f"Error: Processed data not found: {input_path}")
         return
     
@@ -4,7 +4,6 @@ Trains and compares multiple ML models for YouTube video success prediction
 """
 import os
 import sys
-import pandas as pd
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split, cross_val_score
@@ -20,6 +19,7 @@ from pandas.api.types import is_numeric_dtype
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config import MODEL_DIR, BEST_MODEL_NAME, SCALER_NAME, FEATURE_NAMES_NAME, MODEL_METADATA_NAME
+from src.storage import PROCESSED_SCHEMA, TEXT_COLUMNS, read_table, table_exists
 
 
 class ModelTrainer:
@@ -32,9 +32,9 @@ class ModelTrainer:
         self.best_model_name = None
         self.feature_names = None
         
-    def load_data(self, filepath):
-        """Load processed data"""
-        df = pd.read_csv(filepath)
+    def load_data(self, filepath, columns=None):
+        """Load processed data, skipping the free-text columns models never use"""
+        df = read_table(filepath, columns=columns, schema=PROCESSED_SCHEMA, exclude=TEXT_COLUMNS)
         print(f"Loaded data: {df.shape}")
         return df
     
@@ -314,7 +314,7 @@ def main():
     
     input_path = 'processed_data/youtube_videos_processed.csv'
     
-    if not os.path.exists(input_path):
+    if not table_exists(input_path):
         print(f"Error: Processed data not found: {input_path}")
         print("Please run data_preprocessing.py first.")
         return
@@ -0,0 +1,350 @@
+"""
+Near-Duplicate Detection
+MinHash signatures over title and description shingles with LSH banding, so
+re-uploads and templated copies are found without comparing every pair
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_NUM_PERM, NEAR_DUPLICATE_TITLE_WEIGHT
+from src.storage import RAW_SCHEMA, read_table
+from src.parsing_utils import parse_timestamps
+
+# Shingles are byte k-grams of the normalized UTF-8 text
+SHINGLE_SIZE = 7
+MAX_DESCRIPTION_CHARS = 500
+
+# Description lines found in this many videos of one channel are boilerplate (links, footers)
+BOILERPLATE_MIN_VIDEOS = 3
+
+# Documents hashed together and candidate pairs verified together
+BATCH_SIZE = 20000
+VERIFY_CHUNK = 200000
+
+# Minimum probability that a pair at exactly the threshold becomes a candidate
+MIN_CANDIDATE_RECALL = 0.9
+
+EMPTY_SIGNATURE = np.uint32(0xFFFFFFFF)
+SHINGLE_BASE = np.uint64(1099511628211)
+DENSIFY_OFFSET = np.uint32(0x9E3779B1)
+
+# ASCII bytes other than letters and digits act as word separators
+ASCII_SEPARATORS = np.array([byte < 128 and not chr(byte).isalnum() for byte in range(256)])
+BAND_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+REPORT_COLUMNS = ['video_id', 'channel_id', 'channel_name', 'title', 'description', 'published_at', 'view_count']
+
+
+def normalize_texts(texts):
+    """Concatenated UTF-8 bytes of the texts and each text's length
+    
+    Lowercased (Turkish dotted/dotless i aware) with runs of ASCII
+    punctuation and whitespace collapsed to a single space.
+    """
+    encoded = [text.replace('I', 'ı').replace('İ', 'i').lower().encode('utf-8') for text in texts]
+    lengths = np.fromiter((len(text) for text in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    data = np.where(ASCII_SEPARATORS[data], np.uint8(32), data)
+    
+    starts = np.cumsum(lengths) - lengths
+    after_space = np.ones(len(data), dtype=bool)
+    after_space[1:] = data[:-1] == 32
+    after_space[starts[lengths > 0]] = True
+    keep = ~((data == 32) & after_space)
+    kept = np.concatenate([[0], np.cumsum(keep)])
+    return data[keep], kept[starts + lengths] - kept[starts]
+
+
+def strip_boilerplate(descriptions, channels):
+    """Descriptions without the lines that BOILERPLATE_MIN_VIDEOS or more videos of the same channel share
+    
+    Lines are matched case-insensitively after trimming; the result keeps
+    the index of ``descriptions``.
+    """
+    descriptions = descriptions.fillna('').astype(str)
+    lines = pd.Series(descriptions.to_numpy(), dtype=object).str.split('\n').explode()
+    rows = lines.index.to_numpy()
+    keys = pd.DataFrame({
+        'channel': channels.fillna('').astype(str).to_numpy()[rows],
+        'line': lines.fillna('').str.strip().str.lower().to_numpy(),
+        'row': rows,
+    })
+    nonempty = (keys['line'] != '').to_numpy()
+    videos = keys[nonempty].groupby(['channel', 'line'])['row'].transform('nunique')
+    shared = np.zeros(len(keys), dtype=bool)
+    shared[np.flatnonzero(nonempty)] = (videos >= BOILERPLATE_MIN_VIDEOS).to_numpy()
+    if not shared.any():
+        return descriptions
+    
+    kept = lines[nonempty & ~shared].groupby(level=0).agg('\n'.join)
+    return pd.Series(kept.reindex(range(len(descriptions)), fill_value='').to_numpy(), index=descriptions.index)
+
+
+def document_texts(df):
+    """Texts compared for each video: (titles, description starts with channel boilerplate removed)"""
+    titles = df['title'].fillna('').astype(str)
+    if 'description' not in df.columns:
+        return titles, pd.Series('', index=df.index)
+    descriptions = df['description']
+    if 'channel_id' in df.columns:
+        descriptions = strip_boilerplate(descriptions, df['channel_id'])
+    return titles, descriptions.fillna('').astype(str).str[:MAX_DESCRIPTION_CHARS]
+
+
+def title_numbers(titles):
+    """Code per title for the numbers it contains; titles with equal codes have the same numbers in the same order"""
+    numbers = titles.fillna('').astype(str).str.findall(r'\d+').str.join(' ')
+    return pd.factorize(numbers)[0]
+
+
+def mix64(values):
+    """splitmix64 finalizer: spreads 64-bit hashes over all bits"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def densify(signatures):
+    """Fill empty bins from the next non-empty bin to the right (circularly)
+    
+    The borrowed value is offset by the distance, so two signatures only
+    agree on a filled bin when they agree on the bin it came from.
+    """
+    empty = signatures == EMPTY_SIGNATURE
+    if not empty.any():
+        return signatures
+    rows, width = signatures.shape
+    doubled = np.concatenate([signatures, signatures], axis=1)
+    columns = np.where(np.concatenate([~empty, ~empty], axis=1), np.arange(2 * width), 2 * width)
+    following = np.minimum.accumulate(columns[:, ::-1], axis=1)[:, ::-1][:, :width]
+    
+    found = following < 2 * width
+    distance = (following - np.arange(width)).astype(np.uint32)
+    source = doubled[np.arange(rows)[:, None], np.minimum(following, 2 * width - 1)]
+    filled = np.minimum(source + distance * DENSIFY_OFFSET, EMPTY_SIGNATURE - 1)
+    return np.where(empty & found, filled, signatures)
+
+
+def lsh_params(threshold, num_perm):
+    """(bands, rows) splitting the signature for a similarity threshold
+    
+    Takes the most rows per band (fewest candidates) that still makes a
+    pair at the threshold a candidate with MIN_CANDIDATE_RECALL.
+    """
+    for rows in sorted((r for r in range(1, num_perm + 1) if num_perm % r == 0), reverse=True):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= MIN_CANDIDATE_RECALL:
+            return bands, rows
+    return num_perm, 1
+
+
+class NearDuplicateDetector:
+    """Groups videos whose titles and descriptions overlap
+    
+    Each video gets a MinHash signature of its title and one of its
+    description (channel boilerplate removed); a pair's similarity is
+    ``title_weight`` times the title estimate plus the rest times the
+    description estimate, so a shared footer alone cannot make two videos
+    duplicates. LSH banding over the title signatures turns equal bands into
+    candidate pairs, which are kept when their similarity reaches
+    ``threshold`` and their titles carry the same numbers (episode 3 is not
+    a copy of episode 4). Groups are stars: every member is similar to the
+    group's kept (earliest published) video, never only through another
+    member. Work and memory grow with the number of videos (``2 * num_perm``
+    uint32 per video), not with their square.
+    """
+    
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=NEAR_DUPLICATE_NUM_PERM,
+                 title_weight=NEAR_DUPLICATE_TITLE_WEIGHT, seed=42):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.title_weight = title_weight
+        # Lowest title similarity that can still reach the threshold with identical descriptions
+        title_threshold = max(threshold - (1 - title_weight), 0) / title_weight if title_weight else 0
+        self.bands, self.rows = lsh_params(min(title_threshold, 1.0), num_perm)
+        self.seed = mix64(np.array([seed], dtype=np.uint64))[0]
+    
+    def shingle_hashes(self, texts):
+        """64-bit hash of every shingle and the number of shingles per text"""
+        data, lengths = normalize_texts(texts)
+        counts = np.maximum(lengths - SHINGLE_SIZE + 1, 0)
+        if len(data) < SHINGLE_SIZE:
+            return np.array([], dtype=np.uint64), counts
+        
+        # Rolling hash at every byte offset, then the offsets that start a shingle
+        rolling = np.zeros(len(data) - SHINGLE_SIZE + 1, dtype=np.uint64)
+        for offset in range(SHINGLE_SIZE):
+            rolling = rolling * SHINGLE_BASE + data[offset:offset + len(rolling)]
+        starts = np.cumsum(lengths) - lengths
+        first = np.cumsum(counts) - counts
+        positions = np.repeat(starts - first, counts) + np.arange(counts.sum())
+        return rolling[positions], counts
+    
+    def signatures(self, texts):
+        """MinHash signatures, shape (len(texts), num_perm); texts shorter than a shingle get EMPTY_SIGNATURE
+        
+        One-permutation hashing: each shingle is hashed once and lands in one
+        of ``num_perm`` bins, keeping the minimum per bin. Empty bins borrow
+        from the next non-empty bin (rotation densification), so signatures
+        of short titles stay comparable.
+        """
+        texts = list(texts)
+        signatures = np.full((len(texts), self.num_perm), EMPTY_SIGNATURE, dtype=np.uint32)
+        for start in range(0, len(texts), BATCH_SIZE):
+            hashes, counts = self.shingle_hashes(texts[start:start + BATCH_SIZE])
+            if not len(hashes):
+                continue
+            mixed = mix64(hashes ^ self.seed)
+            bins = (mixed >> np.uint64(32)) % np.uint64(self.num_perm)
+            values = np.minimum(mixed & np.uint64(0xFFFFFFFF), np.uint64(EMPTY_SIGNATURE - 1)).astype(np.uint32)
+            
+            batch = np.full(len(counts) * self.num_perm, EMPTY_SIGNATURE, dtype=np.uint32)
+            slots = np.repeat(np.arange(len(counts), dtype=np.uint64) * np.uint64(self.num_perm), counts) + bins
+            np.minimum.at(batch, slots.astype(np.int64), values)
+            signatures[start:start + len(counts)] = densify(batch.reshape(len(counts), self.num_perm))
+        return signatures
+    
+    def document_signatures(self, titles, descriptions):
+        """Title and description signatures side by side, shape (len(titles), 2 * num_perm)"""
+        return np.hstack([self.signatures(titles), self.signatures(descriptions)])
+    
+    def candidate_pairs(self, signatures):
+        """(left, right) index arrays of videos whose title signatures share at least one band"""
+        signatures = signatures[:, :self.num_perm]
+        valid = np.flatnonzero(signatures[:, 0] != EMPTY_SIGNATURE)
+        pairs = []
+        for band in range(self.bands):
+            band_values = signatures[valid, band * self.rows:(band + 1) * self.rows].astype(np.uint64)
+            keys = np.zeros(len(valid), dtype=np.uint64)
+            for column in range(self.rows):
+                keys = keys * BAND_BASE + band_values[:, column]
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            run_start = np.ones(len(order), dtype=bool)
+            run_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            # Every bucket member pairs with the bucket's first member: linear in the bucket size
+            first = order[run_start][np.cumsum(run_start) - 1]
+            members = ~run_start
+            pairs.append(valid[first[members]] * len(signatures) + valid[order[members]])
+        if not pairs:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        pairs = np.unique(np.concatenate(pairs))
+        return pairs // len(signatures), pairs % len(signatures)
+    
+    def similarity(self, signatures, left, right):
+        """Weighted title and description similarity of each (left, right) pair"""
+        result = np.empty(len(left), dtype=np.float32)
+        for start in range(0, len(left), VERIFY_CHUNK):
+            chunk = slice(start, start + VERIFY_CHUNK)
+            equal = signatures[left[chunk]] == signatures[right[chunk]]
+            title = equal[:, :self.num_perm].mean(axis=1)
+            description = equal[:, self.num_perm:].mean(axis=1)
+            result[chunk] = self.title_weight * title + (1 - self.title_weight) * description
+        return result
+    
+    def publish_order(self, df):
+        """Row positions, earliest published first (NaT last, first row on ties)"""
+        published_at = parse_timestamps(df['published_at']) \
+            if 'published_at' in df.columns else pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns, UTC]')
+        return np.lexsort((np.arange(len(df)), published_at.dt.tz_convert(None).to_numpy()))
+    
+    def groups(self, df):
+        """Group of every row, as the position of the group's kept row, and the signatures
+        
+        Rows are visited in publish order; a row not yet in a group keeps
+        itself and takes every similar row that is not in a group either.
+        """
+        titles, descriptions = document_texts(df)
+        signatures = self.document_signatures(titles, descriptions)
+        left, right = self.candidate_pairs(signatures)
+        numbers = title_numbers(titles)
+        similar = (self.similarity(signatures, left, right) >= self.threshold) & (numbers[left] == numbers[right])
+        print(f"Near-duplicate search: {len(left):,} candidate pairs, {int(similar.sum()):,} above "
+              f"{self.threshold:.2f} ({self.bands} bands x {self.rows} rows)")
+        
+        n = len(signatures)
+        labels = np.arange(n)
+        left, right = left[similar], right[similar]
+        if not len(left):
+            return labels, signatures
+        graph = csr_matrix((np.ones(2 * len(left), dtype=np.int8),
+                            (np.concatenate([left, right]), np.concatenate([right, left]))), shape=(n, n))
+        grouped = np.zeros(n, dtype=bool)
+        order = self.publish_order(df)
+        for row in order[np.diff(graph.indptr)[order] > 0]:
+            if grouped[row]:
+                continue
+            grouped[row] = True
+            neighbours = graph.indices[graph.indptr[row]:graph.indptr[row + 1]]
+            free = neighbours[~grouped[neighbours]]
+            labels[free] = row
+            grouped[free] = True
+        return labels, signatures
+    
+    def drop(self, df):
+        """df without near-duplicates (cleaning stage); returns (df, rows removed)"""
+        if df.empty:
+            return df, 0
+        labels, _ = self.groups(df)
+        keep = labels == np.arange(len(df))
+        return df[keep], int((~keep).sum())
+    
+    def report(self, df):
+        """One row per video in a near-duplicate group, with its similarity to the kept video"""
+        labels, signatures = self.groups(df)
+        keep = labels == np.arange(len(df))
+        sizes = np.bincount(labels, minlength=len(df))
+        rows = np.flatnonzero(sizes[labels] > 1)
+        report = df.iloc[rows][[column for column in REPORT_COLUMNS if column in df.columns]].copy()
+        report.insert(0, 'group', labels[rows])
+        report.insert(1, 'group_size', sizes[labels[rows]])
+        report['kept'] = keep[rows]
+        report['similarity_to_kept'] = self.similarity(signatures, rows, labels[rows])
+        report = report.sort_values(['group_size', 'group', 'kept'], ascending=[False, True, False], kind='stable')
+        return report.reset_index(drop=True)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Report near-duplicate videos')
+    parser.add_argument('--input', default='raw_data/youtube_videos_improved.csv', help='video table to scan')
+    parser.add_argument('--output', default='reports/near_duplicates.csv', help='report CSV')
+    parser.add_argument('--threshold', type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                        help='minimum estimated Jaccard similarity')
+    parser.add_argument('--num-perm', type=int, default=NEAR_DUPLICATE_NUM_PERM, help='MinHash signature length')
+    parser.add_argument('--title-weight', type=float, default=NEAR_DUPLICATE_TITLE_WEIGHT,
+                        help='share of the similarity taken from the title')
+    args = parser.parse_args()
+    
+    columns = [column for column in REPORT_COLUMNS if column in RAW_SCHEMA]
+    df = read_table(args.input, columns=columns, schema=RAW_SCHEMA)
+    print(f"Loaded {len(df):,} videos from {args.input}")
+    
+    detector = NearDuplicateDetector(args.threshold, args.num_perm, args.title_weight)
+    report = detector.report(df)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    report.to_csv(args.output, index=False, encoding='utf-8')
+    
+    groups = report['group'].nunique()
+    removable = int((~report['kept']).sum())
+    print(f"\n{groups:,} near-duplicate groups, {removable:,} videos would be removed "
+          f"({removable / max(len(df), 1) * 100:.1f}%)")
+    print(f"Report saved to: {args.output}")
+    
+    for group, rows in list(report.groupby('group', sort=False))[:10]:
+        print(f"\nGroup {group} ({len(rows)} videos):")
+        for row in rows.head(5).itertuples(index=False):
+            marker = '*' if row.kept else ' '
+            print(f"  {marker} {row.video_id}  {row.similarity_to_kept:.2f}  {str(row.title)[:70]}")
+
+
+if __name__ == '__main__':
+    main()
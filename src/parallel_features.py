@@ -0,0 +1,115 @@
+"""
+Parallel Feature Engineering
+Runs DataPreprocessor.engineer_features on contiguous row ranges in a
+process pool. Workers read their rows from the parent's memory (inherited
+by fork) and send back only the typed columns, as Arrow IPC buffers rather
+than pickled DataFrames (pickled when pyarrow is not installed); the chunks
+are stitched back in order, so the result is identical to the serial run
+"""
+import os
+import sys
+import io
+import multiprocessing
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import PARALLEL_MIN_CHUNK_ROWS
+
+# The frame being engineered, set in the parent before the pool forks; workers
+# read their rows from the inherited copy-on-write memory instead of a pickle
+shared_frame = None
+
+
+def to_ipc(df):
+    """DataFrame -> Arrow IPC stream buffer (index and pandas dtypes kept); without pyarrow, df itself"""
+    if not HAS_PYARROW:
+        return df
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def from_ipc(buffer):
+    if isinstance(buffer, pd.DataFrame):
+        return buffer
+    with pa.ipc.open_stream(buffer) as reader:
+        return reader.read_all().to_pandas()
+
+
+def engineer_rows(start, stop, frame=None):
+    """Worker: engineer_features on rows [start, stop) of frame (default: the shared one)
+    
+    Returns (IPC buffer of the typed columns, column order, progress output).
+    Object columns (text, ids) pass through engineering unchanged, so they
+    are not sent back; the parent takes them from its own frame.
+    """
+    from src.data_preprocessing import DataPreprocessor
+    chunk = (shared_frame if frame is None else frame).iloc[start:stop]
+    with redirect_stdout(io.StringIO()) as log:
+        result = DataPreprocessor().engineer_features(chunk)
+    passthrough = [column for column in result.columns
+                   if result[column].dtype == object and column in chunk.columns]
+    return to_ipc(result.drop(columns=passthrough)), list(result.columns), log.getvalue()
+
+
+def chunk_ranges(rows, workers, min_rows=PARALLEL_MIN_CHUNK_ROWS):
+    """At most `workers` contiguous (start, stop) ranges of at least min_rows rows"""
+    chunks = max(1, min(workers, rows // max(min_rows, 1)))
+    bounds = np.linspace(0, rows, chunks + 1).astype(int)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def engineer_in_parallel(df, workers, min_rows=PARALLEL_MIN_CHUNK_ROWS):
+    """engineer_features(df) split over a process pool; same rows, columns, dtypes and index"""
+    global shared_frame
+    df = df.reset_index(drop=True)
+    ranges = chunk_ranges(len(df), workers, min_rows)
+    print(f"Engineering features in {len(ranges)} chunks on {workers} processes...")
+    
+    # Without fork (spawn platforms) each worker gets its rows pickled instead
+    fork = 'fork' in multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if fork else None)
+    shared_frame = df if fork else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(engineer_rows, start, stop) if fork
+                       else pool.submit(engineer_rows, 0, stop - start, df.iloc[start:stop])
+                       for start, stop in ranges]
+            results = [future.result() for future in futures]
+    finally:
+        shared_frame = None
+    
+    # Progress of the first chunk stands for all of them; warnings are shown from every chunk
+    print(results[0][2], end='')
+    for _, _, log in results[1:]:
+        for line in log.splitlines():
+            if line.startswith('Warning'):
+                print(line)
+    
+    parts = []
+    for (start, _), (buffer, columns, _) in zip(ranges, results):
+        typed = from_ipc(buffer)
+        # Every chunk numbered its rows from 0; shift to the positions in df
+        positions = typed.index.to_numpy() + start
+        index = pd.Index(positions)
+        parts.append(pd.DataFrame({
+            column: (typed[column].set_axis(index) if column in typed.columns
+                     else pd.Series(df[column].to_numpy()[positions], index=index, dtype=object))
+            for column in columns
+        }, index=index))
+    result = pd.concat(parts)
+    if len(result) == len(df):
+        result.index = pd.RangeIndex(len(df))
+    return result
@@ -0,0 +1,144 @@
+"""
+Parsing Utilities
+Shared parsers for YouTube API values (ISO 8601 durations and timestamps)
+"""
+import re
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+_NUMBER = r'(\d+(?:[.,]\d+)?)'
+
+# Full ISO 8601 duration grammar: PnYnMnWnDTnHnMnS (every part optional)
+ISO_DURATION_PATTERN = re.compile(
+    r'^P(?!$)'
+    rf'(?:{_NUMBER}Y)?(?:{_NUMBER}M)?(?:{_NUMBER}W)?(?:{_NUMBER}D)?'
+    rf'(?:T(?=\d)(?:{_NUMBER}H)?(?:{_NUMBER}M)?(?:{_NUMBER}S)?)?$'
+)
+
+# Seconds per group; years and months use nominal 365 / 30 day lengths
+DURATION_UNIT_SECONDS = np.array([365 * 86400, 30 * 86400, 7 * 86400, 86400, 3600, 60, 1], dtype=float)
+
+# Timestamp layouts the API, the collector and the video store write:
+# 'YYYY-MM-DDTHH:MM:SS' (or a space for the 'T'), optionally '.ffffff', then
+# a UTC suffix. Keyed by total length: (has microseconds, suffix)
+TIMESTAMP_LAYOUTS = {
+    19: (False, ''), 20: (False, 'Z'), 25: (False, '+00:00'),
+    26: (True, ''), 27: (True, 'Z'), 32: (True, '+00:00'),
+}
+TIMESTAMP_WIDTH = max(TIMESTAMP_LAYOUTS) + 1
+# Digit positions of the year, month, day, hour, minute and second, and the separators
+TIMESTAMP_FIELDS = [(0, 4), (5, 7), (8, 10), (11, 13), (14, 16), (17, 19)]
+TIMESTAMP_DIGITS = [position for start, stop in TIMESTAMP_FIELDS for position in range(start, stop)]
+TIMESTAMP_SEPARATORS = {4: '-', 7: '-', 13: ':', 16: ':'}
+MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def parse_iso_duration(duration_str):
+    """Parse an ISO 8601 duration string (e.g. 'PT1H2M3S', 'P1DT2H') to seconds
+    
+    Returns 0 for empty or malformed values.
+    """
+    if not isinstance(duration_str, str):
+        return 0
+    match = ISO_DURATION_PATTERN.match(duration_str.strip().upper())
+    if not match:
+        return 0
+    
+    total = 0.0
+    for value, unit_seconds in zip(match.groups(), DURATION_UNIT_SECONDS):
+        if value:
+            total += float(value.replace(',', '.')) * unit_seconds
+    return int(round(total))
+
+
+def parse_iso_durations(durations):
+    """Vectorized parse_iso_duration for a whole column; returns int64 seconds
+
+    Durations repeat heavily across a corpus, so the column is factorized in
+    one hashing pass and only the distinct strings go through the parser.
+    """
+    durations = pd.Series(durations)
+    codes, uniques = pd.factorize(durations, use_na_sentinel=True)
+    parsed = np.fromiter((parse_iso_duration(value) for value in uniques), dtype=np.int64, count=len(uniques))
+    seconds = np.where(codes >= 0, parsed[np.maximum(codes, 0)] if len(parsed) else 0, 0)
+    return pd.Series(seconds.astype(np.int64), index=durations.index, name='duration_seconds')
+
+
+def _parse_timestamp_layout(values):
+    """Fast path of parse_timestamps: (nanoseconds since epoch, mask of rows in the layout)"""
+    # Longer strings are cut to TIMESTAMP_WIDTH, which no layout has
+    text = np.asarray(values, dtype=object).astype(f'U{TIMESTAMP_WIDTH}')
+    length = np.char.str_len(text)
+    codes = text.view(np.uint32).reshape(len(text), TIMESTAMP_WIDTH)
+    
+    ok = np.isin(length, list(TIMESTAMP_LAYOUTS))
+    for position, char in TIMESTAMP_SEPARATORS.items():
+        ok &= codes[:, position] == ord(char)
+    ok &= (codes[:, 10] == ord('T')) | (codes[:, 10] == ord(' '))
+    for size, (has_fraction, suffix) in TIMESTAMP_LAYOUTS.items():
+        start = 26 if has_fraction else 19
+        for offset, char in enumerate(suffix):
+            ok &= (length != size) | (codes[:, start + offset] == ord(char))
+    
+    fraction = np.isin(length, [size for size, (has_fraction, _) in TIMESTAMP_LAYOUTS.items() if has_fraction])
+    fraction_digits = codes[:, 20:26].astype(np.int64) - ord('0')
+    ok &= ~fraction | ((codes[:, 19] == ord('.')) & ((fraction_digits >= 0) & (fraction_digits <= 9)).all(axis=1))
+    microseconds = np.where(fraction, fraction_digits @ 10 ** np.arange(5, -1, -1), 0)
+    
+    digits = codes[:, TIMESTAMP_DIGITS].astype(np.int64) - ord('0')
+    ok &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+    parts, column = [], 0
+    for start, stop in TIMESTAMP_FIELDS:
+        width = stop - start
+        parts.append(digits[:, column:column + width] @ 10 ** np.arange(width - 1, -1, -1))
+        column += width
+    year, month, day, hour, minute, second = parts
+    
+    # Years outside the datetime64[ns] range are left to pandas
+    ok &= (year > 1677) & (year < 2262)
+    ok &= (month >= 1) & (month <= 12) & (hour < 24) & (minute < 60) & (second < 60)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month = np.clip(month, 1, 12)
+    ok &= (day >= 1) & (day <= MONTH_DAYS[month - 1] + ((month == 2) & leap))
+    
+    # Days since 1970-01-01 of the proleptic Gregorian date (March-based years)
+    shifted = year - (month <= 2)
+    era = shifted // 400
+    year_of_era = shifted - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    days = era * 146097 + year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year - 719468
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    return np.where(ok, seconds * 10**9 + microseconds * 1000, 0), ok
+
+
+def parse_timestamps(values):
+    """Parse a column of date-times to datetime64[ns, UTC]; unparseable values -> NaT
+    
+    Typed columns are only converted to UTC (naive ones are taken as UTC).
+    Strings in the layout the API writes are decoded with array arithmetic;
+    only the rows that fail it go through pandas' per-element format
+    inference (format='mixed'), so results match pd.to_datetime(...,
+    format='mixed', utc=True, errors='coerce').
+    """
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return values.dt.tz_convert('UTC')
+    if pd.api.types.is_datetime64_dtype(values.dtype):
+        return values.dt.tz_localize('UTC')
+    
+    nanoseconds, ok = _parse_timestamp_layout(values.to_numpy(dtype=object))
+    parsed = pd.Series(pd.to_datetime(nanoseconds, unit='ns', utc=True), index=values.index)
+    parsed[~ok] = pd.NaT
+    rest = ~ok & values.notna().to_numpy()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(values[rest], format='mixed', utc=True, errors='coerce')
+    return parsed.rename(values.name)
+
+
+def parse_timestamp(value):
+    """parse_timestamps for one value: a UTC Timestamp, or NaT"""
+    if isinstance(value, datetime) and not pd.isna(value):
+        value = pd.Timestamp(value)
+        return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+    return parse_timestamps(pd.Series([value], dtype=object)).iloc[0]
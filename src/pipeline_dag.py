@@ -0,0 +1,326 @@
+"""
+Pipeline DAG Runner
+Runs pipeline stages as a dependency graph: every stage declares the files
+it reads and writes, stages whose inputs and outputs match their last
+content-hash manifest are skipped, and independent stages run in parallel
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import PIPELINE_DIR, PIPELINE_MAX_WORKERS
+from src.storage import resolve_table_path
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Source files each kind of stage depends on besides its own script
+COMMON_CODE = ['src/config.py', 'src/storage.py', 'src/video_sink.py', 'src/parsing_utils.py']
+COLLECTION_CODE = COMMON_CODE + ['src/data_collection.py', 'src/api_retry.py']
+PREPROCESSING_CODE = COMMON_CODE + [
+    'src/data_preprocessing.py', 'src/advanced_feature_engineering.py',
+    'src/dtype_compaction.py', 'src/feature_store.py', 'src/near_duplicates.py',
+    'src/keyword_matcher.py', 'src/feature_frame.py', 'src/quantile_sketch.py',
+    'src/parallel_features.py', 'src/feature_transformer.py',
+]
+TRAINING_CODE = COMMON_CODE + ['src/model_training.py']
+IMPROVED_TRAINING_CODE = COMMON_CODE + [
+    'src/improved_model_training.py', 'src/dtype_compaction.py', 'src/text_hashing.py',
+]
+
+MODEL_FILES = [
+    'models/best_model.pkl', 'models/scaler.pkl',
+    'models/feature_names.pkl', 'models/model_metadata.pkl',
+]
+# Fitted by preprocessing, served with the model files
+FEATURE_TRANSFORMER_FILE = 'models/feature_transformer.pkl'
+
+TABLE_EXTENSIONS = ('.csv', '.parquet')
+HASH_BLOCK_SIZE = 1 << 20
+LOG_TAIL_LINES = 20
+
+
+def python_command(script, *args):
+    """Command running a project script with the current interpreter"""
+    return [sys.executable, script, *args]
+
+
+class Stage:
+    """One pipeline step: a command plus the files it reads and writes
+    
+    Table paths (.csv/.parquet) are logical, like everywhere else in the
+    pipeline: whichever stored file backs them is hashed. ``always_run``
+    marks stages with inputs outside the tree (e.g. the YouTube API).
+    """
+    
+    def __init__(self, name, command, inputs=(), outputs=(), always_run=False):
+        self.name = name
+        self.command = list(command)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.always_run = always_run
+    
+    def __repr__(self):
+        return f'Stage({self.name!r})'
+
+
+class FileHasher:
+    """sha256 of files, cached on (size, mtime) so unchanged files are not re-read"""
+    
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.cache = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                self.cache = json.load(f)
+    
+    def file_digest(self, path):
+        stat = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        self.cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+    
+    def digest(self, path):
+        """Digest of a declared path (file, directory or logical table), or None if missing"""
+        if path.endswith(TABLE_EXTENSIONS):
+            resolved = resolve_table_path(path)
+            if resolved is None:
+                return None
+            return f'{os.path.basename(resolved)}:{self.file_digest(resolved)}'
+        if os.path.isdir(path):
+            digest = hashlib.sha256()
+            for directory, subdirs, files in sorted(os.walk(path)):
+                subdirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(directory, name)
+                    digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                    digest.update(self.file_digest(file_path).encode('ascii'))
+            return digest.hexdigest()
+        if os.path.exists(path):
+            return self.file_digest(path)
+        return None
+    
+    def digests(self, paths):
+        return {path: self.digest(path) for path in paths}
+    
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f)
+
+
+class PipelineRunner:
+    """Runs stages in dependency order, skipping the up-to-date ones
+    
+    Dependencies come from the declared files: a stage depends on the stage
+    that produces one of its inputs. Stages run as subprocesses with stdin
+    closed (nothing can prompt) and their output in ``<directory>/logs``.
+    A failed stage blocks its dependents but not independent stages.
+    """
+    
+    def __init__(self, stages, directory=PIPELINE_DIR, max_workers=PIPELINE_MAX_WORKERS,
+                 force=(), dry_run=False):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError('Stage names must be unique')
+        self.directory = directory
+        self.max_workers = max_workers
+        self.force = (set(self.stages) if force else set()) if isinstance(force, bool) else set(force)
+        self.dry_run = dry_run
+        unknown = self.force - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+        
+        self.producers = {}
+        for stage in stages:
+            for path in stage.outputs:
+                if path in self.producers:
+                    raise ValueError(f'{path} is an output of both {self.producers[path]} and {stage.name}')
+                self.producers[path] = stage.name
+        self.deps = {
+            stage.name: sorted({self.producers[path] for path in stage.inputs
+                                if path in self.producers and self.producers[path] != stage.name})
+            for stage in stages
+        }
+        self.order = self.topological_order()
+        self.hasher = FileHasher(os.path.join(directory, 'hash_cache.json'))
+        self.status = {}
+    
+    def topological_order(self):
+        """Stage names with every stage after its dependencies (declaration order otherwise)"""
+        order = []
+        visiting = set()
+        
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f'Dependency cycle through stage {name}')
+            visiting.add(name)
+            for dep in self.deps[name]:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+        
+        for name in self.stages:
+            visit(name)
+        return order
+    
+    def manifest_path(self, name):
+        return os.path.join(self.directory, 'manifests', f'{name}.json')
+    
+    def log_path(self, name):
+        return os.path.join(self.directory, 'logs', f'{name}.log')
+    
+    def load_manifest(self, name):
+        path = self.manifest_path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def save_manifest(self, stage, inputs, duration):
+        manifest = {
+            'command': stage.command[1:],
+            'inputs': inputs,
+            'outputs': self.hasher.digests(stage.outputs),
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duration_seconds': round(duration, 2),
+        }
+        os.makedirs(os.path.dirname(self.manifest_path(stage.name)), exist_ok=True)
+        with open(self.manifest_path(stage.name), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+    
+    def stale_reason(self, stage, inputs):
+        """Why a stage has to run, or None when its manifest is up to date"""
+        if stage.name in self.force:
+            return 'forced'
+        if stage.always_run:
+            return 'always runs'
+        manifest = self.load_manifest(stage.name)
+        if manifest is None:
+            return 'no manifest'
+        if manifest['command'] != stage.command[1:]:
+            return 'command changed'
+        changed = [path for path, digest in inputs.items() if manifest['inputs'].get(path) != digest]
+        if changed:
+            return 'inputs changed: ' + ', '.join(changed)
+        outputs = self.hasher.digests(stage.outputs)
+        missing = [path for path, digest in outputs.items() if digest is None]
+        if missing:
+            return 'missing outputs: ' + ', '.join(missing)
+        modified = [path for path, digest in outputs.items() if manifest['outputs'].get(path) != digest]
+        if modified:
+            return 'outputs modified: ' + ', '.join(modified)
+        return None
+    
+    def execute(self, stage):
+        """Run a stage's command; returns (exit code, seconds)"""
+        os.makedirs(os.path.dirname(self.log_path(stage.name)), exist_ok=True)
+        env = dict(os.environ, MPLBACKEND='Agg', PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+        start = time.perf_counter()
+        with open(self.log_path(stage.name), 'w', encoding='utf-8') as log:
+            result = subprocess.run(stage.command, cwd=PROJECT_ROOT, env=env, stdin=subprocess.DEVNULL,
+                                    stdout=log, stderr=subprocess.STDOUT)
+        return result.returncode, time.perf_counter() - start
+    
+    def print_log_tail(self, name):
+        with open(self.log_path(name), encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()[-LOG_TAIL_LINES:]
+        for line in lines:
+            print(f"    | {line}")
+    
+    def finish(self, stage, inputs, returncode, duration):
+        """Record the outcome of a stage that ran"""
+        missing = [path for path in stage.outputs if self.hasher.digest(path) is None]
+        if returncode != 0 or missing:
+            reason = f'exit code {returncode}' if returncode != 0 else 'missing outputs: ' + ', '.join(missing)
+            print(f"✗ {stage.name} failed after {duration:.1f}s ({reason}), log: {self.log_path(stage.name)}")
+            self.print_log_tail(stage.name)
+            self.status[stage.name] = 'failed'
+            return
+        self.save_manifest(stage, inputs, duration)
+        print(f"✓ {stage.name} finished in {duration:.1f}s")
+        self.status[stage.name] = 'ran'
+    
+    def ready(self, name):
+        """'ready', 'blocked' or None (dependencies still pending)"""
+        dep_status = [self.status.get(dep) for dep in self.deps[name]]
+        if any(status in ('failed', 'blocked', 'missing') for status in dep_status):
+            return 'blocked'
+        if all(status in ('ran', 'skipped') for status in dep_status):
+            return 'ready'
+        return None
+    
+    def start(self, stage, pool, running):
+        """Skip a ready stage or submit it to the pool"""
+        inputs = self.hasher.digests(stage.inputs)
+        missing = [path for path, digest in inputs.items() if digest is None]
+        if missing:
+            print(f"- {stage.name} not run, missing inputs: {', '.join(missing)}")
+            self.status[stage.name] = 'missing'
+            return
+        
+        reason = self.stale_reason(stage, inputs)
+        if reason is None:
+            print(f"= {stage.name} up to date, skipped")
+            self.status[stage.name] = 'skipped'
+        elif self.dry_run:
+            print(f"~ {stage.name} would run ({reason})")
+            self.status[stage.name] = 'ran'
+        else:
+            print(f"> {stage.name} running ({reason})")
+            running[pool.submit(self.execute, stage)] = (stage, inputs)
+    
+    def run(self):
+        """Run the graph; returns {stage: 'ran' | 'skipped' | 'failed' | 'missing' | 'blocked'}"""
+        pending = list(self.order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name in list(pending):
+                    state = self.ready(name)
+                    if state is None:
+                        continue
+                    pending.remove(name)
+                    if state == 'blocked':
+                        print(f"- {name} blocked by a dependency that did not run")
+                        self.status[name] = 'blocked'
+                    else:
+                        self.start(self.stages[name], pool, running)
+                
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, inputs = running.pop(future)
+                    returncode, duration = future.result()
+                    self.finish(stage, inputs, returncode, duration)
+        
+        self.hasher.save()
+        return self.status
+    
+    def summary(self):
+        """Print one line per stage in run order"""
+        print("\n" + "="*60)
+        print("PIPELINE SUMMARY")
+        print("="*60)
+        for name in self.order:
+            deps = f" (after {', '.join(self.deps[name])})" if self.deps[name] else ''
+            print(f"{name:<20} {self.status.get(name, '-'):<8}{deps}")
+    
+    @property
+    def failed(self):
+        """Whether a stage failed (stages only missing source inputs do not count)"""
+        return 'failed' in self.status.values()
@@ -0,0 +1,106 @@
+"""
+Quantile Sketch
+Mergeable streaming quantile sketch (KLL) for statistics over tables too
+large to load: medians, percentile caps and IQR bounds from chunked passes
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import QUANTILE_SKETCH_K
+
+
+class QuantileSketch:
+    """KLL sketch: approximate quantiles of a stream in O(k) memory
+    
+    Items live in levels; an item at level h stands for 2**h values. A full
+    level is sorted and every other item (random offset) is promoted, so the
+    rank error stays around 1/k of the count. Until the first compaction
+    the sketch holds every value and quantile() matches pandas' (linear
+    interpolation) exactly. NaN values are skipped, like pandas.
+    """
+    
+    def __init__(self, k=QUANTILE_SKETCH_K, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+    
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+    
+    def update(self, values):
+        """Add an array of values; returns self"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self.compress()
+        return self
+    
+    def update_repeated(self, value, count):
+        """Add one value count times (e.g. the fill value of missing rows); returns self"""
+        if self.count + count <= self.k and len(self.levels) == 1:
+            return self.update(np.full(count, value, dtype=np.float64))
+        # Binary decomposition: one item at level h for every set bit h of count
+        self.count += count
+        level = 0
+        while count:
+            if count & 1:
+                while level >= len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level] = np.append(self.levels[level], value)
+            count >>= 1
+            level += 1
+        self.compress()
+        return self
+    
+    def merge(self, other):
+        """Add another sketch's values; returns self"""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.compress()
+        return self
+    
+    def compress(self):
+        """Compact full levels until every level is within its capacity"""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self.capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            # With an odd count the smallest item stays, so total weight is unchanged
+            odd = len(items) % 2
+            promoted = items[odd + self.rng.integers(2)::2]
+            self.levels[level] = items[:odd]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # Adding a level shrinks the capacity of the ones below it
+            level = 0
+    
+    def quantile(self, q):
+        """Approximate q-quantile (NaN for an empty sketch)"""
+        if self.count == 0:
+            return np.nan
+        if len(self.levels) == 1:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype=np.float64)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, weights = items[order], weights[order]
+        # Midpoint rank of every item, interpolated like pandas' linear method
+        ranks = np.cumsum(weights) - (weights + 1) / 2
+        return float(np.interp(q * (self.count - 1), ranks, items))
+    
+    def median(self):
+        return self.quantile(0.5)
@@ -0,0 +1,321 @@
+"""
+Corpus Report Exporter
+Streams per-channel video listings from the video store into paginated
+markdown/HTML pages with a small JSON index, rebuilding only the channels
+whose videos changed since the last export
+"""
+import os
+import sys
+import json
+import html
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import VIDEO_STORE_PATH, REPORT_DIR, REPORT_PAGE_SIZE
+from src.video_store import VideoStore
+from src.parsing_utils import parse_timestamps
+
+REPORT_FORMATS = ('md', 'html')
+
+# Columns a video entry shows, in store order for fingerprinting
+VIDEO_COLUMNS = [
+    'video_id', 'title', 'description', 'published_at', 'publish_day', 'publish_hour',
+    'duration_seconds', 'duration_minutes', 'view_count', 'like_count', 'comment_count',
+    'target_first_week_views', 'engagement_ratio', 'tag_count', 'tags',
+]
+CHANNEL_COLUMNS = ['channel_name', 'channel_subscribers', 'channel_video_count', 'channel_view_count']
+
+MAX_TAGS_SHOWN = 10
+MAX_DESCRIPTION_CHARS = 200
+
+HTML_PAGE = """<!DOCTYPE html>
+<html lang="tr">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>body {{ font-family: sans-serif; max-width: 960px; margin: 2em auto; }} li {{ margin: 0.15em 0; }}</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def number(value):
+    """Thousands-separated integer, or '-' when missing"""
+    return '-' if pd.isna(value) else f'{int(value):,}'
+
+
+def decimal(value, digits):
+    """Fixed-point number, or '-' when missing"""
+    return '-' if pd.isna(value) else f'{value:.{digits}f}'
+
+
+def text(value):
+    """String value, '' when missing (NULL comes back as None or NaN)"""
+    return '' if pd.isna(value) else str(value)
+
+
+def video_fields(video):
+    """(label, text) pairs shown for one video"""
+    fields = [
+        ('Video ID', text(video.video_id)),
+        ('Yayın Tarihi', 'Bilinmiyor' if pd.isna(video.published_at) else video.published_at.strftime('%Y-%m-%d %H:%M')),
+        ('Yayın Günü', text(video.publish_day) or '-'),
+        ('Yayın Saati', '-' if pd.isna(video.publish_hour) else f'{int(video.publish_hour):02d}:00'),
+        ('Süre', f'{decimal(video.duration_minutes, 2)} dakika ({number(video.duration_seconds)} saniye)'),
+        ('Görüntülenme', number(video.view_count)),
+        ('Beğeni', number(video.like_count)),
+        ('Yorum', number(video.comment_count)),
+        ('İlk 7 Gün Görüntülenme', number(video.target_first_week_views)),
+        ('Etkileşim Oranı', decimal(video.engagement_ratio, 4)),
+        ('Tag Sayısı', number(video.tag_count)),
+    ]
+    tags = text(video.tags)
+    if tags:
+        fields.append(('Tagler', ', '.join(tags.split(',')[:MAX_TAGS_SHOWN])))
+    full_description = text(video.description)
+    if full_description:
+        description = full_description[:MAX_DESCRIPTION_CHARS]
+        if len(full_description) > MAX_DESCRIPTION_CHARS:
+            description += '...'
+        fields.append(('Açıklama', description))
+    return fields
+
+
+def channel_fields(channel):
+    return [
+        ('Abone Sayısı', number(channel['channel_subscribers'])),
+        ('Toplam Video', number(channel['channel_video_count'])),
+        ('Toplam Görüntülenme', number(channel['channel_view_count'])),
+        ('Bu Veri Setindeki Video Sayısı', number(channel['videos'])),
+    ]
+
+
+def page_file(page, fmt):
+    return f'page-{page:03d}.{fmt}'
+
+
+def navigation(page, pages, fmt):
+    """Links to the index and the neighbouring pages of a channel"""
+    links = [('Dizin', f'../../index.{fmt}')]
+    if page > 1:
+        links.append(('Önceki', page_file(page - 1, fmt)))
+    if page < pages:
+        links.append(('Sonraki', page_file(page + 1, fmt)))
+    if fmt == 'md':
+        return ' | '.join(f'[{label}]({href})' for label, href in links) + f' — Sayfa {page}/{pages}'
+    anchors = ' | '.join(f'<a href="{href}">{label}</a>' for label, href in links)
+    return f'<p>{anchors} — Sayfa {page}/{pages}</p>'
+
+
+def render_page(channel, videos, page, pages, fmt):
+    """One page of a channel's videos"""
+    nav = navigation(page, pages, fmt)
+    if fmt == 'md':
+        lines = [f"## 📺 {channel['channel_name']}", '', nav, '']
+        if page == 1:
+            lines += ['**Kanal Bilgileri:**']
+            lines += [f'- {label}: {value}' for label, value in channel_fields(channel)]
+            lines += ['']
+        lines += ['### Videolar:', '']
+        for video in videos.itertuples(index=False):
+            lines += [f'#### {text(video.title)}', '']
+            lines += [f'- **{label}:** {value}' for label, value in video_fields(video)]
+            lines += ['']
+        lines += ['---', '', nav, '']
+        return '\n'.join(lines)
+    
+    escape = html.escape
+    parts = [f"<h2>📺 {escape(channel['channel_name'])}</h2>", nav]
+    if page == 1:
+        items = ''.join(f'<li>{label}: {escape(value)}</li>' for label, value in channel_fields(channel))
+        parts.append(f'<p><strong>Kanal Bilgileri:</strong></p><ul>{items}</ul>')
+    parts.append('<h3>Videolar:</h3>')
+    for video in videos.itertuples(index=False):
+        items = ''.join(f'<li><strong>{label}:</strong> {escape(str(value))}</li>'
+                        for label, value in video_fields(video))
+        parts.append(f'<h4>{escape(text(video.title))}</h4><ul>{items}</ul>')
+    parts.append(nav)
+    title = f"{channel['channel_name']} — Sayfa {page}/{pages}"
+    return HTML_PAGE.format(title=escape(title), body='\n'.join(parts))
+
+
+def render_index(index, fmt):
+    """Corpus summary with one link per channel"""
+    header = [
+        ('Toplam Video Sayısı', number(index['total_videos'])),
+        ('Toplam Kanal Sayısı', number(index['total_channels'])),
+        ('Oluşturulma Tarihi', index['generated_at']),
+    ]
+    channels = index['channels']
+    if fmt == 'md':
+        lines = ['# YouTube Video Verileri', '']
+        lines += [f'**{label}:** {value}' for label, value in header]
+        lines += ['', '---', '', '| Kanal | Video | Sayfa |', '|---|---:|---:|']
+        lines += [f"| [{channel['channel_name']}](channels/{channel['channel_id']}/{page_file(1, fmt)}) "
+                  f"| {channel['videos']:,} | {channel['pages']} |" for channel in channels]
+        return '\n'.join(lines) + '\n'
+    
+    escape = html.escape
+    summary = ''.join(f'<p><strong>{label}:</strong> {escape(value)}</p>' for label, value in header)
+    rows = ''.join(
+        f"<tr><td><a href=\"channels/{channel['channel_id']}/{page_file(1, fmt)}\">"
+        f"{escape(channel['channel_name'])}</a></td><td>{channel['videos']:,}</td><td>{channel['pages']}</td></tr>"
+        for channel in channels
+    )
+    body = (f'<h1>YouTube Video Verileri</h1>{summary}<hr>'
+            f'<table><tr><th>Kanal</th><th>Video</th><th>Sayfa</th></tr>{rows}</table>')
+    return HTML_PAGE.format(title='YouTube Video Verileri', body=body)
+
+
+def write_text(path, text):
+    """Write through a temporary file so readers never see half a page"""
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+class ReportExporter:
+    """Paginated per-channel report of a VideoStore
+    
+    Only one page of videos is held in memory at a time: channels are
+    read from the store page by page through its channel_id index. Each
+    channel's fingerprint (a hash of its rows) is kept in ``index.json``;
+    with ``incremental`` a channel is re-rendered only when it changed.
+    """
+    
+    def __init__(self, store, directory=REPORT_DIR, page_size=REPORT_PAGE_SIZE, formats=REPORT_FORMATS):
+        self.store = store
+        self.directory = directory
+        self.page_size = page_size
+        self.formats = tuple(formats)
+        self.index_path = os.path.join(directory, 'index.json')
+    
+    def channels(self):
+        """Per-channel video counts and channel statistics, in collection order"""
+        aggregates = ', '.join(f'MAX("{column}")' for column in CHANNEL_COLUMNS)
+        rows = self.store.connection.execute(
+            f'SELECT channel_id, COUNT(*), {aggregates} FROM videos '
+            f'GROUP BY channel_id ORDER BY MIN(rowid)'
+        )
+        return [dict(zip(['channel_id', 'videos', *CHANNEL_COLUMNS], row)) for row in rows]
+    
+    def fingerprints(self):
+        """Hash of every channel's rows, streamed from the store in one pass"""
+        columns = ', '.join(f'"{column}"' for column in VIDEO_COLUMNS + CHANNEL_COLUMNS)
+        digests = {}
+        cursor = self.store.connection.execute(
+            f'SELECT channel_id, {columns} FROM videos ORDER BY channel_id, rowid'
+        )
+        for row in cursor:
+            digest = digests.get(row[0])
+            if digest is None:
+                digest = digests[row[0]] = hashlib.sha1()
+            digest.update(repr(row[1:]).encode('utf-8'))
+        return {channel_id: digest.hexdigest() for channel_id, digest in digests.items()}
+    
+    def load_index(self):
+        if not os.path.exists(self.index_path):
+            return None
+        with open(self.index_path, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def is_current(self, previous, channel):
+        """Whether a channel's pages from the previous export can be kept"""
+        if previous is None or previous.get('fingerprint') != channel['fingerprint']:
+            return False
+        channel_dir = os.path.join(self.directory, 'channels', channel['channel_id'])
+        return all(os.path.exists(os.path.join(channel_dir, page_file(page, fmt)))
+                   for page in range(1, previous['pages'] + 1) for fmt in self.formats)
+    
+    def render_channel(self, channel):
+        """Write a channel's pages; returns the number of pages"""
+        channel_dir = os.path.join(self.directory, 'channels', channel['channel_id'])
+        if os.path.isdir(channel_dir):
+            shutil.rmtree(channel_dir)
+        os.makedirs(channel_dir)
+        
+        pages = max(1, -(-channel['videos'] // self.page_size))
+        frames = self.store.iter_frames(VIDEO_COLUMNS, where='channel_id = ?',
+                                        params=(channel['channel_id'],), chunksize=self.page_size)
+        for page, videos in enumerate(frames, start=1):
+            videos['published_at'] = parse_timestamps(videos['published_at'])
+            for fmt in self.formats:
+                write_text(os.path.join(channel_dir, page_file(page, fmt)),
+                           render_page(channel, videos, page, pages, fmt))
+        return pages
+    
+    def export(self, incremental=True):
+        """Write the report; returns (channels rendered, channels kept)"""
+        os.makedirs(os.path.join(self.directory, 'channels'), exist_ok=True)
+        previous = self.load_index() if incremental else None
+        settings = {'page_size': self.page_size, 'formats': list(self.formats)}
+        if previous is not None and previous.get('settings') != settings:
+            previous = None
+        previous_channels = {channel['channel_id']: channel for channel in (previous or {}).get('channels', [])}
+        
+        fingerprints = self.fingerprints()
+        channels = self.channels()
+        rendered = kept = 0
+        for channel in channels:
+            channel['channel_name'] = text(channel['channel_name']) or channel['channel_id']
+            channel['fingerprint'] = fingerprints[channel['channel_id']]
+            before = previous_channels.get(channel['channel_id'])
+            if self.is_current(before, channel):
+                channel['pages'] = before['pages']
+                kept += 1
+            else:
+                channel['pages'] = self.render_channel(channel)
+                rendered += 1
+        
+        # Channels no longer in the store
+        current = {channel['channel_id'] for channel in channels}
+        for channel_id in set(previous_channels) - current:
+            shutil.rmtree(os.path.join(self.directory, 'channels', channel_id), ignore_errors=True)
+        
+        index = {
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'total_videos': sum(channel['videos'] for channel in channels),
+            'total_channels': len(channels),
+            'settings': settings,
+            'channels': [{key: channel[key] for key in ('channel_id', 'channel_name', 'videos', 'pages', 'fingerprint')}
+                         for channel in channels],
+        }
+        for fmt in self.formats:
+            write_text(os.path.join(self.directory, f'index.{fmt}'), render_index(index, fmt))
+        write_text(self.index_path, json.dumps(index, ensure_ascii=False, indent=2))
+        return rendered, kept
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Export the paginated per-channel video report')
+    parser.add_argument('--store', default=VIDEO_STORE_PATH, help='video store to report on')
+    parser.add_argument('--table', help='upsert this table (.csv/.parquet/.jsonl) into the store first')
+    parser.add_argument('--output', default=REPORT_DIR, help='report directory')
+    parser.add_argument('--page-size', type=int, default=REPORT_PAGE_SIZE, help='videos per page')
+    parser.add_argument('--format', choices=REPORT_FORMATS, action='append',
+                        help='output format (repeatable, default: md and html)')
+    parser.add_argument('--full', action='store_true', help='re-render every channel')
+    args = parser.parse_args()
+    
+    with VideoStore(args.store) as store:
+        if args.table:
+            inserted, updated = store.import_table(args.table)
+            print(f"Imported {args.table}: {inserted} new, {updated} updated videos")
+        exporter = ReportExporter(store, args.output, args.page_size, args.format or REPORT_FORMATS)
+        rendered, kept = exporter.export(incremental=not args.full)
+    
+    print(f"Report written to {args.output}: {rendered} channels rendered, {kept} unchanged")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Statistics Refresh Mode
+Re-polls statistics of known videos and stores timestamped snapshots,
+so first week views can be measured instead of estimated
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from googleapiclient.errors import HttpError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import (
+    YOUTUBE_API_KEY,
+    MAX_RESULTS_PER_REQUEST,
+    STATS_SNAPSHOT_DIR,
+    STATS_REFRESH_INTERVAL_HOURS
+)
+from src.api_retry import QuotaExhaustedError
+from src.storage import read_table, table_exists
+from src.parsing_utils import parse_timestamps
+
+# One fixed-width record per (video, snapshot); 32 bytes each
+SNAPSHOT_DTYPE = np.dtype([
+    ('timestamp', '<i8'),   # epoch seconds (UTC)
+    ('video_idx', '<i4'),   # line number in video_ids.txt
+    ('view_count', '<i8'),
+    ('like_count', '<i8'),
+    ('comment_count', '<i4'),
+])
+
+
+class SnapshotStore:
+    """Append-only time series of video statistics
+    
+    Video IDs are interned once in ``video_ids.txt``; every snapshot is a
+    block of fixed-width records appended to ``snapshots.bin``, which is read
+    back through a memory map. Neither file is ever rewritten.
+    """
+    
+    def __init__(self, directory=STATS_SNAPSHOT_DIR):
+        self.directory = directory
+        self.ids_path = os.path.join(directory, 'video_ids.txt')
+        self.data_path = os.path.join(directory, 'snapshots.bin')
+        os.makedirs(directory, exist_ok=True)
+        
+        self.video_ids = []
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, encoding='utf-8') as f:
+                self.video_ids = [line.rstrip('\n') for line in f if line.strip()]
+        self.index = {video_id: i for i, video_id in enumerate(self.video_ids)}
+    
+    def _intern(self, video_ids):
+        """Map video IDs to indices, registering unseen IDs"""
+        new_ids = []
+        indices = np.empty(len(video_ids), dtype='<i4')
+        for i, video_id in enumerate(video_ids):
+            idx = self.index.get(video_id)
+            if idx is None:
+                idx = len(self.video_ids)
+                self.index[video_id] = idx
+                self.video_ids.append(video_id)
+                new_ids.append(video_id)
+            indices[i] = idx
+        
+        if new_ids:
+            with open(self.ids_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{video_id}\n" for video_id in new_ids))
+        return indices
+    
+    def append(self, stats, timestamp=None):
+        """Append one snapshot given a list of statistics dicts"""
+        if not stats:
+            return 0
+        if timestamp is None:
+            timestamp = int(time.time())
+        
+        records = np.empty(len(stats), dtype=SNAPSHOT_DTYPE)
+        records['timestamp'] = timestamp
+        records['video_idx'] = self._intern([s['video_id'] for s in stats])
+        records['view_count'] = [s['view_count'] for s in stats]
+        records['like_count'] = [s['like_count'] for s in stats]
+        records['comment_count'] = [s['comment_count'] for s in stats]
+        
+        with open(self.data_path, 'ab') as f:
+            records.tofile(f)
+        return len(records)
+    
+    def load(self):
+        """Memory-map all snapshot records"""
+        if not os.path.exists(self.data_path) or os.path.getsize(self.data_path) == 0:
+            return np.empty(0, dtype=SNAPSHOT_DTYPE)
+        return np.memmap(self.data_path, dtype=SNAPSHOT_DTYPE, mode='r')
+    
+    def snapshot_count(self):
+        """Number of distinct snapshot timestamps"""
+        return len(np.unique(self.load()['timestamp']))
+    
+    def first_week_views(self, published_at, days=7, max_gap_hours=48):
+        """Measure views at publish + ``days`` by interpolating snapshots
+        
+        ``published_at`` is a Series of publish times indexed by video_id.
+        A video counts as measured only when two snapshots (or the publish
+        moment, at zero views, and a snapshot) bracket the target time at most
+        ``max_gap_hours`` apart. Unmeasured videos (and unparseable publish
+        times) are NaN.
+        """
+        published = parse_timestamps(published_at)
+        result = pd.Series(np.nan, index=published.index, dtype=float)
+        
+        records = self.load()
+        if len(records) == 0:
+            return result
+        
+        # Publish time (epoch seconds) per interned video; NaN if unknown
+        publish_ts = np.full(len(self.video_ids), np.nan)
+        known = published.index.map(self.index)
+        mask = pd.notna(known) & published.notna().to_numpy()
+        publish_ts[known[mask].astype(int)] = (
+            published[mask].astype('int64').to_numpy() // 10**9
+        )
+        
+        order = np.lexsort((records['timestamp'], records['video_idx']))
+        idx = records['video_idx'][order]
+        ts = records['timestamp'][order].astype(float)
+        views = records['view_count'][order].astype(float)
+        
+        target = publish_ts[idx] + days * 86400
+        after = ts >= target
+        # First snapshot at/after the target within each video's run
+        first_after = after & np.r_[True, (idx[1:] != idx[:-1]) | ~after[:-1]]
+        pos = np.flatnonzero(first_after)
+        
+        prev = np.maximum(pos - 1, 0)
+        has_prev = (pos > 0) & (idx[prev] == idx[pos])
+        prev_ts = np.where(has_prev, ts[prev], publish_ts[idx[pos]])
+        prev_views = np.where(has_prev, views[prev], 0.0)
+        
+        span = ts[pos] - prev_ts
+        ok = np.isfinite(target[pos]) & (span <= max_gap_hours * 3600)
+        weight = np.where(span > 0, (target[pos] - prev_ts) / np.where(span > 0, span, 1), 1.0)
+        measured = prev_views + weight * (views[pos] - prev_views)
+        
+        video_ids = np.asarray(self.video_ids, dtype=object)[idx[pos][ok]]
+        values = pd.Series(np.round(measured[ok]), index=video_ids)
+        values = values[values.index.isin(result.index)]
+        result.loc[values.index] = values.to_numpy()
+        return result
+
+
+class StatisticsRefresher:
+    """Re-polls statistics of known videos in 50-ID batches"""
+    
+    def __init__(self, collector, store):
+        self.collector = collector
+        self.store = store
+        self.request_count = 0
+    
+    def fetch_statistics(self, video_ids):
+        """Fetch statistics for up to 50 video IDs"""
+        request = self.collector.youtube.videos().list(
+            part='statistics',
+            id=','.join(video_ids),
+            maxResults=MAX_RESULTS_PER_REQUEST
+        )
+        response = self.collector.execute(request)
+        self.request_count += 1
+        
+        stats = []
+        for item in response.get('items', []):
+            statistics = item.get('statistics', {})
+            stats.append({
+                'video_id': item['id'],
+                'view_count': int(statistics.get('viewCount', 0)),
+                'like_count': int(statistics.get('likeCount', 0)),
+                'comment_count': int(statistics.get('commentCount', 0))
+            })
+        return stats
+    
+    def refresh(self, video_ids):
+        """Take one snapshot of all given videos"""
+        timestamp = int(time.time())
+        stats = []
+        for start in range(0, len(video_ids), MAX_RESULTS_PER_REQUEST):
+            batch = video_ids[start:start + MAX_RESULTS_PER_REQUEST]
+            try:
+                stats.extend(self.fetch_statistics(batch))
+            except HttpError as e:
+                print(f"Error refreshing statistics for batch at {start}: {e}")
+            except QuotaExhaustedError as e:
+                print(f"Stopping refresh early: {e}")
+                break
+        
+        written = self.store.append(stats, timestamp)
+        print(f"Snapshot {datetime.fromtimestamp(timestamp, timezone.utc).isoformat()}: "
+              f"{written}/{len(video_ids)} videos")
+        return written
+    
+    def run(self, video_ids, interval_hours=STATS_REFRESH_INTERVAL_HOURS, iterations=None):
+        """Refresh repeatedly every ``interval_hours`` (forever if iterations is None)"""
+        done = 0
+        while iterations is None or done < iterations:
+            started = time.time()
+            self.refresh(video_ids)
+            done += 1
+            if iterations is not None and done >= iterations:
+                break
+            time.sleep(max(0, interval_hours * 3600 - (time.time() - started)))
+        return done
+
+
+def load_known_video_ids(paths=('raw_data/youtube_videos_improved.csv', 'raw_data/youtube_videos_raw.csv')):
+    """Read the video_id column of the collected datasets"""
+    video_ids = []
+    for path in paths:
+        if table_exists(path):
+            video_ids.extend(read_table(path, columns=['video_id'])['video_id'].astype(str))
+    return list(dict.fromkeys(video_ids))
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Re-poll statistics of known videos')
+    parser.add_argument('--loop', action='store_true', help='keep refreshing on a schedule')
+    parser.add_argument('--interval-hours', type=float, default=STATS_REFRESH_INTERVAL_HOURS)
+    args = parser.parse_args()
+    
+    if not YOUTUBE_API_KEY:
+        print("ERROR: YOUTUBE_API_KEY not found in environment variables.")
+        return
+    
+    video_ids = load_known_video_ids()
+    if not video_ids:
+        print("No known videos found. Please run data collection first.")
+        return
+    
+    from src.data_collection import YouTubeDataCollector
+    collector = YouTubeDataCollector(YOUTUBE_API_KEY)
+    refresher = StatisticsRefresher(collector, SnapshotStore())
+    print(f"Tracking {len(video_ids)} videos")
+    refresher.run(video_ids, args.interval_hours, iterations=None if args.loop else 1)
+    print(f"videos.list requests: {refresher.request_count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Dataset Storage
+Columnar (Parquet) storage for the raw and processed video tables with a
+declared schema, column projection and predicate pushdown
+
+Callers keep using the logical ``.csv`` paths: tables are written next to
+them as ``.parquet`` when pyarrow is installed and read from whichever of
+the two files is newer, so CSV-only environments keep working unchanged.
+"""
+import os
+import sys
+import operator
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.video_sink import iter_jsonl_chunks
+from src.parsing_utils import parse_timestamps
+
+# Column types of the collected (raw) video table
+RAW_SCHEMA = {
+    'video_id': 'string',
+    'title': 'string',
+    'description': 'string',
+    'channel_id': 'string',
+    'channel_name': 'string',
+    'published_at': 'datetime',
+    'publish_day': 'string',
+    'publish_hour': 'int64',
+    'category_id': 'string',
+    'tags': 'string',
+    'tag_count': 'int64',
+    'duration_seconds': 'int64',
+    'duration_minutes': 'float64',
+    'view_count': 'int64',
+    'like_count': 'int64',
+    'comment_count': 'int64',
+    'default_language': 'string',
+    'default_audio_language': 'string',
+    'engagement_ratio': 'float64',
+    'channel_subscribers': 'int64',
+    'channel_video_count': 'int64',
+    'channel_view_count': 'int64',
+    'target_first_week_views': 'int64',
+}
+
+# Identity columns of the processed table; engineered features keep the
+# dtypes they were created with (Parquet stores them as-is)
+PROCESSED_SCHEMA = {
+    column: RAW_SCHEMA[column] for column in (
+        'video_id', 'title', 'description', 'channel_id', 'channel_name',
+        'published_at', 'category_id', 'tags', 'default_language',
+        'default_audio_language', 'target_first_week_views'
+    )
+}
+
+# Free-text columns no model stage reads; the widest part of every table
+TEXT_COLUMNS = ('title', 'description', 'tags')
+
+FILTER_OPERATORS = {
+    '==': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda column, values: column.isin(values),
+    'not in': lambda column, values: ~column.isin(values),
+}
+
+
+def parquet_path(path):
+    return os.path.splitext(path)[0] + '.parquet'
+
+
+def csv_path(path):
+    return os.path.splitext(path)[0] + '.csv'
+
+
+def resolve_table_path(path):
+    """Existing file backing a logical table path (the newer one wins), or None"""
+    candidates = [csv_path(path)]
+    if HAS_PYARROW:
+        candidates.append(parquet_path(path))
+    existing = [candidate for candidate in candidates if os.path.exists(candidate)]
+    if not existing:
+        return None
+    return max(existing, key=os.path.getmtime)
+
+
+def table_exists(path):
+    return resolve_table_path(path) is not None
+
+
+def table_columns(path):
+    """Column names of a stored table without reading its data"""
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+    if resolved.endswith('.parquet'):
+        return pq.read_schema(resolved).names
+    return list(pd.read_csv(resolved, nrows=0).columns)
+
+
+def apply_schema(df, schema):
+    """Cast the declared columns present in df (shallow copy, other columns untouched)"""
+    df = df.copy(deep=False)
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        if kind == 'datetime':
+            df[column] = parse_timestamps(df[column])
+        elif kind == 'string':
+            values = df[column].astype(object)
+            df[column] = values.astype(str).where(values.notna(), np.nan)
+        elif kind == 'int64' and df[column].isna().any():
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(kind)
+    return df
+
+
+def missing_as_nan(df):
+    """Missing values of text (object) columns as NaN, as CSV gives them
+    
+    Parquet returns None for them, and str(None) != str(nan): without this,
+    features of missing text would depend on the file format.
+    """
+    for column in df.columns:
+        if df[column].dtype == object and df[column].isna().any():
+            df[column] = df[column].where(df[column].notna(), np.nan)
+    return df
+
+
+def arrow_schema(df, schema):
+    """pyarrow schema for df: declared types where known, inferred elsewhere"""
+    types = {
+        'string': pa.string(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'datetime': pa.timestamp('ns', tz='UTC'),
+    }
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in inferred:
+        kind = (schema or {}).get(field.name)
+        fields.append(pa.field(field.name, types[kind]) if kind else field)
+    return pa.schema(fields)
+
+
+def filter_mask(df, filters):
+    """Boolean mask for ANDed (column, op, value) filters, as passed to read_table"""
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        mask &= FILTER_OPERATORS[op](df[column], value)
+    return mask
+
+
+def write_table(df, path, schema=None):
+    """Write a table under its logical path; returns the file written"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if schema:
+        df = apply_schema(df, schema)
+    
+    if HAS_PYARROW:
+        target = parquet_path(path)
+        table = pa.Table.from_pandas(df, schema=arrow_schema(df, schema), preserve_index=False)
+        pq.write_table(table, target, compression='zstd')
+    else:
+        target = csv_path(path)
+        df.to_csv(target, index=False, encoding='utf-8')
+    return target
+
+
+def read_table(path, columns=None, filters=None, schema=None, exclude=None):
+    """Read a stored table
+    
+    columns: only these columns are read (projection)
+    filters: ANDed (column, op, value) tuples, e.g. [('view_count', '>', 0)];
+             pushed down to Parquet row groups, applied after reading for CSV
+    schema:  declared types to apply to CSV data (Parquet already has them)
+    exclude: columns to skip when no explicit projection is given
+    """
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+    if columns is None and exclude:
+        columns = [column for column in table_columns(path) if column not in exclude]
+    
+    if resolved.endswith('.parquet'):
+        return missing_as_nan(pd.read_parquet(resolved, columns=columns, filters=filters or None))
+    
+    usecols = None
+    if columns is not None:
+        wanted = set(columns) | {column for column, _, _ in filters or ()}
+        usecols = lambda column: column in wanted
+    df = pd.read_csv(resolved, usecols=usecols)
+    if schema:
+        df = apply_schema(df, schema)
+    if filters:
+        df = df[filter_mask(df, filters)].reset_index(drop=True)
+    if columns is not None:
+        df = df[[column for column in columns if column in df.columns]]
+    return df
+
+
+def iter_table_chunks(path, chunksize, columns=None, schema=None):
+    """Read a stored table as DataFrames of at most chunksize rows"""
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+    
+    if resolved.endswith('.parquet'):
+        for batch in pq.ParquetFile(resolved).iter_batches(batch_size=chunksize, columns=columns):
+            yield missing_as_nan(batch.to_pandas())
+        return
+    
+    for chunk in pd.read_csv(resolved, usecols=columns, chunksize=chunksize):
+        yield apply_schema(chunk, schema) if schema else chunk
+
+
+def write_table_chunks(chunks, path, schema=None):
+    """Write an iterable of DataFrames as one stored table; returns (file, rows)
+    
+    Columns and types are fixed by the first chunk; later chunks are aligned
+    to them. Only one chunk is held in memory at a time.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    target = parquet_path(path) if HAS_PYARROW else csv_path(path)
+    writer = None
+    columns = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            if columns is not None:
+                chunk = chunk.reindex(columns=columns)
+            if schema:
+                chunk = apply_schema(chunk, schema)
+            
+            if not HAS_PYARROW:
+                chunk.to_csv(target, mode='w' if columns is None else 'a', header=columns is None,
+                             index=False, encoding='utf-8')
+            else:
+                if writer is None:
+                    table_schema = arrow_schema(chunk, schema)
+                    writer = pq.ParquetWriter(target, table_schema, compression='zstd')
+                writer.write_table(pa.Table.from_pandas(chunk, schema=table_schema, preserve_index=False))
+            columns = list(chunk.columns)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return target, rows
+
+
+def jsonl_to_table(jsonl_path, path, schema=RAW_SCHEMA, chunksize=10000):
+    """Convert a JSON Lines file to a stored table chunk by chunk; returns (file, rows)"""
+    return write_table_chunks(iter_jsonl_chunks(jsonl_path, chunksize), path, schema)
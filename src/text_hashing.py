@@ -0,0 +1,137 @@
+"""
+Hashed Text Features
+Title, tag and description tokens hashed into a fixed number of columns:
+no vocabulary is fitted or stored, rows become a sparse CSR matrix that
+holds only their nonzero token counts, and a single request is hashed at
+serving time with nothing from training but the width
+"""
+import os
+import sys
+import re
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.utils import murmurhash3_32
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import TEXT_HASH_FEATURES
+
+# Dotted and dotless i fold together, so 'İstanbul', 'ISTANBUL' and 'ıstanbul'
+# are one token whichever casing rules the uploader's keyboard applied
+TURKISH_FOLD = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i'})
+
+# Separates rows when a block of one column is tokenized as a single string
+# (not NUL: numpy drops trailing NULs when comparing strings)
+SEPARATOR = '\x1f'
+
+# Token pattern per text column (tags are comma-joined and kept whole) and the
+# prefix that keeps the same word in different columns apart
+FIELDS = {
+    'title': ('t:', r'\w+'),
+    'tags': ('g:', r'[^,\x1f]+'),
+    'description': ('d:', r'\w+'),
+}
+TOKEN_PATTERNS = {column: re.compile(pattern) for column, (_, pattern) in FIELDS.items()}
+BLOCK_PATTERNS = {column: re.compile(f'{pattern}|{SEPARATOR}') for column, (_, pattern) in FIELDS.items()}
+
+# Rows tokenized at once by TextHasher.transform; bounds the token lists in memory
+BLOCK_ROWS = 10000
+
+
+def casefold_tr(text):
+    return text.translate(TURKISH_FOLD).casefold()
+
+
+def text_tokens(column, text):
+    """Tokens of one text (without the column prefix); tags are stripped, empty ones dropped"""
+    tokens = TOKEN_PATTERNS[column].findall(casefold_tr(text))
+    if column == 'tags':
+        tokens = [token for token in (tag.strip() for tag in tokens) if token]
+    return tokens
+
+
+def token_columns(column, tokens, n_features):
+    """Column of each token: murmurhash3 of prefix + token, modulo the width"""
+    prefix = FIELDS[column][0]
+    return np.fromiter((murmurhash3_32(prefix + token, positive=True) for token in tokens),
+                       dtype=np.int64, count=len(tokens)) % n_features
+
+
+def append_text_features(dense, text):
+    """[dense | text] as one CSR matrix for the tree models
+    
+    Every dense entry is stored, zeros included: XGBoost reads entries
+    absent from a sparse matrix as missing, and the dense features must
+    keep their values. Only the hashed counts are sparse.
+    """
+    dense = np.asarray(dense, dtype=np.float64)
+    rows, columns = dense.shape
+    stored = sparse.csr_matrix(
+        (dense.ravel(), np.tile(np.arange(columns, dtype=np.int32), rows),
+         np.arange(0, rows * columns + 1, columns)),
+        shape=dense.shape
+    )
+    return sparse.hstack([stored, text], format='csr')
+
+
+class TextHasher:
+    """Hashed token counts of title, tags and description (a float32 CSR matrix)"""
+    
+    def __init__(self, n_features=TEXT_HASH_FEATURES):
+        self.n_features = n_features
+    
+    @property
+    def feature_names(self):
+        return [f'text_hash_{index}' for index in range(self.n_features)]
+    
+    def transform(self, df):
+        """Rows of df -> CSR matrix; missing text columns count as empty
+        
+        Each column of a block of rows is joined into one string and
+        tokenized in a single regex pass; only its distinct tokens are hashed.
+        """
+        df = df[[column for column in FIELDS if column in df.columns]]
+        blocks = [self.transform_block(df.iloc[start:start + BLOCK_ROWS])
+                  for start in range(0, len(df), BLOCK_ROWS)]
+        if not blocks:
+            return sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        return sparse.vstack(blocks, format='csr')
+    
+    def transform_block(self, df):
+        rows, columns = [], []
+        for column in FIELDS:
+            if column not in df.columns:
+                continue
+            texts = df[column].fillna('').astype(str)
+            if texts.str.contains(SEPARATOR, regex=False).any():
+                # A separator inside a text splits tokens like the comma does
+                texts = texts.str.replace(SEPARATOR, ',', regex=False)
+            found = np.array(BLOCK_PATTERNS[column].findall(casefold_tr(SEPARATOR.join(texts))), dtype=object)
+            separator = found == SEPARATOR
+            # Tokens before the first separator are row 0's, and so on
+            token_rows = np.cumsum(separator)[~separator]
+            codes, uniques = pd.factorize(found[~separator])
+            if column == 'tags':
+                uniques = pd.Index(uniques).str.strip()
+            unique_columns = token_columns(column, list(uniques), self.n_features)
+            kept = (uniques != '')[codes] if column == 'tags' else slice(None)
+            rows.append(token_rows[kept])
+            columns.append(unique_columns[codes][kept])
+        
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        columns = np.concatenate(columns) if columns else np.empty(0, dtype=np.int64)
+        # Repeated (row, column) pairs add up to the token counts
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)),
+                                 shape=(len(df), self.n_features))
+    
+    def transform_one(self, title='', tags='', description=''):
+        """One video's hashed counts as a 1-row CSR matrix (serving)"""
+        texts = {'title': title, 'tags': tags, 'description': description}
+        columns = np.concatenate([
+            token_columns(column, text_tokens(column, texts[column] or ''), self.n_features)
+            for column in FIELDS
+        ])
+        columns, counts = np.unique(columns, return_counts=True)
+        return sparse.csr_matrix((counts.astype(np.float32), columns, [0, len(columns)]),
+                                 shape=(1, self.n_features))
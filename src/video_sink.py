@@ -0,0 +1,66 @@
+"""
+Streaming Video Sink
+Writes collected videos to disk as they arrive (one JSON object per line),
+so the collector never holds the whole corpus in memory
+"""
+import os
+import json
+import pandas as pd
+
+
+class JsonlVideoSink:
+    """Append-only JSON Lines writer for collected video dicts"""
+    
+    def __init__(self, path, append=False):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self.count = 0
+    
+    def write(self, videos):
+        """Write a page of videos and flush it to disk"""
+        if not videos:
+            return
+        self.file.write(''.join(json.dumps(video, ensure_ascii=False, default=str) + '\n' for video in videos))
+        self.file.flush()
+        self.count += len(videos)
+    
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def iter_jsonl_chunks(path, chunksize=10000):
+    """Yield DataFrames of at most ``chunksize`` videos from a JSON Lines file"""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            records.append(json.loads(line))
+            if len(records) >= chunksize:
+                yield pd.DataFrame(records)
+                records = []
+    if records:
+        yield pd.DataFrame(records)
+
+
+def jsonl_to_csv(jsonl_path, csv_path, chunksize=10000):
+    """Convert a JSON Lines file to CSV chunk by chunk; returns the row count"""
+    os.makedirs(os.path.dirname(csv_path) or '.', exist_ok=True)
+    columns = None
+    rows = 0
+    for chunk in iter_jsonl_chunks(jsonl_path, chunksize):
+        if columns is None:
+            columns = list(chunk.columns)
+            chunk.to_csv(csv_path, index=False, encoding='utf-8')
+        else:
+            chunk.reindex(columns=columns).to_csv(csv_path, mode='a', header=False, index=False, encoding='utf-8')
+        rows += len(chunk)
+    return rows
@@ -0,0 +1,170 @@
+"""
+Video Store
+SQLite database of collected videos keyed on video_id, so incremental
+collections upsert only the new batch instead of rewriting the corpus
+"""
+import os
+import sys
+import sqlite3
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_float_dtype
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import VIDEO_STORE_PATH
+from src.storage import RAW_SCHEMA, read_table, write_table_chunks
+from src.parsing_utils import parse_timestamps
+from src.video_sink import JsonlVideoSink, iter_jsonl_chunks
+
+SQL_TYPES = {
+    'string': 'TEXT',
+    'datetime': 'TEXT',  # ISO 8601 UTC, so text order is time order
+    'int64': 'INTEGER',
+    'float64': 'REAL',
+}
+
+# SQLite's default limit on bound parameters is 999
+MAX_SQL_VARIABLES = 900
+
+
+def sql_type(series):
+    """SQLite column type for a column not declared in RAW_SCHEMA"""
+    if is_bool_dtype(series) or is_integer_dtype(series):
+        return 'INTEGER'
+    if is_float_dtype(series):
+        return 'REAL'
+    return 'TEXT'
+
+
+class VideoStore:
+    """Upsert-by-video_id store with indexes on channel_id and published_at
+    
+    Writing a batch costs O(batch): rows are inserted or updated through the
+    primary key, never by re-reading the stored corpus. Also usable as the
+    ``sink`` of ``collect_all_data``.
+    """
+    
+    def __init__(self, path=VIDEO_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        
+        columns = ',\n'.join(
+            f'{column} {SQL_TYPES[kind]}' + (' PRIMARY KEY' if column == 'video_id' else '')
+            for column, kind in RAW_SCHEMA.items()
+        )
+        with self.connection:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS videos (\n{columns}\n)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos (channel_id)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos (published_at)')
+        
+        self.columns = [row[1] for row in self.connection.execute('PRAGMA table_info(videos)')]
+        self.count = 0
+    
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
+    
+    def _add_columns(self, df):
+        """Add columns the batch has but the table does not"""
+        new_columns = [column for column in df.columns if column not in self.columns]
+        with self.connection:
+            for column in new_columns:
+                self.connection.execute(f'ALTER TABLE videos ADD COLUMN "{column}" {sql_type(df[column])}')
+        self.columns.extend(new_columns)
+    
+    def existing_ids(self, video_ids):
+        """Subset of video_ids already stored (primary key lookups)"""
+        video_ids = list(video_ids)
+        existing = set()
+        for start in range(0, len(video_ids), MAX_SQL_VARIABLES):
+            chunk = video_ids[start:start + MAX_SQL_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            existing.update(row[0] for row in self.connection.execute(
+                f'SELECT video_id FROM videos WHERE video_id IN ({placeholders})', chunk
+            ))
+        return existing
+    
+    def upsert(self, videos):
+        """Insert new videos and update stored ones; returns (inserted, updated)"""
+        df = videos if isinstance(videos, pd.DataFrame) else pd.DataFrame(videos)
+        if df.empty:
+            return 0, 0
+        df = df.drop_duplicates(subset=['video_id'], keep='last')
+        
+        if 'published_at' in df.columns:
+            published_at = parse_timestamps(df['published_at'])
+            df = df.assign(published_at=published_at.dt.strftime('%Y-%m-%dT%H:%M:%S.%f+00:00'))
+        self._add_columns(df)
+        
+        existing = self.existing_ids(df['video_id'])
+        columns = list(df.columns)
+        quoted = ', '.join(f'"{column}"' for column in columns)
+        updates = ', '.join(f'"{column}" = excluded."{column}"' for column in columns if column != 'video_id')
+        sql = (f'INSERT INTO videos ({quoted}) VALUES ({", ".join("?" * len(columns))}) '
+               f'ON CONFLICT(video_id) DO UPDATE SET {updates}')
+        
+        # object dtype turns numpy scalars into Python values sqlite3 can bind
+        rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        with self.connection:
+            self.connection.executemany(sql, rows)
+        
+        updated = len(existing)
+        return len(df) - updated, updated
+    
+    def write(self, videos):
+        """Sink interface for collect_all_data"""
+        inserted, updated = self.upsert(videos)
+        self.count += inserted + updated
+    
+    def import_frames(self, frames):
+        """Upsert an iterable of DataFrames; returns (inserted, updated)"""
+        inserted = updated = 0
+        for df in frames:
+            batch_inserted, batch_updated = self.upsert(df)
+            inserted += batch_inserted
+            updated += batch_updated
+        return inserted, updated
+    
+    def import_table(self, path, chunksize=50000):
+        """Upsert a stored table (.csv/.parquet) or a JSON Lines file"""
+        if path.endswith('.jsonl'):
+            return self.import_frames(iter_jsonl_chunks(path, chunksize))
+        df = read_table(path, schema=RAW_SCHEMA)
+        return self.import_frames(df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    
+    def iter_frames(self, columns=None, where=None, params=(), chunksize=50000):
+        """Yield stored videos as DataFrames in insertion order"""
+        selected = ', '.join(f'"{column}"' for column in columns) if columns else '*'
+        query = f'SELECT {selected} FROM videos'
+        if where:
+            query += f' WHERE {where}'
+        query += ' ORDER BY rowid'
+        yield from pd.read_sql_query(query, self.connection, params=params, chunksize=chunksize)
+    
+    def to_frame(self, columns=None, where=None, params=()):
+        """Stored videos as one DataFrame, e.g. where='channel_id = ?'"""
+        frames = list(self.iter_frames(columns, where, params))
+        if not frames:
+            return pd.DataFrame(columns=columns or self.columns)
+        return pd.concat(frames, ignore_index=True)
+    
+    def export(self, path, columns=None, where=None, params=(), chunksize=50000):
+        """Export to the pipeline formats (.jsonl, or a .csv/.parquet table); returns (file, rows)"""
+        frames = self.iter_frames(columns, where, params, chunksize)
+        if path.endswith('.jsonl'):
+            with JsonlVideoSink(path) as sink:
+                for df in frames:
+                    sink.write(df.to_dict('records'))
+            return path, sink.count
+        return write_table_chunks(frames, path, RAW_SCHEMA)
+    
+    def close(self):
+        self.connection.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,81 @@
+"""
+Feature Engineering Peak Memory
+engineer_features on a fixed synthetic frame must stay within
+FEATURE_MEMORY_BUDGET (the check run_preprocessing.py --profile-memory
+makes on real data)
+"""
+import os
+import sys
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import FEATURE_MEMORY_BUDGET, FEATURE_MEMORY_SLACK_MB
+from src.data_preprocessing import DataPreprocessor, code_point_flags
+
+ROWS = 20000
+
+TITLE_WORDS = ['Python', 'Tutorial', 'Nasıl', 'Yapılır', 'React', 'İleri', 'ders', 'How to', 'Why?',
+               'Crash Course', '🔥', '2024', 'AMAZING', 'best', 'Django', 'eğitimi', '!']
+TAGS = ['Python', 'React', 'AI', 'Machine Learning', 'Web Development', 'Django', 'yazılım']
+
+
+def synthetic_videos(rows=ROWS, seed=0):
+    """Cleaned raw rows (as clean_data leaves them) with realistic text lengths"""
+    rng = np.random.default_rng(seed)
+    titles = [' '.join(rng.choice(TITLE_WORDS, size=rng.integers(2, 9))) for _ in range(rows)]
+    descriptions = ['This is a tutorial about Python. ' * int(repeat) + ('https://example.com' if link else '')
+                    for repeat, link in zip(rng.integers(0, 12, rows), rng.random(rows) < 0.3)]
+    tags = [','.join(rng.choice(TAGS, size=count, replace=False)) for count in rng.integers(0, len(TAGS), rows)]
+    published = pd.Timestamp('2023-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 3 * 365 * 86400, rows), unit='s')
+    duration_seconds = rng.integers(30, 480 * 60, rows)
+    views = rng.integers(1, 5_000_000, rows)
+    subscribers = rng.integers(1_000, 20_000_000, rows)
+    return pd.DataFrame({
+        'video_id': [f'video_{index:06d}' for index in range(rows)],
+        'title': titles,
+        'description': descriptions,
+        'channel_id': [f'channel_{index}' for index in rng.integers(0, 50, rows)],
+        'channel_name': [f'Channel {index}' for index in rng.integers(0, 50, rows)],
+        'published_at': published,
+        'publish_day': published.day_name(),
+        'publish_hour': published.hour,
+        'category_id': '27',
+        'tags': tags,
+        'tag_count': np.array([len(value.split(',')) if value else 0 for value in tags]),
+        'duration_seconds': duration_seconds,
+        'duration_minutes': np.round(duration_seconds / 60, 2),
+        'view_count': views,
+        'like_count': views // rng.integers(20, 60, rows),
+        'comment_count': views // rng.integers(200, 600, rows),
+        'default_language': 'tr',
+        'default_audio_language': 'tr',
+        'channel_subscribers': subscribers.astype(float),
+        'channel_video_count': rng.integers(10, 3000, rows).astype(float),
+        'channel_view_count': (subscribers * rng.integers(20, 200, rows)).astype(float),
+        'target_first_week_views': views // 3 + 1,
+    })
+
+
+def test_feature_engineering_peak_within_budget():
+    df = synthetic_videos()
+    preprocessor = DataPreprocessor(verbose=False)
+    # One-off tables and first-use imports are not part of the per-row cost
+    code_point_flags()
+    preprocessor.engineer_features(df.head(100).copy())
+    
+    tracemalloc.start()
+    try:
+        preprocessor.engineer_features(df)
+    finally:
+        tracemalloc.stop()
+    
+    peaks = preprocessor.memory_peaks
+    assert peaks, "engineer_features recorded no stage peaks"
+    input_bytes = preprocessor.memory_input_bytes
+    limit = FEATURE_MEMORY_BUDGET * input_bytes + FEATURE_MEMORY_SLACK_MB * 2**20
+    stage, peak = max(peaks.items(), key=lambda item: item[1])
+    assert peak <= limit, (f"stage '{stage}' peaked at {peak / 2**20:.1f} MB, over the budget of "
+                           f"{limit / 2**20:.1f} MB ({input_bytes / 2**20:.1f} MB input)")
@@ -0,0 +1,29 @@
+"""
+Feature Store Code Version
+The code version must cover every module the feature code imports, so
+editing any of them starts a new store version
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.feature_store import FEATURE_CODE_IGNORED, code_version, feature_code_modules
+
+
+def test_imported_feature_modules_are_covered():
+    modules = feature_code_modules()
+    assert 'src.data_preprocessing' in modules
+    assert 'src.keyword_matcher' in modules
+    assert 'src.feature_transformer' in modules
+    # parse_timestamps sets published_at, which the time features read
+    assert 'src.parsing_utils' in modules
+
+
+def test_settings_and_io_are_not_covered():
+    assert not FEATURE_CODE_IGNORED & set(feature_code_modules())
+
+
+def test_version_depends_on_the_modules():
+    assert code_version() == code_version(feature_code_modules())
+    assert code_version() != code_version(['src.data_preprocessing'])
@@ -0,0 +1,78 @@
+"""
+Feature Transformer Row Path
+transform_row must give exactly what transform gives on a one-row frame:
+the same columns in the same order and the same values
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.feature_transformer import FeatureTransformer
+from test_title_features import EDGE_CASE_TITLES
+
+FILL = {'channel_subscribers': 50000.0, 'channel_video_count': 200.0, 'channel_view_count': 4_000_000.0}
+
+PUBLISHED = [
+    pd.Timestamp('2024-05-01 14:00', tz='UTC'),
+    pd.Timestamp('2024-12-31 23:30'),
+    datetime(2024, 3, 31, 2, 15, tzinfo=timezone(timedelta(hours=3))),
+    '2023-01-01T00:00:00Z',
+    '2023-06-15 08:45:12.250000+00:00',
+]
+NUMBERS = [np.nan, 0, 0.0, 1, 4.99, 5, 10, 15, 15.5, 18, 21, 24, 60, 480, 481, 1e4, 1e5, 1e6, 2e9, -1, -3.5]
+
+
+@pytest.fixture
+def transformer():
+    return FeatureTransformer().fit_cleaning({'fill': FILL, 'subscriber_cap': 1e9}).fit_encoding()
+
+
+def random_row(rng):
+    row = {
+        'title': EDGE_CASE_TITLES[rng.integers(len(EDGE_CASE_TITLES))],
+        'description': rng.choice(['', 'Learn more at https://example.com', 'a ' * 150, None]),
+        'tags': rng.choice(['', 'python,ders', None]),
+        'published_at': PUBLISHED[rng.integers(len(PUBLISHED))],
+        'publish_day': rng.choice(['Monday', 'Saturday', 'Friday', 'Someday']),
+    }
+    for column in ('tag_count', 'publish_hour', 'duration_minutes', 'duration_seconds', 'view_count',
+                   'like_count', 'comment_count', *FILL):
+        if rng.random() < 0.8:
+            row[column] = NUMBERS[rng.integers(len(NUMBERS))]
+    return row
+
+
+def assert_same(result, expected):
+    assert list(result) == list(expected)
+    for name, value in expected.items():
+        if isinstance(value, (float, np.floating)):
+            assert np.isclose(result[name], value, rtol=1e-12, atol=0, equal_nan=True), name
+        else:
+            assert result[name] == value, name
+
+
+def test_request_row_matches_frame(transformer):
+    row = {'title': 'Python Tutorial for Beginners 🔥 How to?', 'description': 'Learn https://x.com',
+           'tags': 'a,b', 'tag_count': 2, 'published_at': pd.Timestamp('2024-05-01 14:00'),
+           'publish_day': 'Wednesday', 'publish_hour': 14, 'duration_seconds': 600.0, 'duration_minutes': 10.0}
+    assert_same(transformer.transform_row(row), transformer.transform(pd.DataFrame([row])).iloc[0].to_dict())
+
+
+# Negative subscriber counts make the frame path warn about log1p and sqrt
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_random_rows_match_frame(transformer):
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        row = random_row(rng)
+        expected = transformer.transform(pd.DataFrame([row])).iloc[0].to_dict()
+        assert_same(transformer.transform_row(row), expected)
+
+
+def test_unparseable_publish_time_raises(transformer):
+    with pytest.raises(ValueError):
+        transformer.transform_row({'title': 'x', 'published_at': 'not a date', 'publish_hour': 3})
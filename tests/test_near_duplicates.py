@@ -0,0 +1,85 @@
+"""
+Near-Duplicate Detection
+Shared channel footers must not make different videos duplicates, and
+groups must not chain through intermediate videos
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.near_duplicates import NearDuplicateDetector, strip_boilerplate
+
+FOOTER = ('\n'.join([
+    'Kursumuza katılmak için: https://example.com/kurs',
+    'Instagram: https://instagram.com/example',
+    'Twitter: https://twitter.com/example',
+    'Abone olmayı ve bildirimleri açmayı unutmayın!',
+    '#yazılım #programlama #eğitim',
+]))
+
+
+def videos(titles, descriptions, channel='channel_a'):
+    published = pd.date_range('2024-01-01', periods=len(titles), freq='D', tz='UTC')
+    return pd.DataFrame({
+        'video_id': [f'video_{index}' for index in range(len(titles))],
+        'channel_id': channel,
+        'title': titles,
+        'description': descriptions,
+        'published_at': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    })
+
+
+def test_shared_footer_is_not_a_duplicate():
+    titles = ['Python ile Web Scraping', 'Docker Compose Kurulumu', 'React Hooks Detaylı Anlatım',
+              'SQL JOIN Türleri', 'Git Branch Stratejileri']
+    df = videos(titles, [f'Bu videoda {title} konusunu işliyoruz.\n{FOOTER}' for title in titles])
+    result, removed = NearDuplicateDetector().drop(df)
+    assert removed == 0
+    assert len(result) == len(df)
+
+
+def test_reupload_is_removed_and_earliest_kept():
+    description = f'Sıfırdan Django ile blog uygulaması yapıyoruz, modeller ve view katmanı.\n{FOOTER}'
+    df = videos(['Django ile Blog Uygulaması Yapımı | Bölüm 1', 'Django ile Blog Uygulaması Yapımı - Bölüm 1',
+                 'Kubernetes Pod Yönetimi', 'Flutter State Management'],
+                [description, description, f'Pod yaşam döngüsü.\n{FOOTER}', f'Provider ve Bloc.\n{FOOTER}'])
+    result, removed = NearDuplicateDetector().drop(df)
+    assert removed == 1
+    assert result['video_id'].tolist() == ['video_0', 'video_2', 'video_3']
+
+
+def test_series_episodes_are_not_duplicates():
+    description = 'Bu seride Python ile veri analizi öğreniyoruz, pandas ve numpy.'
+    df = videos([f'Python Veri Analizi Dersleri - Bölüm {episode}' for episode in (1, 2, 3, 12)] +
+                ['Python Veri Analizi Dersleri - Bölüm 2'], [description] * 5)
+    result, removed = NearDuplicateDetector().drop(df)
+    assert removed == 1
+    assert result['video_id'].tolist() == ['video_0', 'video_1', 'video_2', 'video_3']
+
+
+def test_groups_do_not_chain():
+    # a~b and b~c, but a and c are not similar: c must stay, not join a's group through b
+    words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet',
+             'kilo', 'lima', 'mike', 'november', 'oscar', 'papa']
+    titles = [' '.join(words[:12]), ' '.join(words[2:14]), ' '.join(words[4:16])]
+    df = videos(titles, ['', '', ''])
+    detector = NearDuplicateDetector(threshold=0.6, title_weight=1.0)
+    signatures = detector.document_signatures(df['title'], df['description'])
+    similarity = detector.similarity(signatures, np.array([0, 1, 0]), np.array([1, 2, 2]))
+    assert similarity[0] >= 0.6 and similarity[1] >= 0.6 and similarity[2] < 0.6
+    
+    labels, _ = detector.groups(df)
+    assert labels.tolist() == [0, 0, 2]
+
+
+def test_strip_boilerplate_is_per_channel():
+    descriptions = pd.Series([f'Konu {index}\n{FOOTER}' for index in range(3)] + [f'Konu 9\n{FOOTER}'],
+                             index=[10, 11, 12, 13])
+    channels = pd.Series(['channel_a'] * 3 + ['channel_b'], index=descriptions.index)
+    result = strip_boilerplate(descriptions, channels)
+    assert list(result.index) == [10, 11, 12, 13]
+    assert result.tolist()[:3] == ['Konu 0', 'Konu 1', 'Konu 2']
+    assert result[13] == descriptions[13]
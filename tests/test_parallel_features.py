@@ -0,0 +1,26 @@
+"""
+Parallel Feature Engineering
+engineer_in_parallel must give exactly what the serial engineer_features
+gives, with and without pyarrow for the worker results
+"""
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import parallel_features
+from src.data_preprocessing import DataPreprocessor
+from test_feature_memory import synthetic_videos
+
+
+@pytest.mark.parametrize('has_pyarrow', [True, False])
+def test_parallel_matches_serial(monkeypatch, has_pyarrow):
+    if has_pyarrow and not parallel_features.HAS_PYARROW:
+        pytest.skip('pyarrow is not installed')
+    monkeypatch.setattr(parallel_features, 'HAS_PYARROW', has_pyarrow)
+    df = synthetic_videos(rows=600)
+    expected = DataPreprocessor(verbose=False).engineer_features(df.copy())
+    result = parallel_features.engineer_in_parallel(df.copy(), workers=3, min_rows=100)
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,61 @@
+"""
+ISO 8601 Duration Parsing
+parse_iso_durations must give exactly what parse_iso_duration gives, value
+by value, and the collector's batch frame build must use it
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.parsing_utils import parse_iso_duration, parse_iso_durations
+from src.data_collection import add_duration_columns
+
+DURATIONS = [
+    # Usual video lengths
+    'PT0S', 'PT45S', 'PT4M13S', 'PT1H2M3S', 'PT10H', 'PT59M59S',
+    # Days, weeks, months and years (nominal 30 / 365 day lengths)
+    'P1D', 'P1DT2H', 'P1DT2H3M4S', 'P2W', 'P1M', 'P1Y2M3W4DT5H6M7S',
+    # Fractional values, with a dot or a comma
+    'PT1.5S', 'PT0.4S', 'PT0.6S', 'PT2,5M', 'PT1.25H', 'P0.5D',
+    # Lowercase and surrounding whitespace
+    'pt1m', ' PT30S ', 'PT1m2s',
+    # Malformed
+    '', 'P', 'PT', 'T1M', 'PT1H2', '1M', 'PT-5S', 'PT1M1H', 'P1H', 'abc', 'PT1..5S',
+    # Missing
+    None, np.nan,
+]
+
+
+def test_matches_scalar_parser():
+    result = parse_iso_durations(pd.Series(DURATIONS, dtype=object))
+    expected = pd.Series([parse_iso_duration(value) for value in DURATIONS], dtype=np.int64,
+                         name='duration_seconds')
+    pd.testing.assert_series_equal(result, expected)
+
+
+def test_known_values():
+    result = parse_iso_durations(pd.Series(['P1DT2H', 'PT1.5S', 'PT1H2M3S', 'PT1H2', None], dtype=object))
+    assert result.tolist() == [93600, 2, 3723, 0, 0]
+
+
+def test_repeated_values_and_index():
+    values = pd.Series(['PT1M', 'garbage', 'PT1M', None, 'P1DT2H'] * 3, index=range(100, 115), dtype=object)
+    result = parse_iso_durations(values)
+    assert list(result.index) == list(values.index)
+    assert result.tolist() == [parse_iso_duration(value) for value in values]
+
+
+def test_empty_column():
+    result = parse_iso_durations(pd.Series([], dtype=object))
+    assert len(result) == 0 and result.dtype == np.int64
+
+
+def test_duration_columns_replace_raw_duration_in_place():
+    df = pd.DataFrame({'video_id': ['a', 'b', 'c'], 'duration': ['PT1M30S', 'P1DT2H', 'bad'], 'view_count': [1, 2, 3]})
+    result = add_duration_columns(df)
+    assert list(result.columns) == ['video_id', 'duration_seconds', 'duration_minutes', 'view_count']
+    assert result['duration_seconds'].tolist() == [90, 93600, 0]
+    assert result['duration_minutes'].tolist() == [1.5, 1560.0, 0.0]
@@ -0,0 +1,96 @@
+"""
+Title Feature Equivalence
+extract_title_features_frame must give exactly what the per-row
+extract_title_features gives, title by title
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_preprocessing import DataPreprocessor
+
+EDGE_CASE_TITLES = [
+    # Missing and empty
+    None,
+    np.nan,
+    '',
+    ' ',
+    # Turkish dotted/dotless i and other cased letters
+    'İSTANBUL ışık ılık İnce',
+    'Iİıi ÇĞÖŞÜ çğöşü',
+    'ǅemal ǈ title-case digraphs',
+    # Emoji, alone and inside words, with modifiers and joiners
+    '🔥',
+    'Python🔥Tutorial 🚀🚀',
+    '👨‍👩‍👧 family ✅ check ❤️',
+    # Unicode digits and whitespace
+    '٣ Arabic-Indic ३ Devanagari ３ fullwidth',
+    '²³ superscripts ½',
+    'no-break space em　ideographic',
+    '\ttab\nnewline\r\nend  ',
+    'zero​width',
+    # Question and exclamation marks
+    'Why?',
+    '!!!',
+    '¿Qué? ¡Hola!',
+    'What is this?!',
+    # Special characters
+    '@#$%^&*(),.?":{}|<>',
+    # Tutorial and question keywords, in any case
+    'Python Tutorial for Beginners',
+    'DERS 1: Nasıl Yapılır',
+    'React Eğitimi - Başlangıç',
+    'How to learn Django',
+    'ne nedir neden nasıl',
+    'tutorialspoint',
+    # Plain titles
+    'Learn JavaScript in 10 Minutes',
+    'a',
+]
+
+
+def per_row(preprocessor, titles):
+    rows = [preprocessor.extract_title_features(title) for title in titles]
+    return pd.DataFrame(rows, index=titles.index)
+
+
+@pytest.fixture
+def preprocessor():
+    return DataPreprocessor(verbose=False)
+
+
+def test_edge_cases_match_per_row(preprocessor):
+    titles = pd.Series(EDGE_CASE_TITLES, dtype=object)
+    expected = per_row(preprocessor, titles)
+    result = preprocessor.extract_title_features_frame(titles)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_each_title_alone_matches_per_row(preprocessor):
+    for title in EDGE_CASE_TITLES:
+        titles = pd.Series([title], dtype=object)
+        expected = per_row(preprocessor, titles)
+        result = preprocessor.extract_title_features_frame(titles)
+        # The per-row ratio of an empty title is the int 0, which alone makes an int64 column
+        pd.testing.assert_frame_equal(result, expected, check_dtype=bool(pd.notna(title) and title),
+                                      obj=repr(title))
+
+
+def test_index_is_kept(preprocessor):
+    titles = pd.Series(['Why?', None, 'Python Tutorial 🔥'], index=[7, 3, 11], dtype=object)
+    result = preprocessor.extract_title_features_frame(titles)
+    assert list(result.index) == [7, 3, 11]
+    pd.testing.assert_frame_equal(result, per_row(preprocessor, titles))
+
+
+def test_random_titles_match_per_row(preprocessor):
+    alphabet = list('aAıIİiçÇğĞ Tt?!.,:#@1٣३ 🔥😀 \t') + ['tutorial', 'nasıl', 'how to', 'ders ']
+    rng = np.random.default_rng(0)
+    titles = pd.Series([''.join(rng.choice(alphabet, size=rng.integers(0, 30))) for _ in range(500)],
+                       dtype=object)
+    pd.testing.assert_frame_equal(preprocessor.extract_title_features_frame(titles),
+                                  per_row(preprocessor, titles))
@@ -15,6 +15,7 @@ from sklearn.model_selection import train_test_split
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.improved_model_training import ImprovedModelTrainer
+from src.storage import table_exists
 
 
 def main() -> int:
@@ -25,7 +26,10 @@ def main() -> int:
     trainer = ImprovedModelTrainer()
 
     input_path = "processed_data/youtube_videos_processed_all.csv"
-    if not os.path.exists(input_path):
+    if not table_exists(input_path):
+        # The table run_preprocessing.py writes
+        input_path = "processed_data/youtube_videos_processed.csv"
+    if not table_exists(input_path):
         print(f"Error: Processed data not found: {input_path}")
         return 1
 